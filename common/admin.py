@@ -1,3 +1,9 @@
 from django.contrib import admin
+from .models import ArchiveSegment
 
-# Register your models here.
+@admin.register(ArchiveSegment)
+class ArchiveSegmentAdmin(admin.ModelAdmin):
+    list_display = ['model_label', 'period_start', 'row_count', 'size_bytes', 'created_at']
+    list_filter = ['model_label']
+    search_fields = ['path']
+    readonly_fields = ['model_label', 'period_start', 'path', 'row_count', 'size_bytes', 'checksum', 'created_at']
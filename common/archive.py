@@ -0,0 +1,220 @@
+import gzip
+import hashlib
+import heapq
+import itertools
+import json
+import tempfile
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import storages
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from .ids import uuid7
+from .models import ArchiveSegment, ArchiveEntry
+from .partitioning import add_months
+
+
+def _row_key(row):
+    return row['created_at'], str(row['id'])
+
+
+class _Newest:
+    """Heap key that pops the newest row first"""
+    __slots__ = ('key',)
+
+    def __init__(self, key):
+        self.key = key
+
+    def __lt__(self, other):
+        return self.key > other.key
+
+
+class ArchiveService:
+    """
+    Moves rows older than ARCHIVE_AFTER_DAYS out of hot tables into monthly
+    gzip JSONL segments on the 'archive' storage, and reads them back for a
+    set of owners. Models may define archive_net_amount(row) to keep the
+    balance effect of archived rows in the manifest, and archive_exclude (a Q)
+    for rows that can still change and must stay in the table for now.
+    """
+
+    @staticmethod
+    def storage():
+        return storages['archive']
+
+    @staticmethod
+    def start_of_day(moment):
+        """Midnight of the local day containing `moment`"""
+        return timezone.make_aware(datetime.combine(timezone.localtime(moment).date(), time.min))
+
+    @staticmethod
+    def archivable(model):
+        exclude = getattr(model, 'archive_exclude', None)
+        return model.objects.exclude(exclude) if exclude is not None else model.objects.all()
+
+    @staticmethod
+    def archive(model_label, before=None):
+        """
+        Archive every row created before the start of the day containing
+        `before`, one month at a time; return the row count. Whole days move
+        together so per-day aggregates rebuilt from hot rows (the spending
+        rollups) never see a day that is half archived.
+        """
+        model = apps.get_model(model_label)
+        before = before or timezone.now() - timedelta(days=settings.ARCHIVE_AFTER_DAYS)
+        before = ArchiveService.start_of_day(before)
+        total = 0
+        while True:
+            oldest = ArchiveService.archivable(model).filter(created_at__lt=before).aggregate(first=Min('created_at'))['first']
+            if oldest is None:
+                return total
+            month = oldest.astimezone(dt_timezone.utc).date().replace(day=1)
+            start = datetime.combine(month, time.min, tzinfo=dt_timezone.utc)
+            end = min(datetime.combine(add_months(month, 1), time.min, tzinfo=dt_timezone.utc), before)
+            total += ArchiveService.archive_range(model_label, start, end)
+
+    @staticmethod
+    def archive_range(model_label, start, end):
+        """
+        Write rows with start <= created_at < end to one segment and delete
+        them from the table. Only the rows that were written are deleted, so a
+        row that appears in the range while the segment is being built stays
+        for the next run.
+        """
+        model = apps.get_model(model_label)
+        owner_field = settings.ARCHIVE_MODELS[model_label]
+        net_amount = getattr(model, 'archive_net_amount', None)
+        fields = [f.attname for f in model._meta.concrete_fields]
+        pk_field = model._meta.pk.attname
+        rows = ArchiveService.archivable(model).filter(created_at__gte=start, created_at__lt=end)
+        archived_ids = []
+        entries = []
+        digest = hashlib.sha256()
+        with tempfile.TemporaryFile() as segment_file:
+            group, owner = [], None
+
+            def flush():
+                data = gzip.compress(''.join(
+                    json.dumps(row, cls=DjangoJSONEncoder) + '\n' for row in group
+                ).encode())
+                entries.append(ArchiveEntry(
+                    model_label=model_label, owner_id=owner, offset=segment_file.tell(), length=len(data),
+                    row_count=len(group), first_at=group[0]['created_at'], last_at=group[-1]['created_at'],
+                    net_amount=sum(net_amount(row) for row in group) if net_amount else None
+                ))
+                segment_file.write(data)
+                digest.update(data)
+
+            ordered = rows.order_by(owner_field, 'created_at', 'id').values(*fields)
+            for row in ordered.iterator(chunk_size=2000):
+                if group and row[owner_field] != owner:
+                    flush()
+                    group = []
+                owner = row[owner_field]
+                group.append(row)
+                archived_ids.append(row[pk_field])
+            if not group:
+                return 0
+            flush()
+
+            size = segment_file.tell()
+            segment_file.seek(0)
+            path = (
+                f"{model._meta.app_label}/{model._meta.model_name}/"
+                f"{start:%Y-%m}/{uuid7().hex}.jsonl.gz"
+            )
+            path = ArchiveService.storage().save(path, File(segment_file))
+
+        row_count = sum(entry.row_count for entry in entries)
+        with transaction.atomic():
+            segment = ArchiveSegment.objects.create(
+                model_label=model_label, period_start=start.date(), path=path,
+                row_count=row_count, size_bytes=size, checksum=digest.hexdigest()
+            )
+            for entry in entries:
+                entry.segment = segment
+            ArchiveEntry.objects.bulk_create(entries, batch_size=1000)
+            for offset in range(0, len(archived_ids), 5000):
+                model.objects.filter(pk__in=archived_ids[offset:offset + 5000]).delete()
+        return row_count
+
+    @staticmethod
+    def entries(model_label, owner_ids, start=None, end=None):
+        entries = ArchiveEntry.objects.filter(model_label=model_label, owner_id__in=owner_ids)
+        if start:
+            entries = entries.filter(last_at__gte=start)
+        if end:
+            entries = entries.filter(first_at__lt=end)
+        return entries
+
+    @staticmethod
+    def _entry_rows(entry, fields, start=None, end=None, newest_first=True):
+        """Rows of one manifest entry (one owner within one segment), in key order"""
+        with ArchiveService.storage().open(entry.segment.path, 'rb') as segment_file:
+            segment_file.seek(entry.offset)
+            data = gzip.decompress(segment_file.read(entry.length))
+        rows = []
+        for line in data.decode().splitlines():
+            row = {name: fields[name].to_python(value) for name, value in json.loads(line).items()
+                   if name in fields}
+            if (start and row['created_at'] < start) or (end and row['created_at'] >= end):
+                continue
+            rows.append(row)
+        rows.sort(key=_row_key, reverse=newest_first)
+        return rows
+
+    @staticmethod
+    def iter_rows(model_label, owner_ids, start=None, end=None, newest_first=True):
+        """
+        Archived rows for the owners as {attname: value} dicts ordered by
+        (created_at, id), newest first unless newest_first is False. Entries
+        are visited in last_at (or first_at) order and one is decompressed
+        only once its leading row could be next, so memory holds the entries
+        overlapping the current position rather than the whole range.
+        """
+        model = apps.get_model(model_label)
+        fields = {f.attname: f for f in model._meta.concrete_fields}
+        entries = ArchiveService.entries(model_label, owner_ids, start, end).select_related('segment')
+        if newest_first:
+            entries, edge, heap_key = entries.order_by('-last_at', '-id'), 'last_at', _Newest
+        else:
+            entries, edge, heap_key = entries.order_by('first_at', 'id'), 'first_at', tuple
+        entries = entries.iterator(chunk_size=100)
+        pending = next(entries, None)
+        heap = []
+        sequence = itertools.count()
+
+        def push(rows):
+            row = next(rows, None)
+            if row is not None:
+                heapq.heappush(heap, (heap_key(_row_key(row)), next(sequence), row, rows))
+
+        def may_lead(entry):
+            top = heap[0][2]['created_at']
+            return getattr(entry, edge) >= top if newest_first else getattr(entry, edge) <= top
+
+        while heap or pending is not None:
+            while pending is not None and (not heap or may_lead(pending)):
+                push(iter(ArchiveService._entry_rows(pending, fields, start, end, newest_first)))
+                pending = next(entries, None)
+            if heap:
+                _, _, row, rows = heapq.heappop(heap)
+                yield row
+                push(rows)
+
+    @staticmethod
+    def instance(model_label, row):
+        """Unsaved model instance for an archived row, for use with existing serializers"""
+        instance = apps.get_model(model_label)(**row)
+        instance._state.adding = False
+        return instance
+
+    @staticmethod
+    def instances(model_label, rows):
+        return [ArchiveService.instance(model_label, row) for row in rows]
@@ -36,6 +36,48 @@ TRANSACTION_TYPE_CHOICES = [
     (TRANSACTION_INTEREST_CREDIT, 'Interest Credit'),
 ]
 
+# Transaction types that add to / take from the wallet balance (debits also take the fee)
+WALLET_CREDIT_TYPES = [
+    TRANSACTION_DEPOSIT, TRANSACTION_LOAN_DISBURSEMENT,
+    TRANSACTION_INTEREST_CREDIT, TRANSACTION_SAVINGS_WITHDRAWAL,
+]
+WALLET_DEBIT_TYPES = [
+    TRANSACTION_WITHDRAWAL, TRANSACTION_TRANSFER,
+    TRANSACTION_LOAN_REPAYMENT, TRANSACTION_SAVINGS_DEPOSIT,
+]
+
+# Ledger accounts (postings against a wallet use LEDGER_ACCOUNT_WALLET)
+LEDGER_ACCOUNT_WALLET = 'WALLET'
+LEDGER_ACCOUNT_EXTERNAL = 'EXTERNAL'
+LEDGER_ACCOUNT_FEE_INCOME = 'FEE_INCOME'
+LEDGER_ACCOUNT_SAVINGS = 'SAVINGS'
+LEDGER_ACCOUNT_LOANS = 'LOANS'
+LEDGER_ACCOUNT_CRYPTO = 'CRYPTO'
+
+LEDGER_ACCOUNT_CHOICES = [
+    (LEDGER_ACCOUNT_WALLET, 'Customer Wallet'),
+    (LEDGER_ACCOUNT_EXTERNAL, 'External Clearing'),
+    (LEDGER_ACCOUNT_FEE_INCOME, 'Fee Income'),
+    (LEDGER_ACCOUNT_SAVINGS, 'Savings Pool'),
+    (LEDGER_ACCOUNT_LOANS, 'Loan Book'),
+    (LEDGER_ACCOUNT_CRYPTO, 'Crypto Settlement'),
+]
+
+LEDGER_ENTRY_OPENING_BALANCE = 'OPENING_BALANCE'
+
+# Reconciliation run / partition status
+RECONCILIATION_PENDING = 'PENDING'
+RECONCILIATION_RUNNING = 'RUNNING'
+RECONCILIATION_COMPLETED = 'COMPLETED'
+RECONCILIATION_FAILED = 'FAILED'
+
+RECONCILIATION_STATUS_CHOICES = [
+    (RECONCILIATION_PENDING, 'Pending'),
+    (RECONCILIATION_RUNNING, 'Running'),
+    (RECONCILIATION_COMPLETED, 'Completed'),
+    (RECONCILIATION_FAILED, 'Failed'),
+]
+
 # Transaction status
 TRANSACTION_PENDING = 'PENDING'
 TRANSACTION_COMPLETED = 'COMPLETED'
@@ -49,6 +91,30 @@ TRANSACTION_STATUS_CHOICES = [
     (TRANSACTION_CANCELLED, 'Cancelled'),
 ]
 
+# Wallet hold status
+HOLD_ACTIVE = 'ACTIVE'
+HOLD_CAPTURED = 'CAPTURED'
+HOLD_RELEASED = 'RELEASED'
+HOLD_EXPIRED = 'EXPIRED'
+
+HOLD_STATUS_CHOICES = [
+    (HOLD_ACTIVE, 'Active'),
+    (HOLD_CAPTURED, 'Captured'),
+    (HOLD_RELEASED, 'Released'),
+    (HOLD_EXPIRED, 'Expired'),
+]
+
+# Standing order frequencies
+FREQUENCY_DAILY = 'DAILY'
+FREQUENCY_WEEKLY = 'WEEKLY'
+FREQUENCY_MONTHLY = 'MONTHLY'
+
+FREQUENCY_CHOICES = [
+    (FREQUENCY_DAILY, 'Daily'),
+    (FREQUENCY_WEEKLY, 'Weekly'),
+    (FREQUENCY_MONTHLY, 'Monthly'),
+]
+
 # KYC levels
 KYC_LEVEL_0 = 'LEVEL_0'
 KYC_LEVEL_1 = 'LEVEL_1'
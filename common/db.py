@@ -0,0 +1,42 @@
+import functools
+import random
+import time
+
+from django.db import connection
+from django.db.utils import OperationalError
+
+# PostgreSQL SQLSTATE codes for serialization_failure and deadlock_detected
+RETRYABLE_PGCODES = {'40001', '40P01'}
+RETRYABLE_MESSAGES = ('database is locked', 'deadlock')
+
+
+def is_retryable_error(exc):
+    """Return True if the database error is a deadlock or serialization failure"""
+    pgcode = getattr(exc.__cause__, 'pgcode', None)
+    if pgcode in RETRYABLE_PGCODES:
+        return True
+    message = str(exc).lower()
+    return any(fragment in message for fragment in RETRYABLE_MESSAGES)
+
+
+def retry_on_conflict(func=None, *, attempts=3, base_delay=0.05):
+    """
+    Re-run an atomic unit of work when the database aborts it because of a
+    deadlock or serialization failure. Must wrap the outermost atomic block;
+    inside an enclosing transaction the error is re-raised untouched.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            for attempt in range(1, attempts + 1):
+                try:
+                    return func(*args, **kwargs)
+                except OperationalError as exc:
+                    if attempt == attempts or connection.in_atomic_block or not is_retryable_error(exc):
+                        raise
+                    time.sleep(base_delay * (2 ** (attempt - 1)) * (1 + random.random()))
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
@@ -0,0 +1,175 @@
+import functools
+import hashlib
+import json
+import math
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.http import QueryDict
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = 'HTTP_IDEMPOTENCY_KEY'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+
+
+# Credentials are left out of the fingerprint: a stored hash of a 4-digit PIN is trivially reversible
+FINGERPRINT_EXCLUDED_FIELDS = ('pin', 'pin_token')
+
+
+def request_fingerprint(request):
+    """Hash of the method, path and body so a reused key with a different payload is rejected"""
+    data = request.data
+    if isinstance(data, QueryDict):
+        data = dict(data.lists())
+    if isinstance(data, dict):
+        data = {name: value for name, value in data.items() if name not in FINGERPRINT_EXCLUDED_FIELDS}
+    body = json.dumps(data, sort_keys=True, cls=DjangoJSONEncoder)
+    raw = f"{request.method}:{request.path}:{body}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class IdempotencyService:
+    @staticmethod
+    def lease():
+        return getattr(settings, 'IDEMPOTENCY_LEASE', timedelta(seconds=60))
+
+    @staticmethod
+    def claim(user, key, fingerprint, request):
+        """
+        Return (record, created); created is False when the key is already in
+        use. A PROCESSING record with a matching fingerprint whose lease has
+        lapsed (its worker died mid-request) is taken over and counts as created.
+        """
+        now = timezone.now()
+        IdempotencyKey.objects.filter(user=user, key=key, expires_at__lte=now).delete()
+        try:
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(
+                    user=user,
+                    key=key,
+                    method=request.method,
+                    path=request.path[:255],
+                    fingerprint=fingerprint,
+                    locked_until=now + IdempotencyService.lease(),
+                    expires_at=now + getattr(settings, 'IDEMPOTENCY_KEY_TTL', timedelta(hours=24))
+                )
+            return record, True
+        except IntegrityError:
+            record = IdempotencyKey.objects.filter(user=user, key=key).first()
+        if (record is not None and record.status == IdempotencyKey.STATUS_PROCESSING
+                and record.fingerprint == fingerprint and IdempotencyService.lease_end(record) <= now):
+            locked_until = now + IdempotencyService.lease()
+            reclaimed = IdempotencyKey.objects.filter(
+                pk=record.pk, status=IdempotencyKey.STATUS_PROCESSING, locked_until=record.locked_until
+            ).update(locked_until=locked_until, updated_at=now)
+            if reclaimed:
+                record.locked_until = locked_until
+                return record, True
+        return record, False
+
+    @staticmethod
+    def complete(record, response):
+        record.status = IdempotencyKey.STATUS_COMPLETED
+        record.response_status = response.status_code
+        record.response_body = response.data
+        record.locked_until = None
+        record.save(update_fields=['status', 'response_status', 'response_body', 'locked_until', 'updated_at'])
+
+    @staticmethod
+    def release(record):
+        IdempotencyKey.objects.filter(pk=record.pk).delete()
+
+    @staticmethod
+    def lease_end(record):
+        # Records claimed before leases existed fall back to their last update
+        return record.locked_until or record.updated_at + IdempotencyService.lease()
+
+    @staticmethod
+    def wait(record):
+        """
+        Poll an in-flight record until it completes, is released or its lease
+        lapses, for at most IDEMPOTENCY_WAIT. Return the latest record, or
+        None once it has been released.
+        """
+        wait = getattr(settings, 'IDEMPOTENCY_WAIT', timedelta(seconds=5))
+        deadline = min(timezone.now() + wait, IdempotencyService.lease_end(record))
+        delay = 0.05
+        while timezone.now() < deadline:
+            time.sleep(min(delay, max(0, (deadline - timezone.now()).total_seconds())))
+            record = IdempotencyKey.objects.filter(pk=record.pk).first()
+            if record is None or record.status == IdempotencyKey.STATUS_COMPLETED:
+                return record
+            delay = min(delay * 2, 0.5)
+        return record
+
+    @staticmethod
+    def retry_after(record):
+        """Whole seconds until an in-flight record's lease lapses, at least 1"""
+        return max(1, math.ceil((IdempotencyService.lease_end(record) - timezone.now()).total_seconds()))
+
+    @staticmethod
+    def purge_expired():
+        deleted, _ = IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()
+        return deleted
+
+
+def idempotent(view_method):
+    """
+    Make an APIView handler safe to retry. Requests carrying an
+    Idempotency-Key header run once per user and key; replays get the stored
+    response. A duplicate that arrives while the first request is still
+    running waits up to IDEMPOTENCY_WAIT (never past the first request's
+    lease) for its response, then gets 409 with Retry-After.
+    """
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.META.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > 255:
+            return Response({'error': 'Idempotency-Key must be at most 255 characters'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        fingerprint = request_fingerprint(request)
+        waited = False
+        while True:
+            record, created = IdempotencyService.claim(request.user, key, fingerprint, request)
+            if created:
+                break
+            if record is None:
+                # The first request failed and released the key; take it over
+                continue
+            if record.fingerprint != fingerprint:
+                return Response({'error': 'Idempotency-Key was already used with a different request'},
+                                status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+            if record.status != IdempotencyKey.STATUS_COMPLETED and not waited:
+                waited = True
+                record = IdempotencyService.wait(record)
+                if record is None or record.status != IdempotencyKey.STATUS_COMPLETED:
+                    # Released or lease lapsed: claim again, which takes a stale lease over
+                    continue
+            if record.status != IdempotencyKey.STATUS_COMPLETED:
+                return Response({'error': 'A request with this Idempotency-Key is still being processed'},
+                                status=status.HTTP_409_CONFLICT,
+                                headers={'Retry-After': str(IdempotencyService.retry_after(record))})
+            return Response(record.response_body, status=record.response_status,
+                            headers={REPLAYED_HEADER: 'true'})
+
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except Exception:
+            IdempotencyService.release(record)
+            raise
+        if response.status_code >= 500:
+            IdempotencyService.release(record)
+        else:
+            IdempotencyService.complete(record, response)
+        return response
+    return wrapper
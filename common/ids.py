@@ -0,0 +1,65 @@
+import secrets
+import threading
+import time
+import uuid
+
+CROCKFORD_BASE32 = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+
+
+class _MonotonicClock:
+    """
+    Millisecond timestamp plus `bits` of entropy. Within one millisecond the
+    entropy is incremented instead of redrawn, so values generated by this
+    process are strictly increasing.
+    """
+
+    def __init__(self, bits):
+        self.bits = bits
+        self.last_ms = 0
+        self.last_entropy = 0
+        self.lock = threading.Lock()
+
+    def next(self):
+        with self.lock:
+            ms = time.time_ns() // 1_000_000
+            if ms > self.last_ms:
+                entropy = secrets.randbits(self.bits)
+            else:
+                ms = self.last_ms
+                entropy = self.last_entropy + 1
+                if entropy >> self.bits:
+                    ms += 1
+                    entropy = secrets.randbits(self.bits)
+            self.last_ms, self.last_entropy = ms, entropy
+            return ms, entropy
+
+
+_uuid7_clock = _MonotonicClock(74)
+_ulid_clock = _MonotonicClock(80)
+
+
+def uuid7():
+    """RFC 9562 version 7 UUID: 48-bit Unix milliseconds followed by random bits"""
+    ms, entropy = _uuid7_clock.next()
+    value = (ms & 0xFFFFFFFFFFFF) << 80
+    value |= 0x7 << 76
+    value |= (entropy >> 62) << 64
+    value |= 0b10 << 62
+    value |= entropy & ((1 << 62) - 1)
+    return uuid.UUID(int=value)
+
+
+def ulid():
+    """26-character Crockford base32 ULID; sorts lexically by creation time"""
+    ms, entropy = _ulid_clock.next()
+    value = ((ms & 0xFFFFFFFFFFFF) << 80) | entropy
+    chars = []
+    for _ in range(26):
+        chars.append(CROCKFORD_BASE32[value & 0x1F])
+        value >>= 5
+    return ''.join(reversed(chars))
+
+
+def time_ordered_reference(prefix):
+    """Human-facing reference such as TXN-01HZX3K5C8Q9W4N2B7M6R5T0VY"""
+    return f"{prefix}-{ulid()}"
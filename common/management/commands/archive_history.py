@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from common.archive import ArchiveService
+
+class Command(BaseCommand):
+    help = 'Move old transaction, notification and activity rows to compressed cold-storage segments'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', action='append', help='Model label, e.g. wallet.Transaction (repeatable)')
+        parser.add_argument('--older-than-days', type=int, default=None,
+                            help='Archive rows older than this many days (default ARCHIVE_AFTER_DAYS)')
+
+    def handle(self, *args, **options):
+        labels = options['model'] or list(settings.ARCHIVE_MODELS)
+        unknown = [label for label in labels if label not in settings.ARCHIVE_MODELS]
+        if unknown:
+            raise CommandError(f"Not in ARCHIVE_MODELS: {', '.join(unknown)}")
+        days = options['older_than_days'] or settings.ARCHIVE_AFTER_DAYS
+        before = ArchiveService.start_of_day(timezone.now() - timedelta(days=days))
+        self.stdout.write(f'Archiving rows created before {before:%Y-%m-%d %H:%M}...')
+        for label in labels:
+            archived = ArchiveService.archive(label, before=before)
+            self.stdout.write(self.style.SUCCESS(f'{label}: archived {archived} rows'))
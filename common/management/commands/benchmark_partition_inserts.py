@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from common.partitioning import PartitionManager
+
+class Command(BaseCommand):
+    help = 'Measure insert throughput into a partitioned table with and without key registry triggers (PostgreSQL)'
+
+    columns = 'id uuid NOT NULL, reference varchar(100) NOT NULL, created_at timestamptz NOT NULL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000, help='Rows inserted per table')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per INSERT statement')
+
+    def insert(self, cursor, table, rows, batch_size):
+        """Insert `rows` rows in multi-row INSERTs; return rows per second"""
+        started = time.perf_counter()
+        for start in range(0, rows, batch_size):
+            cursor.execute(
+                f"INSERT INTO {table} (id, reference, created_at) "
+                f"SELECT gen_random_uuid(), 'REF-' || g, now() FROM generate_series(%s, %s) g",
+                [start, min(start + batch_size, rows) - 1]
+            )
+        return rows / (time.perf_counter() - started)
+
+    def handle(self, *args, **options):
+        if not PartitionManager.supported():
+            raise CommandError('Table partitioning requires PostgreSQL')
+        rows, batch_size = options['rows'], options['batch_size']
+        # Scratch tables live in a transaction that is rolled back, so nothing persists
+        with transaction.atomic(), connection.cursor() as cursor:
+            # Baseline: the partitioned layout convert() produces, minus the registries
+            cursor.execute(
+                f"CREATE TABLE bench_plain ({self.columns}, PRIMARY KEY (id, created_at), "
+                f"UNIQUE (reference, created_at)) PARTITION BY RANGE (created_at)"
+            )
+            cursor.execute("CREATE TABLE bench_plain_default PARTITION OF bench_plain DEFAULT")
+            cursor.execute(f"CREATE TABLE bench_registry ({self.columns}, PRIMARY KEY (id), UNIQUE (reference))")
+            manager = PartitionManager('bench_registry')
+            manager.convert(months_ahead=1)
+            registries = [registry for registry, _ in manager.registries()]
+
+            without_triggers = self.insert(cursor, 'bench_plain', rows, batch_size)
+            with_triggers = self.insert(cursor, 'bench_registry', rows, batch_size)
+            transaction.set_rollback(True)
+
+        self.stdout.write(f'{rows} rows in batches of {batch_size}; registries: {", ".join(registries)}')
+        self.stdout.write(f'  without registry triggers: {without_triggers:,.0f} rows/s')
+        self.stdout.write(f'  with registry triggers:    {with_triggers:,.0f} rows/s')
+        self.stdout.write(self.style.SUCCESS(f'  overhead: {1 - with_triggers / without_triggers:.1%}'))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+from common.partitioning import PartitionManager
+
+class Command(BaseCommand):
+    help = 'Convert history tables to monthly partitions, pre-create future months and detach old ones (PostgreSQL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', action='append', dest='models',
+                            help='Model label such as wallet.Transaction (default: PARTITIONED_MODELS)')
+        parser.add_argument('--convert', action='store_true', help='Partition tables that are not partitioned yet')
+        parser.add_argument('--months-ahead', type=int, default=None, help='Future months to pre-create')
+        parser.add_argument('--detach-older-than', type=int, default=None, metavar='MONTHS',
+                            help='Detach partitions older than this many months')
+        parser.add_argument('--drop', action='store_true', help='Drop detached partitions instead of keeping them')
+
+    def handle(self, *args, **options):
+        if not PartitionManager.supported():
+            raise CommandError('Table partitioning requires PostgreSQL')
+        managers = (
+            [PartitionManager.for_model(label) for label in options['models']]
+            if options['models'] else PartitionManager.configured()
+        )
+        for manager in managers:
+            if options['convert']:
+                dropped = manager.convert(options['months_ahead'])
+                if dropped is None:
+                    self.stdout.write(f'{manager.table}: already partitioned')
+                else:
+                    self.stdout.write(self.style.SUCCESS(f'{manager.table}: converted'))
+                    for name in dropped:
+                        self.stdout.write(self.style.WARNING(f'  dropped foreign key {name}'))
+            elif not manager.is_partitioned():
+                self.stdout.write(self.style.WARNING(f'{manager.table}: not partitioned, use --convert'))
+                continue
+            created = manager.ensure_partitions(options['months_ahead'])
+            self.stdout.write(f'{manager.table}: partitions through {created[-1] if created else "existing"}')
+            if options['detach_older_than'] is not None:
+                detached = manager.detach_older_than(options['detach_older_than'], drop=options['drop'])
+                action = 'Dropped' if options['drop'] else 'Detached'
+                self.stdout.write(self.style.SUCCESS(f'{manager.table}: {action} {len(detached)} partitions'))
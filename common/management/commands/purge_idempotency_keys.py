@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from common.idempotency import IdempotencyService
+
+class Command(BaseCommand):
+    help = 'Delete expired idempotency keys'
+
+    def handle(self, *args, **options):
+        deleted = IdempotencyService.purge_expired()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired idempotency keys'))
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.1 on 2026-10-17 07:36
+
+import common.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='idempotencykey',
+            name='id',
+            field=models.UUIDField(default=common.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.0.1 on 2026-10-17 07:38
+
+import common.ids
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0002_time_ordered_ids'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveSegment',
+            fields=[
+                ('id', models.UUIDField(default=common.ids.uuid7, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('model_label', models.CharField(max_length=100)),
+                ('period_start', models.DateField(help_text='First day of the month the rows were created in')),
+                ('path', models.CharField(max_length=255, unique=True)),
+                ('row_count', models.PositiveIntegerField(default=0)),
+                ('size_bytes', models.PositiveBigIntegerField(default=0)),
+                ('checksum', models.CharField(help_text='SHA-256 of the file', max_length=64)),
+            ],
+            options={
+                'db_table': 'archive_segments',
+                'indexes': [models.Index(fields=['model_label', 'period_start'], name='archive_seg_model_l_f437c2_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchiveEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_label', models.CharField(max_length=100)),
+                ('owner_id', models.UUIDField()),
+                ('offset', models.PositiveBigIntegerField()),
+                ('length', models.PositiveBigIntegerField()),
+                ('row_count', models.PositiveIntegerField()),
+                ('first_at', models.DateTimeField()),
+                ('last_at', models.DateTimeField()),
+                ('net_amount', models.DecimalField(blank=True, decimal_places=2, help_text='Balance effect of the archived rows, for models that define one', max_digits=15, null=True)),
+                ('segment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entries', to='common.archivesegment')),
+            ],
+            options={
+                'db_table': 'archive_entries',
+                'indexes': [models.Index(fields=['model_label', 'owner_id', 'last_at'], name='archive_ent_model_l_019169_idx')],
+            },
+        ),
+    ]
@@ -1,12 +1,91 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
-import uuid
+from .ids import uuid7
 
 class TimeStampedModel(models.Model):
     """Abstract base class with created_at and updated_at fields"""
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         abstract = True
-        ordering = ['-created_at']
\ No newline at end of file
+        ordering = ['-created_at']
+
+
+class IdempotencyKey(TimeStampedModel):
+    """Stored outcome of a request made with an Idempotency-Key header"""
+    STATUS_PROCESSING = 'PROCESSING'
+    STATUS_COMPLETED = 'COMPLETED'
+    STATUS_CHOICES = [
+        (STATUS_PROCESSING, 'Processing'),
+        (STATUS_COMPLETED, 'Completed'),
+    ]
+
+    user = models.ForeignKey('core.User', on_delete=models.CASCADE, related_name='idempotency_keys')
+    key = models.CharField(max_length=255)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PROCESSING)
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    # A PROCESSING record whose lease has lapsed belongs to a dead worker and may be reclaimed
+    locked_until = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        db_table = 'idempotency_keys'
+        unique_together = ['user', 'key']
+
+    def __str__(self):
+        return f"{self.key} - {self.status}"
+
+
+class ArchiveSegment(TimeStampedModel):
+    """
+    One compressed JSONL file of rows moved out of a hot table. The file is a
+    concatenation of gzip members, one per owner (wallet or user), each
+    located by an ArchiveEntry so a single owner's rows can be read back with
+    one ranged read.
+    """
+    model_label = models.CharField(max_length=100)
+    period_start = models.DateField(help_text="First day of the month the rows were created in")
+    path = models.CharField(max_length=255, unique=True)
+    row_count = models.PositiveIntegerField(default=0)
+    size_bytes = models.PositiveBigIntegerField(default=0)
+    checksum = models.CharField(max_length=64, help_text="SHA-256 of the file")
+
+    class Meta:
+        db_table = 'archive_segments'
+        indexes = [
+            models.Index(fields=['model_label', 'period_start']),
+        ]
+
+    def __str__(self):
+        return self.path
+
+
+class ArchiveEntry(models.Model):
+    """Manifest row: where one owner's archived rows sit inside a segment"""
+    segment = models.ForeignKey(ArchiveSegment, on_delete=models.CASCADE, related_name='entries')
+    model_label = models.CharField(max_length=100)
+    owner_id = models.UUIDField()
+    offset = models.PositiveBigIntegerField()
+    length = models.PositiveBigIntegerField()
+    row_count = models.PositiveIntegerField()
+    first_at = models.DateTimeField()
+    last_at = models.DateTimeField()
+    net_amount = models.DecimalField(
+        max_digits=15, decimal_places=2, null=True, blank=True,
+        help_text="Balance effect of the archived rows, for models that define one"
+    )
+
+    class Meta:
+        db_table = 'archive_entries'
+        indexes = [
+            models.Index(fields=['model_label', 'owner_id', 'last_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.model_label} {self.owner_id} ({self.row_count})"
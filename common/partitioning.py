@@ -0,0 +1,302 @@
+import re
+from datetime import date, datetime, time, timezone as dt_timezone
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+BOUND_RE = re.compile(r"FROM \((?P<lower>[^)]+)\) TO \((?P<upper>[^)]+)\)")
+COLUMNS_RE = re.compile(r"\((?P<columns>[^)]*)\)")
+REFERENCES_RE = re.compile(r"REFERENCES\s+(?P<table>[^\s(]+)\s*\((?P<columns>[^)]*)\)")
+
+
+def add_months(day, months):
+    year, month = divmod(day.month - 1 + months, 12)
+    return date(day.year + year, month + 1, 1)
+
+
+def _bound_date(value):
+    value = value.strip()
+    if value.upper() in ('MINVALUE', 'MAXVALUE'):
+        return None
+    return date.fromisoformat(value.strip("'")[:10])
+
+
+def _bound_literal(day):
+    return datetime.combine(day, time.min, tzinfo=dt_timezone.utc)
+
+
+def _column_names(definition):
+    """Column names of the first parenthesised list in a constraint definition"""
+    return tuple(c.strip().strip('"') for c in COLUMNS_RE.search(definition)['columns'].split(','))
+
+
+class PartitionManager:
+    """
+    Monthly RANGE partitioning of a table on created_at (PostgreSQL only).
+
+    convert() turns the existing table into the first partition (covering
+    everything up to the end of the current month) of a new partitioned
+    parent with the same name, so no rows are copied. PostgreSQL requires
+    unique constraints on a partitioned table to include the partition key,
+    so primary keys and unique constraints become (column..., created_at).
+    To keep the original keys unique across partitions, each one gets a
+    non-partitioned key registry table ({table}_{columns}_keys) backfilled
+    from the rows and kept in step by a trigger on the parent; a duplicate
+    key fails on the registry's primary key. Foreign keys that pointed at
+    the table are re-created against the matching registry, so they keep
+    their ON DELETE behaviour. Unique indexes that are not constraints are
+    only widened.
+    """
+
+    def __init__(self, table, column='created_at'):
+        self.table = table
+        self.column = column
+
+    @classmethod
+    def for_model(cls, label):
+        return cls(apps.get_model(label)._meta.db_table)
+
+    @classmethod
+    def configured(cls):
+        return [cls.for_model(label) for label in settings.PARTITIONED_MODELS]
+
+    @staticmethod
+    def supported():
+        return connection.vendor == 'postgresql'
+
+    def _require_postgres(self):
+        if not self.supported():
+            raise ValueError("Table partitioning requires PostgreSQL")
+
+    def _q(self, name):
+        return connection.ops.quote_name(name)
+
+    def partition_name(self, month):
+        return f"{self.table}_p{month:%Y%m}"
+
+    def registry_name(self, columns):
+        return f"{self.table}_{'_'.join(columns)}_keys"[:58]
+
+    def _repoint(self, definition, registries):
+        """Rewrite a foreign key definition to reference the registry for its columns, or None"""
+        match = REFERENCES_RE.search(definition)
+        columns = tuple(c.strip().strip('"') for c in match['columns'].split(','))
+        if columns not in registries:
+            return None
+        return definition[:match.start('table')] + self._q(registries[columns]) + definition[match.end('table'):]
+
+    def _create_registry(self, cursor, source, columns):
+        """Build the key registry for `columns` from `source` and keep it in step with the parent"""
+        q = self._q
+        registry = self.registry_name(columns)
+        keys = ', '.join(q(c) for c in columns)
+        old = ', '.join(f"OLD.{q(c)}" for c in columns)
+        new = ', '.join(f"NEW.{q(c)}" for c in columns)
+        cursor.execute(f"CREATE TABLE {q(registry)} AS SELECT {keys} FROM {q(source)}")
+        cursor.execute(f"ALTER TABLE {q(registry)} ADD PRIMARY KEY ({keys})")
+        cursor.execute(
+            f"""
+            CREATE OR REPLACE FUNCTION {q(registry + '_sync')}() RETURNS trigger LANGUAGE plpgsql AS $$
+            BEGIN
+                IF TG_OP = 'DELETE' THEN
+                    DELETE FROM {q(registry)} WHERE ({keys}) = ({old});
+                ELSIF TG_OP = 'INSERT' THEN
+                    INSERT INTO {q(registry)} ({keys}) VALUES ({new});
+                ELSIF ({old}) IS DISTINCT FROM ({new}) THEN
+                    DELETE FROM {q(registry)} WHERE ({keys}) = ({old});
+                    INSERT INTO {q(registry)} ({keys}) VALUES ({new});
+                END IF;
+                RETURN NULL;
+            END
+            $$
+            """
+        )
+        cursor.execute(
+            f"CREATE TRIGGER {q(registry + '_sync')} AFTER INSERT OR DELETE OR UPDATE OF {keys} "
+            f"ON {q(self.table)} FOR EACH ROW EXECUTE FUNCTION {q(registry + '_sync')}()"
+        )
+        return registry
+
+    def is_partitioned(self):
+        self._require_postgres()
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [self.table])
+            return cursor.fetchone() is not None
+
+    def partitions(self):
+        """Return [(name, lower, upper)] with None for MINVALUE/MAXVALUE bounds"""
+        self._require_postgres()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+                FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = to_regclass(%s)
+                ORDER BY c.relname
+                """,
+                [self.table]
+            )
+            rows = cursor.fetchall()
+        partitions = []
+        for name, bound in rows:
+            match = BOUND_RE.search(bound or '')
+            if match:
+                partitions.append((name, _bound_date(match['lower']), _bound_date(match['upper'])))
+        return partitions
+
+    def _with_partition_key(self, definition):
+        """Add the partition column to a PRIMARY KEY (...) / UNIQUE (...) definition"""
+        if self.column in _column_names(definition):
+            return definition
+        columns = COLUMNS_RE.search(definition)['columns']
+        return COLUMNS_RE.sub(f"({columns}, {self._q(self.column)})", definition, count=1)
+
+    @transaction.atomic
+    def convert(self, months_ahead=None):
+        """Partition the table in place; return the incoming foreign keys that had to be dropped"""
+        self._require_postgres()
+        if self.is_partitioned():
+            return None
+        q = self._q
+        legacy = f"{self.table}_legacy"
+        cutoff = add_months(timezone.now().date().replace(day=1), 1)
+        with connection.cursor() as cursor:
+            cursor.execute(f"LOCK TABLE {q(self.table)} IN ACCESS EXCLUSIVE MODE")
+            cursor.execute(
+                "SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint "
+                "WHERE conrelid = to_regclass(%s) AND contype IN ('p', 'u', 'f')",
+                [self.table]
+            )
+            constraints = cursor.fetchall()
+            constraint_names = {name for name, _, _ in constraints}
+            cursor.execute("SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s", [self.table])
+            indexes = [(name, definition) for name, definition in cursor.fetchall() if name not in constraint_names]
+            cursor.execute(
+                "SELECT conname, conrelid::regclass::text, pg_get_constraintdef(oid) FROM pg_constraint "
+                "WHERE confrelid = to_regclass(%s) AND contype = 'f'",
+                [self.table]
+            )
+            incoming = cursor.fetchall()
+
+            for name, referencing, _ in incoming:
+                cursor.execute(f"ALTER TABLE {referencing} DROP CONSTRAINT {q(name)}")
+            # Index names are schema-wide: move the old ones aside so the parent can reuse them
+            cursor.execute(f"ALTER TABLE {q(self.table)} RENAME TO {q(legacy)}")
+            for name in constraint_names | {name for name, _ in indexes}:
+                cursor.execute(
+                    "SELECT 1 FROM pg_class WHERE relname = %s AND relkind = 'i'", [name]
+                )
+                if cursor.fetchone():
+                    cursor.execute(f"ALTER INDEX {q(name)} RENAME TO {q(name[:56] + '_legacy')}")
+
+            cursor.execute(
+                f"CREATE TABLE {q(self.table)} (LIKE {q(legacy)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS "
+                f"INCLUDING STORAGE INCLUDING COMMENTS) PARTITION BY RANGE ({q(self.column)})"
+            )
+            for name, contype, definition in constraints:
+                if contype in ('p', 'u'):
+                    definition = self._with_partition_key(definition)
+                cursor.execute(f"ALTER TABLE {q(self.table)} ADD CONSTRAINT {q(name)} {definition}")
+            for name, definition in indexes:
+                if definition.startswith('CREATE UNIQUE INDEX'):
+                    definition = self._with_partition_key(definition)
+                cursor.execute(definition)
+
+            # A validated CHECK lets ATTACH skip its own full scan of the old table
+            check = f"{legacy[:50]}_bound"
+            cursor.execute(
+                f"ALTER TABLE {q(legacy)} ADD CONSTRAINT {q(check)} "
+                f"CHECK ({q(self.column)} IS NOT NULL AND {q(self.column)} < %s)",
+                [_bound_literal(cutoff)]
+            )
+            cursor.execute(
+                f"ALTER TABLE {q(self.table)} ATTACH PARTITION {q(legacy)} FOR VALUES FROM (MINVALUE) TO (%s)",
+                [_bound_literal(cutoff)]
+            )
+            cursor.execute(f"ALTER TABLE {q(legacy)} DROP CONSTRAINT {q(check)}")
+
+            registries = {}
+            for _, contype, definition in constraints:
+                columns = _column_names(definition) if contype in ('p', 'u') else ()
+                if columns and self.column not in columns:
+                    registries[columns] = self._create_registry(cursor, legacy, columns)
+            dropped = []
+            for name, referencing, definition in incoming:
+                definition = self._repoint(definition, registries)
+                if definition is None:
+                    dropped.append(name)
+                    continue
+                cursor.execute(f"ALTER TABLE {referencing} ADD CONSTRAINT {q(name)} {definition}")
+        self.ensure_partitions(months_ahead)
+        return dropped
+
+    @transaction.atomic
+    def ensure_partitions(self, months_ahead=None):
+        """Create monthly partitions through months_ahead months from now; return the new names"""
+        self._require_postgres()
+        months_ahead = settings.PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+        this_month = timezone.now().date().replace(day=1)
+        uppers = [upper for _, _, upper in self.partitions()]
+        start = max((u for u in uppers if u is not None), default=this_month)
+        end = add_months(this_month, months_ahead + 1)
+        created = []
+        with connection.cursor() as cursor:
+            while start < end:
+                following = add_months(start, 1)
+                name = self.partition_name(start)
+                cursor.execute(
+                    f"CREATE TABLE IF NOT EXISTS {self._q(name)} PARTITION OF {self._q(self.table)} "
+                    f"FOR VALUES FROM (%s) TO (%s)",
+                    [_bound_literal(start), _bound_literal(following)]
+                )
+                created.append(name)
+                start = following
+        return created
+
+    @transaction.atomic
+    def registries(self):
+        """Return [(registry table, key columns)] created by convert()"""
+        self._require_postgres()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT c.conname, pg_get_constraintdef(c.oid) FROM pg_constraint c "
+                "WHERE c.conrelid = to_regclass(%s) AND c.contype IN ('p', 'u')",
+                [self.table]
+            )
+            constraints = cursor.fetchall()
+            found = []
+            for _, definition in constraints:
+                columns = tuple(c for c in _column_names(definition) if c != self.column)
+                registry = self.registry_name(columns)
+                cursor.execute("SELECT to_regclass(%s)", [registry])
+                if cursor.fetchone()[0] is not None:
+                    found.append((registry, columns))
+            return found
+
+    def detach_older_than(self, months, drop=False):
+        """
+        Detach (and optionally drop) partitions entirely older than `months`
+        months. Keys of detached rows stay registered, so they remain taken
+        and anything referencing them stays valid; dropping a partition
+        removes its keys, which fails if they are still referenced.
+        """
+        self._require_postgres()
+        cutoff = add_months(timezone.now().date().replace(day=1), -months)
+        detached = []
+        registries = self.registries() if drop else []
+        with connection.cursor() as cursor:
+            for name, _, upper in self.partitions():
+                if upper is None or upper > cutoff:
+                    continue
+                cursor.execute(f"ALTER TABLE {self._q(self.table)} DETACH PARTITION {self._q(name)}")
+                if drop:
+                    for registry, columns in registries:
+                        keys = ', '.join(self._q(c) for c in columns)
+                        cursor.execute(
+                            f"DELETE FROM {self._q(registry)} WHERE ({keys}) IN (SELECT {keys} FROM {self._q(name)})"
+                        )
+                    cursor.execute(f"DROP TABLE {self._q(name)}")
+                detached.append(name)
+        return detached
@@ -0,0 +1,31 @@
+from celery import shared_task
+from django.conf import settings
+from .archive import ArchiveService
+from .idempotency import IdempotencyService
+from .partitioning import PartitionManager
+
+
+@shared_task
+def purge_idempotency_keys():
+    return IdempotencyService.purge_expired()
+
+
+@shared_task
+def maintain_partitions():
+    """Keep future monthly partitions in place and detach expired ones on partitioned tables"""
+    if not PartitionManager.supported():
+        return 0
+    created = 0
+    for manager in PartitionManager.configured():
+        if not manager.is_partitioned():
+            continue
+        created += len(manager.ensure_partitions())
+        if settings.PARTITION_RETENTION_MONTHS:
+            manager.detach_older_than(settings.PARTITION_RETENTION_MONTHS)
+    return created
+
+
+@shared_task
+def archive_history():
+    """Move rows older than ARCHIVE_AFTER_DAYS from every archived model to cold storage"""
+    return {label: ArchiveService.archive(label) for label in settings.ARCHIVE_MODELS}
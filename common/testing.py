@@ -0,0 +1,65 @@
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+
+def _format_queries(context):
+    return '\n'.join(f"  {i}. {q['sql']}" for i, q in enumerate(context.captured_queries, start=1))
+
+
+class QueryBudgetMixin:
+    """
+    TestCase mixin for guarding endpoints against N+1 regressions.
+
+        with self.assertMaxQueries(4):
+            self.client.get(url)
+
+        self.assertQueriesDoNotScale(
+            lambda: self.client.get(url),
+            lambda n: [TransactionService.deposit(wallet, Decimal('1.00')) for _ in range(n)],
+        )
+    """
+
+    @contextmanager
+    def assertMaxQueries(self, budget, using='default'):
+        with CaptureQueriesContext(connections[using]) as context:
+            yield context
+        executed = len(context.captured_queries)
+        if executed > budget:
+            self.fail(f"{executed} queries executed, budget is {budget}:\n{_format_queries(context)}")
+
+    def assertQueriesDoNotScale(self, request, add_rows, sizes=(1, 5, 20), using='default'):
+        """
+        Grow the data set to each size in turn via add_rows(n) (n = rows to
+        add) and assert request() runs the same number of queries every time.
+        """
+        counts = []
+        total = 0
+        for size in sizes:
+            add_rows(size - total)
+            total = size
+            with CaptureQueriesContext(connections[using]) as context:
+                request()
+            counts.append(len(context.captured_queries))
+        if len(set(counts)) > 1:
+            self.fail(
+                f"Query count grows with result size {dict(zip(sizes, counts))}; "
+                f"queries at size {sizes[-1]}:\n{_format_queries(context)}"
+            )
+        return counts[0]
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class QueryBudgetTestCase(QueryBudgetMixin, TestCase):
+    """QueryBudgetMixin with self.user and an API client authenticated as them"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'alice@example.com', 'password', first_name='Test', last_name='User'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
@@ -1,3 +1,143 @@
-from django.test import TestCase
+import threading
+import time
+import uuid
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from core.models import User
+from .idempotency import IdempotencyService, request_fingerprint
+from .ids import CROCKFORD_BASE32, _MonotonicClock, time_ordered_reference, ulid, uuid7
+from .models import IdempotencyKey
+from .partitioning import PartitionManager
+
+
+def fake_request(data, method='POST', path='/api/wallet/transfer/'):
+    return SimpleNamespace(data=data, method=method, path=path)
+
+
+class RequestFingerprintTests(SimpleTestCase):
+    def test_credentials_do_not_affect_fingerprint(self):
+        body = {'recipient_email': 'bob@example.com', 'amount': '5.00'}
+        self.assertEqual(
+            request_fingerprint(fake_request(body)),
+            request_fingerprint(fake_request({**body, 'pin': '1234', 'pin_token': 'token'})),
+        )
+
+    def test_payload_changes_fingerprint(self):
+        self.assertNotEqual(
+            request_fingerprint(fake_request({'amount': '5.00'})),
+            request_fingerprint(fake_request({'amount': '6.00'})),
+        )
+
+
+class IdempotencyClaimTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice@example.com', 'password')
+        self.request = fake_request({'amount': '5.00'})
+
+    def claim(self, fingerprint='abc'):
+        return IdempotencyService.claim(self.user, 'key-1', fingerprint, self.request)
+
+    def test_in_flight_claim_is_not_reclaimed(self):
+        self.assertTrue(self.claim()[1])
+        record, created = self.claim()
+        self.assertFalse(created)
+        self.assertGreaterEqual(IdempotencyService.retry_after(record), 1)
+
+    def test_stale_claim_is_reclaimed(self):
+        record, _ = self.claim()
+        IdempotencyKey.objects.filter(pk=record.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+        record, created = self.claim()
+        self.assertTrue(created)
+        self.assertGreater(record.locked_until, timezone.now())
+        self.assertFalse(self.claim()[1])
+
+    def test_stale_claim_with_other_payload_is_not_reclaimed(self):
+        record, _ = self.claim()
+        IdempotencyKey.objects.filter(pk=record.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertFalse(self.claim(fingerprint='other')[1])
+
+
+class PartitionKeyRegistryTests(SimpleTestCase):
+    """The DDL itself needs PostgreSQL; these cover the definition rewriting"""
+
+    def setUp(self):
+        self.manager = PartitionManager('transactions')
+
+    def test_unique_constraints_gain_partition_key(self):
+        self.assertEqual(self.manager._with_partition_key('UNIQUE (reference)'), 'UNIQUE (reference, "created_at")')
+        self.assertEqual(self.manager._with_partition_key('PRIMARY KEY (id, created_at)'), 'PRIMARY KEY (id, created_at)')
+
+    def test_foreign_key_is_repointed_to_registry(self):
+        registries = {('id',): self.manager.registry_name(('id',))}
+        definition = self.manager._repoint(
+            'FOREIGN KEY (transaction_id) REFERENCES transactions(id) DEFERRABLE INITIALLY DEFERRED', registries
+        )
+        self.assertEqual(
+            definition,
+            'FOREIGN KEY (transaction_id) REFERENCES "transactions_id_keys"(id) DEFERRABLE INITIALLY DEFERRED'
+        )
+
+    def test_foreign_key_without_registry_is_dropped(self):
+        self.assertIsNone(self.manager._repoint('FOREIGN KEY (ref) REFERENCES transactions(reference)', {}))
+
+
+class TimeOrderedIdTests(SimpleTestCase):
+    def frozen(self, ms):
+        """Stop the clock at `ms` with fresh generator state"""
+        for patcher in (
+            mock.patch('common.ids.time.time_ns', return_value=ms * 1_000_000),
+            mock.patch('common.ids._uuid7_clock', _MonotonicClock(74)),
+            mock.patch('common.ids._ulid_clock', _MonotonicClock(80)),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_uuid7_is_monotonic_within_one_millisecond(self):
+        ms = time.time_ns() // 1_000_000
+        self.frozen(ms)
+        values = [uuid7() for _ in range(1000)]
+        self.assertEqual(values, sorted(set(values)))
+        self.assertEqual({value.int >> 80 for value in values}, {ms})
+        self.assertEqual({(value.version, value.variant) for value in values}, {(7, uuid.RFC_4122)})
+
+    def test_reference_is_monotonic_within_one_millisecond(self):
+        ms = time.time_ns() // 1_000_000
+        self.frozen(ms)
+        references = [time_ordered_reference('TXN') for _ in range(1000)]
+        self.assertEqual(references, sorted(set(references)))
+        timestamps = {
+            sum(CROCKFORD_BASE32.index(char) << (5 * (9 - i)) for i, char in enumerate(reference[4:14]))
+            for reference in references
+        }
+        self.assertEqual(timestamps, {ms})
+
+    def test_exhausted_entropy_moves_to_next_millisecond(self):
+        clock = _MonotonicClock(2)
+        with mock.patch('common.ids.time.time_ns', return_value=5_000_000):
+            values = [clock.next() for _ in range(10)]
+        self.assertEqual(values, sorted(set(values)))
+        self.assertGreater(values[-1][0], 5)
+
+    def test_unique_across_a_threaded_burst(self):
+        results = []
+
+        def burst():
+            results.extend([(uuid7(), ulid()) for _ in range(2000)])
+
+        threads = [threading.Thread(target=burst) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len({u for u, _ in results}), 8000)
+        self.assertEqual(len({r for _, r in results}), 8000)
+
+    def test_reference_format(self):
+        for prefix in ('TXN', 'HOLD', 'LOAN'):
+            self.assertRegex(time_ordered_reference(prefix), rf'^{prefix}-[0-9A-HJKMNP-TV-Z]{{26}}$')
+        self.assertLess(time_ordered_reference('TXN'), time_ordered_reference('TXN'))
@@ -18,4 +18,60 @@ app.conf.beat_schedule = {
         'task': 'crypto.tasks.update_prices',
         'schedule': crontab(minute='*/15'),  # Every 15 minutes
     },
+    'checkpoint-wallet-balances': {
+        'task': 'wallet.tasks.checkpoint_balances',
+        'schedule': crontab(minute=0),  # Hourly
+    },
+    'update-exchange-rates': {
+        'task': 'wallet.tasks.update_exchange_rates',
+        'schedule': crontab(minute='*/15'),  # Every 15 minutes
+    },
+    'reconcile-wallet-balances': {
+        'task': 'wallet.tasks.reconcile_balances',
+        'schedule': crontab(hour=2, minute=0),  # Daily
+    },
+    'relay-outbox': {
+        'task': 'wallet.tasks.relay_outbox',
+        'schedule': 10.0,  # Every 10 seconds
+    },
+    'purge-outbox': {
+        'task': 'wallet.tasks.purge_outbox',
+        'schedule': crontab(hour=3, minute=0),  # Daily
+    },
+    'maintain-partitions': {
+        'task': 'common.tasks.maintain_partitions',
+        'schedule': crontab(hour=1, minute=0),  # Daily
+    },
+    'purge-idempotency-keys': {
+        'task': 'common.tasks.purge_idempotency_keys',
+        'schedule': crontab(minute=30),  # Hourly
+    },
+    'run-standing-orders': {
+        'task': 'wallet.tasks.run_standing_orders',
+        'schedule': crontab(),  # Every minute
+    },
+    'settle-transfers': {
+        'task': 'wallet.tasks.settle_all_shards',
+        'schedule': 10.0,  # Every 10 seconds
+    },
+    'fold-balance-shards': {
+        'task': 'wallet.tasks.fold_balance_shards',
+        'schedule': 30.0,  # Every 30 seconds
+    },
+    'expire-wallet-holds': {
+        'task': 'wallet.tasks.expire_holds',
+        'schedule': crontab(),  # Every minute
+    },
+    'refresh-daily-rollups': {
+        'task': 'wallet.tasks.refresh_daily_rollups',
+        'schedule': crontab(minute='*/5'),  # Every 5 minutes
+    },
+    'generate-monthly-statements': {
+        'task': 'wallet.tasks.generate_monthly_statements',
+        'schedule': crontab(day_of_month=1, hour=5, minute=0),  # Monthly
+    },
+    'archive-history': {
+        'task': 'common.tasks.archive_history',
+        'schedule': crontab(hour=4, minute=0),  # Daily
+    },
 }
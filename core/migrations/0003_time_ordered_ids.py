@@ -0,0 +1,29 @@
+# Generated by Django 5.0.1 on 2026-10-17 07:36
+
+import common.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_alter_kycdocument_options_alter_user_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='kycdocument',
+            name='id',
+            field=models.UUIDField(default=common.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='id',
+            field=models.UUIDField(default=common.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='useractivity',
+            name='id',
+            field=models.UUIDField(default=common.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+    ]
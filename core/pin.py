@@ -0,0 +1,47 @@
+import hashlib
+
+from django.conf import settings
+from django.core import signing
+
+PIN_TOKEN_SALT = 'core.pin.token'
+
+PIN_SCOPE_WITHDRAW = 'withdraw'
+PIN_SCOPE_TRANSFER = 'transfer'
+PIN_SCOPE_SAVINGS = 'savings'
+PIN_SCOPES = [PIN_SCOPE_WITHDRAW, PIN_SCOPE_TRANSFER, PIN_SCOPE_SAVINGS]
+
+
+class PinService:
+    """
+    Step-up PIN verification. One PIN check in VerifyPinView earns a signed
+    token bound to the user, a set of scopes and the current PIN hash, valid
+    for PIN_TOKEN_TTL seconds. Money-moving services accept the token and
+    check it with an HMAC instead of running the password hasher again;
+    setting a new PIN invalidates outstanding tokens.
+    """
+
+    @staticmethod
+    def _pin_fingerprint(user):
+        return hashlib.sha256(user.pin_hash.encode()).hexdigest()[:16]
+
+    @staticmethod
+    def issue_token(user, scopes=None):
+        return signing.dumps(
+            {'user': str(user.pk), 'scopes': sorted(scopes or PIN_SCOPES), 'pin': PinService._pin_fingerprint(user)},
+            salt=PIN_TOKEN_SALT
+        )
+
+    @staticmethod
+    def verify(user, scope, pin=None, pin_token=None):
+        """Raise ValueError unless `pin` or `pin_token` authorizes `scope` for the user"""
+        if pin_token:
+            try:
+                data = signing.loads(pin_token, salt=PIN_TOKEN_SALT, max_age=settings.PIN_TOKEN_TTL)
+            except signing.BadSignature:
+                raise ValueError("Invalid or expired PIN token")
+            if (data.get('user') != str(user.pk) or scope not in data.get('scopes', [])
+                    or data.get('pin') != PinService._pin_fingerprint(user)):
+                raise ValueError("Invalid or expired PIN token")
+            return
+        if not pin or not user.check_pin(pin):
+            raise ValueError("Invalid PIN")
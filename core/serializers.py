@@ -2,6 +2,7 @@
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
 from .models import User, KYCDocument, UserActivity
+from .pin import PIN_SCOPES
 from wallet.models import Wallet
 from common.constants import KYC_BASIC
 
@@ -109,6 +110,20 @@ class SetPinSerializer(serializers.Serializer):
 
 class VerifyPinSerializer(serializers.Serializer):
     pin = serializers.CharField(required=True, write_only=True, min_length=4, max_length=4)
+    scopes = serializers.ListField(
+        child=serializers.ChoiceField(choices=PIN_SCOPES), required=False, allow_empty=False
+    )
+
+class PinAuthorizedSerializer(serializers.Serializer):
+    """Base for requests authorized by the PIN or by a pin_token from verify-pin"""
+    pin = serializers.CharField(write_only=True, required=False, min_length=4, max_length=4)
+    pin_token = serializers.CharField(write_only=True, required=False)
+    
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        if not attrs.get('pin') and not attrs.get('pin_token'):
+            raise serializers.ValidationError({"pin": "Provide pin or pin_token."})
+        return attrs
 
 class KYCDocumentSerializer(serializers.ModelSerializer):
     class Meta:
@@ -1,3 +1,44 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
-# Create your tests here.
+from .models import User
+from .pin import PinService, PIN_SCOPE_TRANSFER, PIN_SCOPE_WITHDRAW
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class PinTokenTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice@example.com', 'password', first_name='Test', last_name='User')
+        self.user.set_pin('1234')
+
+    def assertRejected(self, user, scope, token):
+        with self.assertRaisesMessage(ValueError, 'Invalid or expired PIN token'):
+            PinService.verify(user, scope, pin_token=token)
+
+    def test_valid_token_authorizes_its_scope(self):
+        PinService.verify(self.user, PIN_SCOPE_TRANSFER, pin_token=PinService.issue_token(self.user))
+
+    def test_token_for_another_user_is_rejected(self):
+        other = User.objects.create_user('bob@example.com', 'password', first_name='Test', last_name='User')
+        other.set_pin('1234')
+        self.assertRejected(self.user, PIN_SCOPE_TRANSFER, PinService.issue_token(other))
+
+    def test_token_for_another_scope_is_rejected(self):
+        token = PinService.issue_token(self.user, [PIN_SCOPE_TRANSFER])
+        self.assertRejected(self.user, PIN_SCOPE_WITHDRAW, token)
+
+    def test_expired_token_is_rejected(self):
+        token = PinService.issue_token(self.user)
+        with override_settings(PIN_TOKEN_TTL=-1):
+            self.assertRejected(self.user, PIN_SCOPE_TRANSFER, token)
+
+    def test_changing_the_pin_revokes_tokens(self):
+        token = PinService.issue_token(self.user)
+        self.user.set_pin('5678')
+        self.assertRejected(self.user, PIN_SCOPE_TRANSFER, token)
+
+    def test_tampered_token_is_rejected(self):
+        self.assertRejected(self.user, PIN_SCOPE_TRANSFER, PinService.issue_token(self.user)[:-2] + 'xx')
+
+    def test_wrong_pin_is_rejected(self):
+        with self.assertRaisesMessage(ValueError, 'Invalid PIN'):
+            PinService.verify(self.user, PIN_SCOPE_TRANSFER, pin='0000')
@@ -2,6 +2,7 @@
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from .serializers import (
     UserSerializer, RegisterSerializer, LoginSerializer,
@@ -9,6 +10,7 @@ from .serializers import (
     KYCDocumentSerializer, UserActivitySerializer
 )
 from .models import KYCDocument, UserActivity
+from .pin import PinService
 
 User = get_user_model()
 
@@ -91,7 +93,15 @@ class VerifyPinView(APIView):
         serializer.is_valid(raise_exception=True)
         user = request.user
         is_valid = user.check_pin(serializer.validated_data['pin'])
-        return Response({'valid': is_valid, 'message': 'PIN is valid' if is_valid else 'Invalid PIN'})
+        if not is_valid:
+            return Response({'valid': False, 'message': 'Invalid PIN'})
+        # Step-up token: money-moving endpoints accept it in place of the PIN until it expires
+        return Response({
+            'valid': True,
+            'message': 'PIN is valid',
+            'pin_token': PinService.issue_token(user, serializer.validated_data.get('scopes')),
+            'expires_in': settings.PIN_TOKEN_TTL,
+        })
 
 class UploadKYCDocumentView(generics.CreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-17 07:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crypto', '0001_initial'),
+        ('wallet', '0004_transaction_transaction_wallet__72eec8_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cryptotransaction',
+            index=models.Index(fields=['wallet', '-created_at', '-id'], name='crypto_tran_wallet__c6225d_idx'),
+        ),
+    ]
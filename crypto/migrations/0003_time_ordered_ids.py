@@ -0,0 +1,29 @@
+# Generated by Django 5.0.1 on 2026-10-17 07:36
+
+import common.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crypto', '0002_cryptotransaction_crypto_tran_wallet__c6225d_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='cryptocurrency',
+            name='id',
+            field=models.UUIDField(default=common.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='cryptotransaction',
+            name='id',
+            field=models.UUIDField(default=common.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='cryptowallet',
+            name='id',
+            field=models.UUIDField(default=common.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+    ]
@@ -77,6 +77,12 @@ class CryptoWallet(TimeStampedModel):
     def __str__(self):
         return f"{self.user.email} - {self.currency.symbol}: {self.balance}"
 
+    def current_value_usd(self):
+        return self.balance * self.currency.current_price_usd
+
+    def profit_loss_usd(self):
+        return self.current_value_usd() - self.total_invested_usd
+
 
 class CryptoTransaction(TimeStampedModel):
     """Cryptocurrency buy/sell transactions"""
@@ -109,6 +115,9 @@ class CryptoTransaction(TimeStampedModel):
     class Meta:
         db_table = 'crypto_transactions'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['wallet', '-created_at', '-id']),
+        ]
 
     def __str__(self):
         return f"{self.transaction_type} {self.crypto_amount} {self.wallet.currency.symbol} @ "
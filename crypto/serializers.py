@@ -45,9 +45,9 @@ class CryptoTransactionSerializer(serializers.ModelSerializer):
     class Meta:
         model = CryptoTransaction
         fields = ['id', 'wallet', 'user_email', 'currency_symbol', 'transaction_type',
-                  'crypto_amount', 'usd_amount', 'price_per_unit', 'fee', 'balance_before',
-                  'balance_after', 'reference', 'status', 'created_at']
-        read_only_fields = ['id', 'balance_before', 'balance_after', 'reference', 
+                  'crypto_amount', 'usd_amount', 'price_per_unit', 'fee', 'total_usd',
+                  'crypto_balance_after', 'fiat_balance_after', 'reference', 'status', 'created_at']
+        read_only_fields = ['id', 'crypto_balance_after', 'fiat_balance_after', 'reference', 
                            'status', 'created_at']
 
 class BuyCryptoSerializer(serializers.Serializer):
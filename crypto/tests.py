@@ -1,3 +1,53 @@
-from django.test import TestCase
+from decimal import Decimal
 
-# Create your tests here.
+from common.constants import TRANSACTION_CRYPTO_BUY
+from common.ids import time_ordered_reference
+from common.testing import QueryBudgetTestCase
+from wallet.services import WalletService
+from .models import CryptoCurrency, CryptoTransaction, CryptoWallet
+
+
+class CryptoQueryBudgetTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.fiat_wallet = WalletService.get_or_create_wallet(self.user)
+        self.wallets = []
+
+    def add_wallets(self, n):
+        start = len(self.wallets)
+        for i in range(start, start + n):
+            currency = CryptoCurrency.objects.create(
+                symbol=f'C{i}', name=f'Coin {i}', current_price_usd=Decimal('2.00')
+            )
+            self.wallets.append(CryptoWallet.objects.create(user=self.user, currency=currency, balance=Decimal('1')))
+
+    def add_transactions(self, n):
+        if not self.wallets:
+            self.add_wallets(1)
+        CryptoTransaction.objects.bulk_create([
+            CryptoTransaction(
+                wallet=self.wallets[0], fiat_wallet=self.fiat_wallet, reference=time_ordered_reference('CRY'),
+                transaction_type=TRANSACTION_CRYPTO_BUY, crypto_amount=Decimal('1'), price_per_unit=Decimal('2'),
+                usd_amount=Decimal('2.00'), total_usd=Decimal('2.00'), crypto_balance_after=Decimal('1'),
+                fiat_balance_after=Decimal('0.00')
+            )
+            for _ in range(n)
+        ])
+
+    def test_wallet_list(self):
+        self.assertQueriesDoNotScale(lambda: self.client.get('/api/crypto/wallets/'), self.add_wallets)
+
+    def test_wallet_detail(self):
+        # The serializer only follows single-row relations; pin them to one joined query
+        self.add_wallets(1)
+        with self.assertMaxQueries(1):
+            self.assertEqual(self.client.get(f'/api/crypto/wallets/{self.wallets[0].pk}/').status_code, 200)
+
+    def test_transaction_list(self):
+        self.assertQueriesDoNotScale(lambda: self.client.get('/api/crypto/transactions/'), self.add_transactions)
+
+    def test_transaction_detail(self):
+        self.add_transactions(1)
+        url = f'/api/crypto/transactions/{CryptoTransaction.objects.get().pk}/'
+        with self.assertMaxQueries(1):
+            self.assertEqual(self.client.get(url).status_code, 200)
@@ -7,6 +7,10 @@ from .serializers import (
     CryptoTransactionSerializer, BuyCryptoSerializer, SellCryptoSerializer
 )
 from .services import CryptoService
+from common.idempotency import idempotent
+from common.pagination import CreatedAtCursorPagination
+from wallet.fx import RateCache
+from common.constants import CURRENCY_CHOICES
 
 class CryptoCurrencyListView(generics.ListAPIView):
     """List all cryptocurrencies"""
@@ -38,7 +42,7 @@ class CryptoWalletListView(generics.ListAPIView):
     serializer_class = CryptoWalletSerializer
     
     def get_queryset(self):
-        return CryptoWallet.objects.filter(user=self.request.user, balance__gt=0)
+        return CryptoWallet.objects.filter(user=self.request.user, balance__gt=0).select_related('user', 'currency')
 
 class CryptoWalletDetailView(generics.RetrieveAPIView):
     """Get crypto wallet details"""
@@ -46,25 +50,44 @@ class CryptoWalletDetailView(generics.RetrieveAPIView):
     serializer_class = CryptoWalletSerializer
     
     def get_queryset(self):
-        return CryptoWallet.objects.filter(user=self.request.user)
+        return CryptoWallet.objects.filter(user=self.request.user).select_related('user', 'currency')
 
 class CryptoPortfolioView(APIView):
     """Get user's crypto portfolio"""
     permission_classes = [permissions.IsAuthenticated]
     
     def get(self, request):
-        wallets = CryptoWallet.objects.filter(user=request.user, balance__gt=0)
+        display_currency = request.query_params.get('currency', 'USD').upper()
+        wallets = CryptoWallet.objects.filter(user=request.user, balance__gt=0).select_related('user', 'currency')
         total_invested = sum(w.total_invested_usd for w in wallets)
         total_value = sum(w.current_value_usd() for w in wallets)
         total_profit_loss = total_value - total_invested
         profit_loss_percentage = (total_profit_loss / total_invested * 100) if total_invested > 0 else 0
+        if display_currency not in dict(CURRENCY_CHOICES):
+            return Response({'error': f'Unsupported currency {display_currency}'}, status=status.HTTP_400_BAD_REQUEST)
+        rates = RateCache.rates()
+        if display_currency in rates:
+            converted = [
+                float(RateCache.convert(amount, 'USD', display_currency, rates))
+                for amount in (total_invested, total_value, total_profit_loss)
+            ]
+            missing_rates = []
+        else:
+            # No rate yet (e.g. before the first update_exchange_rates run): USD figures only
+            converted = [None, None, None]
+            missing_rates = [display_currency]
         return Response({
             'wallets': CryptoWalletSerializer(wallets, many=True).data,
             'summary': {
                 'total_invested_usd': float(total_invested),
                 'total_value_usd': float(total_value),
                 'total_profit_loss_usd': float(total_profit_loss),
-                'profit_loss_percentage': float(profit_loss_percentage)
+                'profit_loss_percentage': float(profit_loss_percentage),
+                'currency': display_currency,
+                'total_invested': converted[0],
+                'total_value': converted[1],
+                'total_profit_loss': converted[2],
+                'missing_rates': missing_rates,
             }
         })
 
@@ -72,6 +95,7 @@ class BuyCryptoView(APIView):
     """Buy cryptocurrency"""
     permission_classes = [permissions.IsAuthenticated]
     
+    @idempotent
     def post(self, request):
         serializer = BuyCryptoSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -126,9 +150,12 @@ class CryptoTransactionListView(generics.ListAPIView):
     """List crypto transactions"""
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = CryptoTransactionSerializer
+    pagination_class = CreatedAtCursorPagination
     
     def get_queryset(self):
-        return CryptoTransaction.objects.filter(wallet__user=self.request.user).order_by('-created_at')
+        return CryptoTransaction.objects.filter(wallet__user=self.request.user).select_related(
+            'wallet__user', 'wallet__currency'
+        )
 
 class CryptoTransactionDetailView(generics.RetrieveAPIView):
     """Get crypto transaction details"""
@@ -136,4 +163,6 @@ class CryptoTransactionDetailView(generics.RetrieveAPIView):
     serializer_class = CryptoTransactionSerializer
     
     def get_queryset(self):
-        return CryptoTransaction.objects.filter(wallet__user=self.request.user)
+        return CryptoTransaction.objects.filter(wallet__user=self.request.user).select_related(
+            'wallet__user', 'wallet__currency'
+        )
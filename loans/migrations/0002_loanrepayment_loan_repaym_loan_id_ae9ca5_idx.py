@@ -0,0 +1,17 @@
+# Generated by Django 5.0.1 on 2026-10-17 07:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loans', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='loanrepayment',
+            index=models.Index(fields=['loan', '-created_at', '-id'], name='loan_repaym_loan_id_ae9ca5_idx'),
+        ),
+    ]
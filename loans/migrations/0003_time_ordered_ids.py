@@ -0,0 +1,29 @@
+# Generated by Django 5.0.1 on 2026-10-17 07:36
+
+import common.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loans', '0002_loanrepayment_loan_repaym_loan_id_ae9ca5_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='loan',
+            name='id',
+            field=models.UUIDField(default=common.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='loanproduct',
+            name='id',
+            field=models.UUIDField(default=common.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='loanrepayment',
+            name='id',
+            field=models.UUIDField(default=common.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+    ]
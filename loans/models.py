@@ -82,6 +82,9 @@ class LoanRepayment(TimeStampedModel):
     class Meta:
         db_table = 'loan_repayments'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['loan', '-created_at', '-id']),
+        ]
 
     def __str__(self):
         return f"Repayment {self.reference} - {self.amount}"
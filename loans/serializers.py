@@ -42,13 +42,12 @@ class ApplyForLoanSerializer(serializers.Serializer):
         return value
 
 class LoanRepaymentSerializer(serializers.ModelSerializer):
-    loan_id = serializers.UUIDField(source='loan.id', read_only=True)
+    loan_id = serializers.UUIDField(read_only=True)
     
     class Meta:
         model = LoanRepayment
-        fields = ['id', 'loan_id', 'amount', 'balance_before', 'balance_after',
-                  'reference', 'payment_method', 'created_at']
-        read_only_fields = ['id', 'balance_before', 'balance_after', 'reference', 'created_at']
+        fields = ['id', 'loan_id', 'amount', 'balance_after', 'reference', 'created_at']
+        read_only_fields = ['id', 'balance_after', 'reference', 'created_at']
 
 class RepayLoanSerializer(serializers.Serializer):
     loan_id = serializers.UUIDField(required=True)
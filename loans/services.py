@@ -2,10 +2,10 @@ from django.db import transaction
 from django.utils import timezone
 from decimal import Decimal
 from datetime import timedelta
-import uuid
 from .models import LoanProduct, Loan, LoanRepayment
-from wallet.services import TransactionService
+from wallet.services import BalanceService, TransactionService
 from notifications.services import NotificationService
+from common.ids import time_ordered_reference
 from common.constants import (
     LOAN_PENDING, LOAN_APPROVED, LOAN_DISBURSED, LOAN_ACTIVE, 
     LOAN_PAID, LOAN_DEFAULTED, LOAN_REJECTED, STATUS_COMPLETED
@@ -14,13 +14,13 @@ from common.constants import (
 class LoanService:
     @staticmethod
     def generate_reference():
-        return f"LOAN-{uuid.uuid4().hex[:12].upper()}"
+        return time_ordered_reference('LOAN')
     
     @staticmethod
     def calculate_credit_score(user):
         score = 500
-        wallets = user.wallets.all()
-        total_balance = sum(w.balance for w in wallets)
+        wallets = BalanceService.with_unfolded_balance(user.wallets.all())
+        total_balance = sum(w.total_balance for w in wallets)
         if total_balance > 1000: score += 100
         if total_balance > 5000: score += 100
         paid_loans = user.loans.filter(status=LOAN_PAID).count()
@@ -70,7 +70,7 @@ class LoanService:
         if credit_score >= 650:
             LoanService.approve_loan(loan, auto_approved=True)
         
-        NotificationService.send_notification(
+        NotificationService.enqueue_notification(
             user=user,
             notification_type='LOAN_APPROVED',
             title='Loan Application Submitted',
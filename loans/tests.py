@@ -1,3 +1,50 @@
-from django.test import TestCase
+from decimal import Decimal
 
-# Create your tests here.
+from common.constants import LOAN_DISBURSED
+from common.ids import time_ordered_reference
+from common.testing import QueryBudgetTestCase
+from wallet.services import WalletService
+from .models import Loan, LoanProduct, LoanRepayment
+
+
+class LoanQueryBudgetTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.wallet = WalletService.get_or_create_wallet(self.user)
+        self.product = LoanProduct.objects.create(
+            name='Personal', description='Personal loan', interest_rate=Decimal('10.00'),
+            minimum_amount=Decimal('10.00'), maximum_amount=Decimal('1000.00'),
+            minimum_tenure_days=7, maximum_tenure_days=90
+        )
+        self.loan = self.create_loan()
+
+    def create_loan(self):
+        return Loan.objects.create(
+            user=self.user, wallet=self.wallet, product=self.product, principal_amount=Decimal('100.00'),
+            total_amount=Decimal('110.00'), balance=Decimal('110.00'), tenure_days=30, status=LOAN_DISBURSED
+        )
+
+    def add_loans(self, n):
+        for _ in range(n):
+            self.create_loan()
+
+    def add_repayments(self, n):
+        LoanRepayment.objects.bulk_create([
+            LoanRepayment(
+                loan=self.loan, reference=time_ordered_reference('REP'), amount=Decimal('1.00'),
+                balance_after=Decimal('109.00')
+            )
+            for _ in range(n)
+        ])
+
+    def test_loan_list(self):
+        self.assertQueriesDoNotScale(lambda: self.client.get('/api/loans/'), self.add_loans)
+
+    def test_loan_detail(self):
+        # The serializer only follows single-row relations; pin them to one joined query
+        with self.assertMaxQueries(1):
+            self.assertEqual(self.client.get(f'/api/loans/{self.loan.pk}/').status_code, 200)
+
+    def test_repayment_list(self):
+        url = f'/api/loans/{self.loan.pk}/repayments/'
+        self.assertQueriesDoNotScale(lambda: self.client.get(url), self.add_repayments)
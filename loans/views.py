@@ -8,6 +8,8 @@ from .serializers import (
 )
 from .services import LoanService
 from wallet.models import Wallet
+from common.idempotency import idempotent
+from common.pagination import CreatedAtCursorPagination
 
 class LoanProductListView(generics.ListAPIView):
     """List all loan products"""
@@ -60,7 +62,9 @@ class LoanListView(generics.ListAPIView):
     serializer_class = LoanSerializer
     
     def get_queryset(self):
-        return Loan.objects.filter(user=self.request.user).order_by('-created_at')
+        return Loan.objects.filter(user=self.request.user).select_related(
+            'user', 'wallet', 'product'
+        ).order_by('-created_at')
 
 class LoanDetailView(generics.RetrieveAPIView):
     """Get loan details"""
@@ -68,7 +72,7 @@ class LoanDetailView(generics.RetrieveAPIView):
     serializer_class = LoanSerializer
     
     def get_queryset(self):
-        return Loan.objects.filter(user=self.request.user)
+        return Loan.objects.filter(user=self.request.user).select_related('user', 'wallet', 'product')
 
 class ApproveLoanView(APIView):
     """Approve a loan (Admin only)"""
@@ -130,6 +134,7 @@ class RepayLoanView(APIView):
     """Repay a loan"""
     permission_classes = [permissions.IsAuthenticated]
     
+    @idempotent
     def post(self, request):
         serializer = RepayLoanSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -157,13 +162,14 @@ class LoanRepaymentListView(generics.ListAPIView):
     """List loan repayments"""
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = LoanRepaymentSerializer
+    pagination_class = CreatedAtCursorPagination
     
     def get_queryset(self):
         loan_id = self.kwargs.get('pk')
         return LoanRepayment.objects.filter(
             loan_id=loan_id,
             loan__user=self.request.user
-        ).order_by('-created_at')
+        )
 
 class CreditScoreView(APIView):
     """Get user's credit score"""
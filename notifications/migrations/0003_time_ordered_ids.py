@@ -0,0 +1,24 @@
+# Generated by Django 5.0.1 on 2026-10-17 07:36
+
+import common.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0002_notification_notificatio_user_id_dfa1d2_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='emaillog',
+            name='id',
+            field=models.UUIDField(default=common.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='id',
+            field=models.UUIDField(default=common.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+    ]
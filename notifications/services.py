@@ -1,5 +1,6 @@
 from django.core.mail import send_mail
 from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
 from .models import Notification, EmailLog
 
@@ -16,15 +17,66 @@ class NotificationService:
         return notification
     
     @staticmethod
-    def send_transaction_notification(user, transaction, notification_type):
+    def build_transaction_notification(user, transaction, notification_type):
         title_map = {'DEPOSIT': 'Money Received','WITHDRAWAL': 'Money Withdrawn','TRANSFER': 'Money Sent'}
         message_map = {'DEPOSIT': f'You received {transaction.amount} {transaction.currency}',
                        'WITHDRAWAL': f'You withdrew {transaction.amount} {transaction.currency}',
                        'TRANSFER': f'You sent {transaction.amount} {transaction.currency} to {transaction.recipient_email}'}
-        return NotificationService.send_notification(
+        return Notification(
             user=user,
             notification_type=notification_type,
             title=title_map.get(notification_type, 'Transaction'),
             message=message_map.get(notification_type, 'Transaction completed'),
             metadata={'transaction_id': str(transaction.id)}
         )
+    
+    @staticmethod
+    def enqueue_notifications(notifications):
+        """
+        Hand unsaved Notification instances to a Celery worker once the current
+        transaction commits, so the insert stays out of the caller's row locks.
+        Nothing is sent if the transaction rolls back.
+        """
+        payloads = [
+            {
+                'user_id': str(n.user_id),
+                'notification_type': n.notification_type,
+                'title': n.title,
+                'message': n.message,
+                'metadata': n.metadata,
+            }
+            for n in notifications
+        ]
+        if payloads:
+            transaction.on_commit(lambda: NotificationService.dispatch(payloads), robust=True)
+    
+    @staticmethod
+    def enqueue_notification(user, notification_type, title, message, metadata=None):
+        NotificationService.enqueue_notifications([Notification(
+            user=user,
+            notification_type=notification_type,
+            title=title,
+            message=message,
+            metadata=metadata or {}
+        )])
+    
+    @staticmethod
+    def enqueue_transaction_notifications(events):
+        """Queue notifications for (user, transaction, notification_type) events"""
+        NotificationService.enqueue_notifications([
+            NotificationService.build_transaction_notification(user, txn, notification_type)
+            for user, txn, notification_type in events
+        ])
+    
+    @staticmethod
+    def dispatch(payloads):
+        from .tasks import create_notifications
+        size = settings.NOTIFICATION_DISPATCH_BATCH_SIZE
+        for start in range(0, len(payloads), size):
+            create_notifications.delay(payloads[start:start + size])
+    
+    @staticmethod
+    def create_notifications(payloads, batch_size=1000):
+        return Notification.objects.bulk_create(
+            [Notification(**payload) for payload in payloads], batch_size=batch_size
+        )
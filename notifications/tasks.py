@@ -0,0 +1,7 @@
+from celery import shared_task
+from .services import NotificationService
+
+
+@shared_task
+def create_notifications(payloads):
+    return len(NotificationService.create_notifications(payloads))
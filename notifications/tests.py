@@ -1,3 +1,56 @@
-from django.test import TestCase
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.db import transaction
+from django.test import TestCase, override_settings
+
+from core.models import User
+from wallet.services import TransactionService, WalletService
+from .models import Notification
+from .tasks import create_notifications
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class TransactionNotificationTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user('alice@example.com', 'password', first_name='Test', last_name='User')
+        self.alice.set_pin('1234')
+        self.bob = User.objects.create_user('bob@example.com', 'password', first_name='Test', last_name='User')
+        self.wallet = WalletService.get_or_create_wallet(self.alice)
+        TransactionService.deposit(self.wallet, Decimal('100.00'))
+        conf = create_notifications.app.conf
+        eager = conf.task_always_eager
+        conf.task_always_eager = True
+        self.addCleanup(setattr, conf, 'task_always_eager', eager)
+        delay = mock.patch.object(create_notifications, 'delay', wraps=create_notifications.delay)
+        self.delay = delay.start()
+        self.addCleanup(delay.stop)
+
+    def transfer(self, amount='10.00'):
+        return TransactionService.transfer(self.wallet, 'bob@example.com', Decimal(amount), '1234')
+
+    def test_committed_transfer_queues_one_dispatch(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.transfer()
+        self.delay.assert_called_once()
+        self.assertEqual(
+            sorted(Notification.objects.values_list('user__email', 'notification_type')),
+            [('alice@example.com', 'TRANSFER'), ('bob@example.com', 'DEPOSIT')]
+        )
+
+    def test_rolled_back_transfer_queues_nothing(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(RuntimeError):
+                with transaction.atomic():
+                    self.transfer()
+                    raise RuntimeError
+        self.assertEqual(callbacks, [])
+        self.delay.assert_not_called()
+        self.assertFalse(Notification.objects.exists())
+
+    def test_failed_transfer_queues_nothing(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaisesMessage(ValueError, 'Insufficient balance'):
+                self.transfer('500.00')
+        self.delay.assert_not_called()
+        self.assertFalse(Notification.objects.exists())
@@ -3,14 +3,16 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from .models import Notification, EmailLog
 from .serializers import NotificationSerializer, EmailLogSerializer
+from common.pagination import CreatedAtCursorPagination
 
 class NotificationListView(generics.ListAPIView):
     """List user notifications"""
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = NotificationSerializer
+    pagination_class = CreatedAtCursorPagination
     
     def get_queryset(self):
-        return Notification.objects.filter(user=self.request.user).order_by('-created_at')
+        return Notification.objects.filter(user=self.request.user)
 
 class NotificationDetailView(generics.RetrieveAPIView):
     """Get notification details"""
@@ -59,4 +61,4 @@ class EmailLogListView(generics.ListAPIView):
     """List email logs (Admin only)"""
     permission_classes = [permissions.IsAdminUser]
     serializer_class = EmailLogSerializer
-    queryset = EmailLog.objects.all().order_by('-created_at')
+    queryset = EmailLog.objects.select_related('user').order_by('-created_at')
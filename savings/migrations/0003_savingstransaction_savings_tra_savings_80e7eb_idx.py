@@ -0,0 +1,17 @@
+# Generated by Django 5.0.1 on 2026-10-17 07:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('savings', '0002_alter_savingsaccount_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='savingstransaction',
+            index=models.Index(fields=['savings_account', '-created_at', '-id'], name='savings_tra_savings_80e7eb_idx'),
+        ),
+    ]
@@ -89,6 +89,9 @@ class SavingsTransaction(TimeStampedModel):
     class Meta:
         db_table = 'savings_transactions'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['savings_account', '-created_at', '-id']),
+        ]
 
     def __str__(self):
         return f"{self.reference} - {self.transaction_type} - {self.amount}"
@@ -1,5 +1,6 @@
 ﻿from rest_framework import serializers
 from .models import SavingsProduct, SavingsAccount, SavingsTransaction
+from core.serializers import PinAuthorizedSerializer
 from decimal import Decimal
 
 class SavingsProductSerializer(serializers.ModelSerializer):
@@ -25,11 +26,10 @@ class SavingsAccountSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'user', 'balance', 'total_interest_earned', 'status',
                            'maturity_date', 'last_interest_date', 'created_at', 'updated_at']
 
-class CreateSavingsAccountSerializer(serializers.Serializer):
+class CreateSavingsAccountSerializer(PinAuthorizedSerializer):
     product_id = serializers.UUIDField(required=True)
     wallet_id = serializers.UUIDField(required=True)
     initial_deposit = serializers.DecimalField(max_digits=15, decimal_places=2, required=True)
-    pin = serializers.CharField(write_only=True, required=True, min_length=4, max_length=4)
     
     def validate_initial_deposit(self, value):
         if value <= 0:
@@ -37,28 +37,26 @@ class CreateSavingsAccountSerializer(serializers.Serializer):
         return value
 
 class SavingsTransactionSerializer(serializers.ModelSerializer):
-    account_id = serializers.UUIDField(source='savings_account.id', read_only=True)
+    account_id = serializers.UUIDField(source='savings_account_id', read_only=True)
     
     class Meta:
         model = SavingsTransaction
         fields = ['id', 'account_id', 'transaction_type', 'amount', 'balance_before',
-                  'balance_after', 'reference', 'description', 'created_at']
+                  'balance_after', 'penalty_amount', 'reference', 'created_at']
         read_only_fields = ['id', 'balance_before', 'balance_after', 'reference', 'created_at']
 
-class DepositToSavingsSerializer(serializers.Serializer):
+class DepositToSavingsSerializer(PinAuthorizedSerializer):
     savings_account_id = serializers.UUIDField(required=True)
     amount = serializers.DecimalField(max_digits=15, decimal_places=2, required=True)
-    pin = serializers.CharField(write_only=True, required=True, min_length=4, max_length=4)
     
     def validate_amount(self, value):
         if value <= 0:
             raise serializers.ValidationError("Amount must be greater than zero")
         return value
 
-class WithdrawFromSavingsSerializer(serializers.Serializer):
+class WithdrawFromSavingsSerializer(PinAuthorizedSerializer):
     savings_account_id = serializers.UUIDField(required=True)
     amount = serializers.DecimalField(max_digits=15, decimal_places=2, required=True)
-    pin = serializers.CharField(write_only=True, required=True, min_length=4, max_length=4)
     
     def validate_amount(self, value):
         if value <= 0:
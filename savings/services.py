@@ -2,22 +2,29 @@ from django.db import transaction
 from django.utils import timezone
 from decimal import Decimal
 from datetime import timedelta
-import uuid
 from .models import SavingsProduct, SavingsAccount, SavingsTransaction
-from wallet.services import TransactionService, WalletService
+from wallet.services import TransactionService, WalletService, BalanceService, LedgerService
 from notifications.services import NotificationService
-from common.constants import STATUS_COMPLETED
+from core.pin import PinService, PIN_SCOPE_SAVINGS
+from common.ids import time_ordered_reference
+from common.constants import STATUS_COMPLETED, LEDGER_ACCOUNT_SAVINGS
+from common.db import retry_on_conflict
 
 class SavingsService:
     @staticmethod
     def generate_reference():
-        return f"SAV-{uuid.uuid4().hex[:12].upper()}"
+        return time_ordered_reference('SAV')
     
     @staticmethod
+    def create_savings_account(user, wallet, product, initial_deposit, pin=None, pin_token=None):
+        # PIN hashing happens before any transaction or row lock is taken
+        PinService.verify(user, PIN_SCOPE_SAVINGS, pin, pin_token)
+        return SavingsService._create_savings_account(user, wallet, product, initial_deposit)
+    
+    @staticmethod
+    @retry_on_conflict
     @transaction.atomic
-    def create_savings_account(user, wallet, product, initial_deposit, pin):
-        if not user.check_pin(pin):
-            raise ValueError("Invalid PIN")
+    def _create_savings_account(user, wallet, product, initial_deposit):
         if initial_deposit < product.minimum_deposit:
             raise ValueError(f"Minimum deposit is {product.minimum_deposit}")
         if product.maximum_deposit and initial_deposit > product.maximum_deposit:
@@ -39,38 +46,49 @@ class SavingsService:
             savings_account.status = 'LOCKED'
             savings_account.save()
         
-        SavingsService.deposit_to_savings(
+        SavingsService._deposit_to_savings(
             savings_account=savings_account,
-            amount=initial_deposit,
-            pin=pin,
-            initial=True
+            amount=initial_deposit
         )
         
         return savings_account
     
     @staticmethod
+    def lock_account(savings_account):
+        current = SavingsAccount.objects.select_for_update().get(pk=savings_account.pk)
+        savings_account.balance = current.balance
+        return savings_account
+    
+    @staticmethod
+    def deposit_to_savings(savings_account, amount, pin=None, pin_token=None):
+        PinService.verify(savings_account.user, PIN_SCOPE_SAVINGS, pin, pin_token)
+        return SavingsService._deposit_to_savings(savings_account, amount)
+    
+    @staticmethod
+    @retry_on_conflict
     @transaction.atomic
-    def deposit_to_savings(savings_account, amount, pin, initial=False):
-        if not initial and not savings_account.user.check_pin(pin):
-            raise ValueError("Invalid PIN")
+    def _deposit_to_savings(savings_account, amount):
         if amount <= 0:
             raise ValueError("Deposit amount must be greater than zero")
         
         wallet = savings_account.wallet
+        BalanceService.lock_wallets(wallet)
+        SavingsService.lock_account(savings_account)
         if wallet.available_balance < amount:
             raise ValueError("Insufficient wallet balance")
         
-        wallet.balance -= amount
-        wallet.available_balance -= amount
-        wallet.save()
-        
-        TransactionService.create_transaction(
+        txn = TransactionService.create_transaction(
             wallet=wallet,
             transaction_type='SAVINGS_DEPOSIT',
             amount=amount,
             description=f"Deposit to {savings_account.product.name}",
             status=STATUS_COMPLETED
         )
+        BalanceService.debit(wallet, amount)
+        LedgerService.record('SAVINGS_DEPOSIT', txn.reference, [
+            LedgerService.wallet_leg(wallet, -amount),
+            LedgerService.account_leg(LEDGER_ACCOUNT_SAVINGS, wallet.currency, amount),
+        ], description=txn.description, metadata={'savings_account_id': str(savings_account.id)})
         
         balance_before = savings_account.balance
         savings_account.balance += amount
@@ -86,7 +104,7 @@ class SavingsService:
             description='Deposit to savings'
         )
         
-        NotificationService.send_notification(
+        NotificationService.enqueue_notification(
             user=savings_account.user,
             notification_type='SAVINGS_DEPOSIT',
             title='Savings Deposit',
@@ -96,13 +114,21 @@ class SavingsService:
         return savings_txn
     
     @staticmethod
+    def withdraw_from_savings(savings_account, amount, pin=None, pin_token=None):
+        PinService.verify(savings_account.user, PIN_SCOPE_SAVINGS, pin, pin_token)
+        return SavingsService._withdraw_from_savings(savings_account, amount)
+    
+    @staticmethod
+    @retry_on_conflict
     @transaction.atomic
-    def withdraw_from_savings(savings_account, amount, pin):
-        if not savings_account.user.check_pin(pin):
-            raise ValueError("Invalid PIN")
+    def _withdraw_from_savings(savings_account, amount):
         if amount <= 0:
             raise ValueError("Withdrawal amount must be greater than zero")
         
+        wallet = savings_account.wallet
+        BalanceService.lock_wallets(wallet)
+        SavingsService.lock_account(savings_account)
+        
         penalty = Decimal('0.00')
         if savings_account.status == 'LOCKED' and savings_account.maturity_date > timezone.now():
             penalty = (amount * savings_account.product.early_withdrawal_penalty) / Decimal('100')
@@ -114,7 +140,6 @@ class SavingsService:
         if savings_account.balance < amount:
             raise ValueError("Insufficient savings balance")
         
-        wallet = savings_account.wallet
         balance_before = savings_account.balance
         savings_account.balance -= amount
         savings_account.save()
@@ -140,19 +165,20 @@ class SavingsService:
                 description=f'Early withdrawal penalty ({savings_account.product.early_withdrawal_penalty}%)'
             )
         
-        wallet.balance += amount
-        wallet.available_balance += amount
-        wallet.save()
-        
-        TransactionService.create_transaction(
+        txn = TransactionService.create_transaction(
             wallet=wallet,
             transaction_type='SAVINGS_WITHDRAWAL',
             amount=amount,
             description=f"Withdrawal from {savings_account.product.name}",
             status=STATUS_COMPLETED
         )
+        BalanceService.credit(wallet, amount)
+        LedgerService.record('SAVINGS_WITHDRAWAL', txn.reference, [
+            LedgerService.wallet_leg(wallet, amount),
+            LedgerService.account_leg(LEDGER_ACCOUNT_SAVINGS, wallet.currency, -amount),
+        ], description=txn.description, metadata={'savings_account_id': str(savings_account.id)})
         
-        NotificationService.send_notification(
+        NotificationService.enqueue_notification(
             user=savings_account.user,
             notification_type='WITHDRAWAL',
             title='Savings Withdrawal',
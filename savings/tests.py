@@ -1,3 +1,45 @@
-from django.test import TestCase
+from decimal import Decimal
 
-# Create your tests here.
+from common.constants import SAVINGS_FLEX
+from common.ids import time_ordered_reference
+from common.testing import QueryBudgetTestCase
+from wallet.services import WalletService
+from .models import SavingsAccount, SavingsProduct, SavingsTransaction
+
+
+class SavingsQueryBudgetTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.wallet = WalletService.get_or_create_wallet(self.user)
+        self.product = SavingsProduct.objects.create(
+            name='Flex', product_type=SAVINGS_FLEX, description='Flexible savings',
+            interest_rate=Decimal('5.00'), minimum_deposit=Decimal('1.00')
+        )
+        self.account = self.create_account()
+
+    def create_account(self):
+        return SavingsAccount.objects.create(user=self.user, wallet=self.wallet, product=self.product)
+
+    def add_accounts(self, n):
+        for _ in range(n):
+            self.create_account()
+
+    def add_transactions(self, n):
+        SavingsTransaction.objects.bulk_create([
+            SavingsTransaction(
+                savings_account=self.account, reference=time_ordered_reference('SAV'), transaction_type='DEPOSIT',
+                amount=Decimal('1.00'), balance_before=Decimal('0.00'), balance_after=Decimal('1.00')
+            )
+            for _ in range(n)
+        ])
+
+    def test_account_list(self):
+        self.assertQueriesDoNotScale(lambda: self.client.get('/api/savings/accounts/'), self.add_accounts)
+
+    def test_account_detail(self):
+        # The serializer only follows single-row relations; pin them to one joined query
+        with self.assertMaxQueries(1):
+            self.assertEqual(self.client.get(f'/api/savings/accounts/{self.account.pk}/').status_code, 200)
+
+    def test_transaction_list(self):
+        self.assertQueriesDoNotScale(lambda: self.client.get('/api/savings/transactions/'), self.add_transactions)
@@ -9,6 +9,7 @@ from .serializers import (
 )
 from .services import SavingsService
 from wallet.models import Wallet
+from common.pagination import CreatedAtCursorPagination
 
 class SavingsProductListView(generics.ListAPIView):
     """List all savings products"""
@@ -28,7 +29,7 @@ class SavingsAccountListView(generics.ListAPIView):
     serializer_class = SavingsAccountSerializer
     
     def get_queryset(self):
-        return SavingsAccount.objects.filter(user=self.request.user)
+        return SavingsAccount.objects.filter(user=self.request.user).select_related('user', 'wallet', 'product')
 
 class SavingsAccountDetailView(generics.RetrieveAPIView):
     """Get savings account details"""
@@ -36,7 +37,7 @@ class SavingsAccountDetailView(generics.RetrieveAPIView):
     serializer_class = SavingsAccountSerializer
     
     def get_queryset(self):
-        return SavingsAccount.objects.filter(user=self.request.user)
+        return SavingsAccount.objects.filter(user=self.request.user).select_related('user', 'wallet', 'product')
 
 class CreateSavingsAccountView(APIView):
     """Create a new savings account"""
@@ -60,7 +61,8 @@ class CreateSavingsAccountView(APIView):
                 wallet=wallet,
                 product=product,
                 initial_deposit=serializer.validated_data['initial_deposit'],
-                pin=serializer.validated_data['pin']
+                pin=serializer.validated_data.get('pin'),
+                pin_token=serializer.validated_data.get('pin_token')
             )
             return Response({
                 'message': 'Savings account created successfully',
@@ -81,10 +83,10 @@ class CloseSavingsAccountView(APIView):
             if account.status == 'CLOSED':
                 return Response({'error': 'Account already closed'}, status=status.HTTP_400_BAD_REQUEST)
             if account.balance > 0:
-                pin = request.data.get('pin')
-                if not pin:
+                pin, pin_token = request.data.get('pin'), request.data.get('pin_token')
+                if not pin and not pin_token:
                     return Response({'error': 'PIN required'}, status=status.HTTP_400_BAD_REQUEST)
-                SavingsService.withdraw_from_savings(account, account.balance, pin)
+                SavingsService.withdraw_from_savings(account, account.balance, pin, pin_token=pin_token)
             account.status = 'CLOSED'
             account.save()
             return Response({
@@ -111,7 +113,8 @@ class DepositToSavingsView(APIView):
             transaction = SavingsService.deposit_to_savings(
                 savings_account=account,
                 amount=serializer.validated_data['amount'],
-                pin=serializer.validated_data['pin']
+                pin=serializer.validated_data.get('pin'),
+                pin_token=serializer.validated_data.get('pin_token')
             )
             return Response({
                 'message': 'Deposit successful',
@@ -138,7 +141,8 @@ class WithdrawFromSavingsView(APIView):
             transaction = SavingsService.withdraw_from_savings(
                 savings_account=account,
                 amount=serializer.validated_data['amount'],
-                pin=serializer.validated_data['pin']
+                pin=serializer.validated_data.get('pin'),
+                pin_token=serializer.validated_data.get('pin_token')
             )
             return Response({
                 'message': 'Withdrawal successful',
@@ -154,11 +158,12 @@ class SavingsTransactionListView(generics.ListAPIView):
     """List savings transactions"""
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = SavingsTransactionSerializer
+    pagination_class = CreatedAtCursorPagination
     
     def get_queryset(self):
         return SavingsTransaction.objects.filter(
             savings_account__user=self.request.user
-        ).order_by('-created_at')
+        )
 
 class CalculateInterestView(APIView):
     """Calculate interest for all accounts (Admin only)"""
@@ -1,15 +1,20 @@
 from django.contrib import admin
-from .models import Wallet, Transaction, TransferLimit, FeeConfiguration
+from .outbox import OutboxRelay
+from .models import (
+    Wallet, Transaction, TransferLimit, FeeConfiguration, JournalEntry, Posting, ExchangeRate, OutboxEvent,
+    ReconciliationRun, ReconciliationPartition, BalanceDrift, Statement, StandingOrder,
+    WalletHold
+)
 
 @admin.register(Wallet)
 class WalletAdmin(admin.ModelAdmin):
     list_display = ['user', 'currency', 'balance', 'available_balance', 'is_active', 'is_primary']
     list_filter = ['currency', 'is_active', 'is_primary', 'created_at']
     search_fields = ['user__email', 'user__first_name', 'user__last_name']
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = ['shard_count', 'created_at', 'updated_at']
     
     fieldsets = (
-        ('Wallet Info', {'fields': ('user', 'currency', 'is_primary', 'is_active')}),
+        ('Wallet Info', {'fields': ('user', 'currency', 'is_primary', 'is_active', 'shard_count')}),
         ('Balances', {'fields': ('balance', 'available_balance')}),
         ('Timestamps', {'fields': ('created_at', 'updated_at')}),
     )
@@ -50,4 +55,85 @@ class FeeConfigurationAdmin(admin.ModelAdmin):
         ('Fee Structure', {'fields': ('fixed_amount', 'percentage', 'minimum_fee', 'maximum_fee')}),
         ('Timestamps', {'fields': ('created_at', 'updated_at')}),
     )
-    readonly_fields = ['created_at', 'updated_at']
\ No newline at end of file
+    readonly_fields = ['created_at', 'updated_at']
+
+class PostingInline(admin.TabularInline):
+    model = Posting
+    extra = 0
+    can_delete = False
+    readonly_fields = ['account', 'wallet', 'currency', 'amount', 'created_at']
+
+@admin.register(JournalEntry)
+class JournalEntryAdmin(admin.ModelAdmin):
+    list_display = ['reference', 'entry_type', 'created_at']
+    list_filter = ['entry_type', 'created_at']
+    search_fields = ['reference', 'description']
+    readonly_fields = ['entry_type', 'reference', 'description', 'metadata', 'created_at', 'updated_at']
+    inlines = [PostingInline]
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+@admin.register(ExchangeRate)
+class ExchangeRateAdmin(admin.ModelAdmin):
+    list_display = ['base_currency', 'quote_currency', 'rate', 'source', 'fetched_at']
+    list_filter = ['base_currency', 'source']
+    readonly_fields = ['created_at', 'updated_at']
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ['id', 'event_type', 'aggregate_id', 'created_at', 'published_at', 'attempts', 'dead_lettered_at']
+    list_filter = ['event_type', 'published_at', 'dead_lettered_at']
+    search_fields = ['aggregate_id']
+    readonly_fields = [f.name for f in OutboxEvent._meta.fields]
+    actions = ['requeue']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    @admin.action(description='Requeue selected unpublished events')
+    def requeue(self, request, queryset):
+        self.message_user(request, f'Requeued {OutboxRelay.requeue(queryset)} events')
+
+class ReconciliationPartitionInline(admin.TabularInline):
+    model = ReconciliationPartition
+    extra = 0
+    can_delete = False
+    readonly_fields = ['index', 'start_id', 'end_id', 'status', 'wallets_checked', 'drift_count', 'error', 'finished_at']
+
+@admin.register(ReconciliationRun)
+class ReconciliationRunAdmin(admin.ModelAdmin):
+    list_display = ['created_at', 'status', 'partitions_total', 'wallets_checked', 'drift_count', 'finished_at']
+    list_filter = ['status']
+    readonly_fields = ['status', 'partitions_total', 'wallets_checked', 'drift_count', 'finished_at', 'created_at']
+    inlines = [ReconciliationPartitionInline]
+
+@admin.register(BalanceDrift)
+class BalanceDriftAdmin(admin.ModelAdmin):
+    list_display = ['wallet', 'balance', 'transaction_balance', 'ledger_balance', 'difference', 'run']
+    search_fields = ['wallet__user__email']
+    readonly_fields = [f.name for f in BalanceDrift._meta.fields]
+
+@admin.register(Statement)
+class StatementAdmin(admin.ModelAdmin):
+    list_display = ['wallet', 'period_start', 'opening_balance', 'closing_balance', 'transaction_count', 'created_at']
+    list_filter = ['period_start']
+    search_fields = ['wallet__user__email']
+    readonly_fields = ['created_at', 'updated_at']
+
+@admin.register(StandingOrder)
+class StandingOrderAdmin(admin.ModelAdmin):
+    list_display = ['wallet', 'recipient_email', 'amount', 'frequency', 'next_run_at', 'is_active', 'last_status']
+    list_filter = ['frequency', 'is_active', 'last_status']
+    search_fields = ['wallet__user__email', 'recipient_email']
+    readonly_fields = ['run_count', 'last_run_at', 'last_status', 'last_error', 'last_reference', 'created_at', 'updated_at']
+
+@admin.register(WalletHold)
+class WalletHoldAdmin(admin.ModelAdmin):
+    list_display = ['reference', 'wallet', 'amount', 'captured_amount', 'status', 'expires_at']
+    list_filter = ['status']
+    search_fields = ['reference', 'wallet__user__email']
+    readonly_fields = ['captured_amount', 'resolved_at', 'transaction', 'created_at', 'updated_at']
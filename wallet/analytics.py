@@ -0,0 +1,99 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Max, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import Transaction, DailyTransactionRollup, RollupRun
+from .services import TransactionExportService
+from common.constants import STATUS_COMPLETED
+from common.partitioning import add_months
+
+
+class SpendingAnalyticsService:
+    """
+    Spending insights served from DailyTransactionRollup. refresh() is the
+    catch-up job: it finds the wallet-days whose transactions were created or
+    updated since the previous run and recomputes only those days, so reads
+    never aggregate raw transactions.
+    """
+    GRANULARITIES = ('day', 'month')
+
+    @staticmethod
+    def refresh(as_of=None, chunk_size=1000):
+        """Bring rollups up to date with transactions updated up to as_of; return wallet-days refreshed"""
+        if as_of is None:
+            as_of = timezone.now() - settings.ANALYTICS_ROLLUP_LAG
+        previous = RollupRun.objects.aggregate(last=Max('as_of'))['last']
+        if previous and previous >= as_of:
+            return 0
+        changed = Transaction.objects.filter(updated_at__lte=as_of)
+        if previous:
+            changed = changed.filter(updated_at__gt=previous)
+        refreshed = 0
+        for moment in changed.datetimes('created_at', 'day'):
+            day = moment.date()
+            start = TransactionExportService.start_of_day(day)
+            end = TransactionExportService.start_of_day(day + timedelta(days=1))
+            wallet_ids = list(
+                changed.filter(created_at__gte=start, created_at__lt=end)
+                .order_by().values_list('wallet_id', flat=True).distinct()
+            )
+            for offset in range(0, len(wallet_ids), chunk_size):
+                SpendingAnalyticsService.refresh_day(day, wallet_ids[offset:offset + chunk_size])
+            refreshed += len(wallet_ids)
+        RollupRun.objects.create(as_of=as_of, days_refreshed=refreshed)
+        return refreshed
+
+    @staticmethod
+    def refresh_day(day, wallet_ids):
+        """Recompute the rollups of `day` for the given wallets from their completed transactions"""
+        start = TransactionExportService.start_of_day(day)
+        end = TransactionExportService.start_of_day(day + timedelta(days=1))
+        totals = Transaction.objects.filter(
+            wallet_id__in=wallet_ids, status=STATUS_COMPLETED, created_at__gte=start, created_at__lt=end
+        ).order_by().values('wallet_id', 'transaction_type', 'wallet__currency').annotate(
+            count=Count('id'), amount=Sum('amount'), fees=Sum('fee')
+        )
+        rollups = [
+            DailyTransactionRollup(
+                wallet_id=row['wallet_id'], day=day, transaction_type=row['transaction_type'],
+                currency=row['wallet__currency'], transaction_count=row['count'],
+                total_amount=row['amount'], total_fees=row['fees']
+            )
+            for row in totals
+        ]
+        with transaction.atomic():
+            DailyTransactionRollup.objects.filter(wallet_id__in=wallet_ids, day=day).delete()
+            DailyTransactionRollup.objects.bulk_create(rollups, batch_size=1000)
+
+    @staticmethod
+    def spending(user, months=12, currency=None, granularity='month'):
+        """Totals by type and currency over the last `months` calendar months, plus a per-period breakdown"""
+        today = timezone.localdate()
+        start = add_months(today.replace(day=1), -(months - 1))
+        rollups = DailyTransactionRollup.objects.filter(wallet__user=user, day__gte=start)
+        if currency:
+            rollups = rollups.filter(currency=currency)
+        sums = {
+            'transaction_count': Sum('transaction_count'),
+            'total_amount': Sum('total_amount'),
+            'total_fees': Sum('total_fees'),
+        }
+        period = TruncMonth('day') if granularity == 'month' else F('day')
+        breakdown = rollups.annotate(period=period).values(
+            'period', 'transaction_type', 'currency'
+        ).annotate(**sums).order_by('period', 'transaction_type', 'currency')
+        totals = rollups.values('transaction_type', 'currency').annotate(**sums).order_by(
+            'transaction_type', 'currency'
+        )
+        return {
+            'start_date': start,
+            'end_date': today,
+            'as_of': RollupRun.objects.aggregate(last=Max('as_of'))['last'],
+            'granularity': granularity,
+            'totals': list(totals),
+            'breakdown': list(breakdown),
+        }
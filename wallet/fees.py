@@ -0,0 +1,53 @@
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import FeeConfiguration
+
+FEE_SCHEDULE_VERSION_KEY = 'wallet:fee_schedule:version'
+
+
+class FeeSchedule:
+    """
+    Process-local copy of the active fee configurations. Each worker checks
+    the version stamp in the shared cache at most once every
+    FEE_SCHEDULE_MAX_STALENESS seconds and reloads only when it changed, so
+    fee lookups on the request path normally cost no queries at all.
+    """
+    _configs = None
+    _version = None
+    _checked_at = 0.0
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls, transaction_type):
+        return cls.configurations().get(transaction_type)
+
+    @classmethod
+    def configurations(cls):
+        max_age = getattr(settings, 'FEE_SCHEDULE_MAX_STALENESS', 30)
+        if cls._configs is not None and time.monotonic() - cls._checked_at < max_age:
+            return cls._configs
+        with cls._lock:
+            version = cache.get(FEE_SCHEDULE_VERSION_KEY)
+            if version is None:
+                cache.add(FEE_SCHEDULE_VERSION_KEY, uuid.uuid4().hex, None)
+                version = cache.get(FEE_SCHEDULE_VERSION_KEY)
+            if cls._configs is None or version != cls._version:
+                cls._configs = {
+                    config.transaction_type: config
+                    for config in FeeConfiguration.objects.filter(is_active=True)
+                }
+                cls._version = version
+            cls._checked_at = time.monotonic()
+            return cls._configs
+
+    @classmethod
+    def invalidate(cls):
+        """Publish a new version so every worker reloads, and drop this process's copy now"""
+        cache.set(FEE_SCHEDULE_VERSION_KEY, uuid.uuid4().hex, None)
+        with cls._lock:
+            cls._configs = None
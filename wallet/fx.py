@@ -0,0 +1,72 @@
+import functools
+import threading
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .models import ExchangeRate
+from common.constants import CURRENCY_CHOICES
+
+FX_BASE_CURRENCY = 'USD'
+
+
+class StaticRateProvider:
+    """Fixed rates from FX_STATIC_RATES, for development and tests"""
+    name = 'static'
+
+    def fetch_rates(self, base_currency=FX_BASE_CURRENCY):
+        """Return {currency: units of currency per one unit of base_currency}"""
+        return {currency: Decimal(str(rate)) for currency, rate in settings.FX_STATIC_RATES.items()}
+
+
+@functools.lru_cache(maxsize=None)
+def get_rate_provider():
+    """Return the configured FX_RATE_PROVIDER instance"""
+    return import_string(settings.FX_RATE_PROVIDER)()
+
+
+class RateCache:
+    """
+    Process-local copy of the ExchangeRate table as {currency: units per USD},
+    reloaded at most every FX_RATE_CACHE_TTL seconds. Callers fetch the map
+    once and convert any number of amounts against it. A map missing any
+    supported currency is returned but not cached, so rates that land later
+    are picked up on the next call.
+    """
+    _rates = None
+    _loaded_at = 0.0
+    _lock = threading.Lock()
+
+    @classmethod
+    def rates(cls):
+        ttl = getattr(settings, 'FX_RATE_CACHE_TTL', 300)
+        if cls._rates is not None and time.monotonic() - cls._loaded_at < ttl:
+            return cls._rates
+        with cls._lock:
+            rates = dict(
+                ExchangeRate.objects.filter(base_currency=FX_BASE_CURRENCY).values_list('quote_currency', 'rate')
+            )
+            rates[FX_BASE_CURRENCY] = Decimal('1')
+            if all(currency in rates for currency, _ in CURRENCY_CHOICES):
+                cls._rates = rates
+                cls._loaded_at = time.monotonic()
+            return rates
+
+    @classmethod
+    def invalidate(cls):
+        with cls._lock:
+            cls._rates = None
+
+    @classmethod
+    def convert(cls, amount, from_currency, to_currency, rates=None):
+        """Convert amount between currencies through the USD base rates"""
+        if from_currency == to_currency:
+            return amount
+        rates = cls.rates() if rates is None else rates
+        for currency in (from_currency, to_currency):
+            if currency not in rates:
+                raise ValueError(f"No exchange rate for {currency}")
+        converted = Decimal(amount) / rates[from_currency] * rates[to_currency]
+        return converted.quantize(Decimal('0.01'))
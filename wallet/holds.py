@@ -0,0 +1,171 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Wallet, WalletHold
+from .services import BalanceService, LedgerService, TransactionService
+from .snapshots import BalanceSnapshotCache
+from notifications.services import NotificationService
+from common.db import retry_on_conflict
+from common.ids import time_ordered_reference
+from common.constants import (
+    HOLD_ACTIVE, HOLD_CAPTURED, HOLD_RELEASED, HOLD_EXPIRED, STATUS_COMPLETED,
+    TRANSACTION_WITHDRAWAL, LEDGER_ACCOUNT_EXTERNAL, WALLET_DEBIT_TYPES
+)
+
+
+class HoldService:
+    """
+    Two-phase authorize/capture on available_balance. place() is one
+    conditional UPDATE plus an insert, so no wallet lock outlives it while
+    the caller finishes its own work. capture_many() later settles any number
+    of holds with bulk inserts and one wallet update per batch, and
+    expire_due() returns funds from holds nobody settled in time.
+    """
+
+    @staticmethod
+    def generate_reference():
+        return time_ordered_reference('HOLD')
+
+    @staticmethod
+    @retry_on_conflict
+    @transaction.atomic
+    def place(wallet, amount, description='', expires_in=None, metadata=None, txn=None):
+        if amount <= 0:
+            raise ValueError("Hold amount must be greater than zero")
+        BalanceService.hold(wallet, amount)
+        return WalletHold.objects.create(
+            wallet=wallet,
+            amount=amount,
+            reference=HoldService.generate_reference(),
+            description=description or '',
+            expires_at=timezone.now() + (expires_in or settings.HOLD_DEFAULT_TTL),
+            transaction=txn,
+            metadata=metadata or {}
+        )
+
+    @staticmethod
+    def _lock_active(hold_ids):
+        return list(
+            WalletHold.objects.select_for_update().filter(pk__in=hold_ids, status=HOLD_ACTIVE).order_by('pk')
+        )
+
+    @staticmethod
+    @retry_on_conflict
+    @transaction.atomic
+    def release(hold):
+        locked = HoldService._lock_active([hold.pk])
+        if not locked:
+            raise ValueError("Hold is not active")
+        hold = locked[0]
+        BalanceService.release(hold.wallet, hold.amount)
+        hold.status = HOLD_RELEASED
+        hold.resolved_at = timezone.now()
+        hold.save(update_fields=['status', 'resolved_at', 'updated_at'])
+        return hold
+
+    @staticmethod
+    def capture(hold, amount=None, **kwargs):
+        """Capture up to the held amount; the remainder goes back to available_balance"""
+        return HoldService.capture_many([(hold, amount)], **kwargs)[0]
+
+    @staticmethod
+    @retry_on_conflict
+    @transaction.atomic
+    def capture_many(captures, transaction_type=TRANSACTION_WITHDRAWAL, account=LEDGER_ACCOUNT_EXTERNAL,
+                     description=''):
+        """
+        Settle holds in one transaction. `captures` holds WalletHold
+        instances or (hold, amount) pairs; amount None captures the whole
+        hold. Fails as a unit if any hold is inactive, expired or over-captured.
+        """
+        if transaction_type not in WALLET_DEBIT_TYPES:
+            raise ValueError(f"{transaction_type} is not a debit transaction type")
+        requested = {}
+        for item in captures:
+            hold, amount = item if isinstance(item, tuple) else (item, None)
+            requested[hold.pk] = amount
+        holds = HoldService._lock_active(list(requested))
+        if len(holds) != len(requested):
+            raise ValueError("Hold is not active")
+        wallets = Wallet.objects.filter(pk__in={h.wallet_id for h in holds}).select_related('user').in_bulk()
+        BalanceService.lock_wallets(*wallets.values())
+
+        now = timezone.now()
+        transactions, entries, events = [], [], []
+        for hold in holds:
+            amount = hold.amount if requested[hold.pk] is None else requested[hold.pk]
+            if hold.expires_at <= now:
+                raise ValueError(f"Hold {hold.reference} has expired")
+            if amount <= 0 or amount > hold.amount:
+                raise ValueError(f"Capture amount for {hold.reference} must be between 0.01 and {hold.amount}")
+            wallet = wallets[hold.wallet_id]
+            txn = TransactionService.build_transaction(
+                wallet=wallet,
+                transaction_type=transaction_type,
+                amount=amount,
+                description=description or hold.description,
+                status=STATUS_COMPLETED,
+                metadata={'hold_reference': hold.reference}
+            )
+            wallet.balance -= amount
+            wallet.available_balance += hold.amount - amount
+            if wallet.balance < 0:
+                raise ValueError("Insufficient balance")
+            hold.status = HOLD_CAPTURED
+            hold.captured_amount = amount
+            hold.resolved_at = now
+            hold.updated_at = now
+            hold.transaction = txn
+            transactions.append(txn)
+            entries.append(LedgerService.build_entry(transaction_type, txn.reference, [
+                LedgerService.wallet_leg(wallet, -amount),
+                LedgerService.account_leg(account, wallet.currency, amount),
+            ], description=txn.description))
+            events.append((wallet.user, txn, 'WITHDRAWAL'))
+
+        for wallet in wallets.values():
+            wallet.updated_at = now
+        TransactionService.save_transactions(transactions)
+        Wallet.objects.bulk_update(list(wallets.values()), ['balance', 'available_balance', 'updated_at'], batch_size=500)
+        WalletHold.objects.bulk_update(
+            holds, ['status', 'captured_amount', 'resolved_at', 'updated_at', 'transaction'], batch_size=500
+        )
+        BalanceSnapshotCache.invalidate_on_commit(*{w.user_id for w in wallets.values()})
+        LedgerService.post(*entries)
+        NotificationService.enqueue_transaction_notifications(events)
+        return holds
+
+    @staticmethod
+    def expire_due(now=None, batch_size=None):
+        """Release active holds past expires_at in batches; return how many expired"""
+        now = now or timezone.now()
+        batch_size = batch_size or settings.HOLD_EXPIRY_BATCH_SIZE
+        expired = 0
+        while True:
+            with transaction.atomic():
+                holds = list(
+                    WalletHold.objects.filter(status=HOLD_ACTIVE, expires_at__lte=now)
+                    .order_by('expires_at').select_for_update(skip_locked=True)[:batch_size]
+                )
+                if not holds:
+                    return expired
+                totals = defaultdict(Decimal)
+                for hold in holds:
+                    totals[hold.wallet_id] += hold.amount
+                    hold.status = HOLD_EXPIRED
+                    hold.resolved_at = now
+                    hold.updated_at = now
+                for wallet_id in sorted(totals):
+                    Wallet.objects.filter(pk=wallet_id).update(
+                        available_balance=F('available_balance') + totals[wallet_id], updated_at=now
+                    )
+                WalletHold.objects.bulk_update(holds, ['status', 'resolved_at', 'updated_at'], batch_size=1000)
+                BalanceSnapshotCache.invalidate_on_commit(
+                    *Wallet.objects.filter(pk__in=totals).values_list('user_id', flat=True)
+                )
+            expired += len(holds)
@@ -0,0 +1,265 @@
+import functools
+import threading
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import TransferLimit
+
+CENTS = Decimal('100')
+
+
+@functools.lru_cache(maxsize=None)
+def get_limit_backend():
+    """Return the configured TRANSFER_LIMIT_BACKEND instance"""
+    return import_string(settings.TRANSFER_LIMIT_BACKEND)()
+
+
+def to_cents(amount):
+    return int(Decimal(str(amount)) * CENTS)
+
+
+def from_cents(cents):
+    return (Decimal(int(cents or 0)) / CENTS).quantize(Decimal('0.01'))
+
+
+def _limit_error(code, daily_limit, monthly_limit, daily_used, monthly_used):
+    if code == 1:
+        return f"Daily transfer limit exceeded. Remaining: {from_cents(to_cents(daily_limit) - daily_used)}"
+    return f"Monthly transfer limit exceeded. Remaining: {from_cents(to_cents(monthly_limit) - monthly_used)}"
+
+
+class BaseLimitBackend:
+    """
+    Tracks daily and monthly transfer usage per user. consume_many() walks the
+    amounts in order, consumes every amount that still fits and returns an
+    error message (or None) for each one. Every backend enforces the limits
+    stored on the user's TransferLimit row.
+    """
+    # Whether usage lives outside the database and must be copied to TransferLimit
+    reconcile = False
+
+    def consume_many(self, user, amounts):
+        raise NotImplementedError
+
+    def release(self, user, amount):
+        """Give back usage for a transfer that did not go through"""
+
+    def usage(self, user):
+        """Return (daily_used, monthly_used)"""
+        raise NotImplementedError
+
+
+class DatabaseLimitBackend(BaseLimitBackend):
+    """
+    Usage stored on the TransferLimit row; rolled back with the surrounding
+    transaction. The row is locked while usage is checked, so concurrent
+    transfers from any of the user's wallets cannot both spend the same headroom.
+    """
+
+    def consume_many(self, user, amounts):
+        from .services import TransferLimitService
+        limit = TransferLimitService.get_or_create_limit(user, for_update=True)
+        errors = []
+        for amount in amounts:
+            if limit.daily_used + amount > limit.daily_limit:
+                errors.append(f"Daily transfer limit exceeded. Remaining: {limit.daily_limit - limit.daily_used}")
+            elif limit.monthly_used + amount > limit.monthly_limit:
+                errors.append(f"Monthly transfer limit exceeded. Remaining: {limit.monthly_limit - limit.monthly_used}")
+            else:
+                limit.daily_used += amount
+                limit.monthly_used += amount
+                errors.append(None)
+        if any(error is None for error in errors):
+            limit.save(update_fields=['daily_used', 'monthly_used', 'updated_at'])
+        return errors
+
+    def usage(self, user):
+        from .services import TransferLimitService
+        limit = TransferLimitService.get_or_create_limit(user)
+        return limit.daily_used, limit.monthly_used
+
+
+class CounterLimitBackend(BaseLimitBackend):
+    """
+    Usage kept as integer cent counters in keys scoped to the current day and
+    month, so resets happen naturally when the key name rolls over and old
+    keys expire on their own.
+    """
+    reconcile = True
+    key_prefix = 'transfer_limits'
+
+    def keys(self, user, now=None):
+        now = now or timezone.now()
+        return (
+            f"{self.key_prefix}:{user.pk}:d:{now:%Y%m%d}",
+            f"{self.key_prefix}:{user.pk}:m:{now:%Y%m}",
+        )
+
+    def ttls(self, now=None):
+        """Seconds until each key may expire: end of period plus a day for reconciliation"""
+        now = now or timezone.now()
+        tomorrow = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), tzinfo=now.tzinfo)
+        next_month = (now.replace(day=28) + timedelta(days=4)).replace(day=1)
+        next_month = datetime.combine(next_month.date(), datetime.min.time(), tzinfo=now.tzinfo)
+        return (
+            int((tomorrow - now).total_seconds()) + 86400,
+            int((next_month - now).total_seconds()) + 86400,
+        )
+
+    @classmethod
+    def limits_key(cls, user_id):
+        return f"{cls.key_prefix}:config:{user_id}"
+
+    def limits(self, user):
+        """
+        Return (daily_limit, monthly_limit) from the TransferLimit row, or the
+        user's defaults when there is none. Read-only and cached per user;
+        usage and resets belong to the counters, not the row.
+        """
+        key = self.limits_key(user.pk)
+        limits = cache.get(key)
+        if limits is None:
+            limits = TransferLimit.objects.filter(user=user).values_list('daily_limit', 'monthly_limit').first()
+            limits = limits or (user.daily_transfer_limit, user.monthly_transfer_limit)
+            cache.set(key, limits, settings.TRANSFER_LIMIT_CONFIG_TTL)
+        return limits
+
+    @classmethod
+    def invalidate_limits(cls, user_id):
+        cache.delete(cls.limits_key(user_id))
+
+    def consume_many(self, user, amounts):
+        now = timezone.now()
+        daily_key, monthly_key = self.keys(user, now)
+        daily_ttl, monthly_ttl = self.ttls(now)
+        daily_limit, monthly_limit = self.limits(user)
+        results = self.apply(
+            daily_key, monthly_key,
+            to_cents(daily_limit), to_cents(monthly_limit),
+            daily_ttl, monthly_ttl,
+            [to_cents(amount) for amount in amounts]
+        )
+        return [
+            _limit_error(code, daily_limit, monthly_limit, daily_used, monthly_used) if code else None
+            for code, daily_used, monthly_used in results
+        ]
+
+    def apply(self, daily_key, monthly_key, daily_limit, monthly_limit, daily_ttl, monthly_ttl, amounts):
+        """Atomically check and consume; return (code, daily_used, monthly_used) per amount"""
+        raise NotImplementedError
+
+
+class RedisLimitBackend(CounterLimitBackend):
+    # KEYS: daily, monthly. ARGV: daily limit, monthly limit, daily ttl, monthly ttl, amounts...
+    # Returns a flat list of (code, daily_used, monthly_used); code 1 = daily, 2 = monthly exceeded.
+    SCRIPT = """
+    local daily = tonumber(redis.call('GET', KEYS[1]) or '0')
+    local monthly = tonumber(redis.call('GET', KEYS[2]) or '0')
+    local daily_limit = tonumber(ARGV[1])
+    local monthly_limit = tonumber(ARGV[2])
+    local accepted = 0
+    local result = {}
+    for i = 5, #ARGV do
+        local amount = tonumber(ARGV[i])
+        local code = 0
+        if daily + amount > daily_limit then
+            code = 1
+        elseif monthly + amount > monthly_limit then
+            code = 2
+        else
+            daily = daily + amount
+            monthly = monthly + amount
+            accepted = accepted + amount
+        end
+        table.insert(result, code)
+        table.insert(result, daily)
+        table.insert(result, monthly)
+    end
+    if accepted > 0 then
+        redis.call('INCRBY', KEYS[1], accepted)
+        redis.call('EXPIRE', KEYS[1], ARGV[3])
+        redis.call('INCRBY', KEYS[2], accepted)
+        redis.call('EXPIRE', KEYS[2], ARGV[4])
+    end
+    return result
+    """
+
+    def __init__(self, url=None):
+        import redis
+        self.client = redis.Redis.from_url(url or settings.TRANSFER_LIMIT_REDIS_URL)
+        self.script = self.client.register_script(self.SCRIPT)
+
+    def apply(self, daily_key, monthly_key, daily_limit, monthly_limit, daily_ttl, monthly_ttl, amounts):
+        flat = self.script(
+            keys=[daily_key, monthly_key],
+            args=[daily_limit, monthly_limit, daily_ttl, monthly_ttl, *amounts]
+        )
+        return [tuple(int(v) for v in flat[i:i + 3]) for i in range(0, len(flat), 3)]
+
+    def release(self, user, amount):
+        daily_key, monthly_key = self.keys(user)
+        cents = to_cents(amount)
+        pipe = self.client.pipeline()
+        pipe.decrby(daily_key, cents)
+        pipe.decrby(monthly_key, cents)
+        pipe.execute()
+
+    def usage(self, user):
+        daily, monthly = self.client.mget(self.keys(user))
+        return from_cents(daily), from_cents(monthly)
+
+
+class InMemoryLimitBackend(CounterLimitBackend):
+    """Process-local stand-in for RedisLimitBackend, for tests and development"""
+    _counters = {}
+    _lock = threading.Lock()
+
+    def _get(self, key):
+        value, expires_at = self._counters.get(key, (0, None))
+        if expires_at is not None and expires_at <= time.monotonic():
+            return 0
+        return value
+
+    def _set(self, key, value, ttl):
+        self._counters[key] = (value, time.monotonic() + ttl)
+
+    def apply(self, daily_key, monthly_key, daily_limit, monthly_limit, daily_ttl, monthly_ttl, amounts):
+        with self._lock:
+            daily, monthly = self._get(daily_key), self._get(monthly_key)
+            results = []
+            for amount in amounts:
+                code = 0
+                if daily + amount > daily_limit:
+                    code = 1
+                elif monthly + amount > monthly_limit:
+                    code = 2
+                else:
+                    daily += amount
+                    monthly += amount
+                results.append((code, daily, monthly))
+            self._set(daily_key, daily, daily_ttl)
+            self._set(monthly_key, monthly, monthly_ttl)
+            return results
+
+    def release(self, user, amount):
+        cents = to_cents(amount)
+        with self._lock:
+            for key in self.keys(user):
+                value, expires_at = self._counters.get(key, (0, None))
+                self._counters[key] = (value - cents, expires_at)
+
+    def usage(self, user):
+        daily_key, monthly_key = self.keys(user)
+        with self._lock:
+            return from_cents(self._get(daily_key)), from_cents(self._get(monthly_key))
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls._counters.clear()
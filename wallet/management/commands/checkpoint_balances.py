@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from wallet.services import LedgerService
+
+class Command(BaseCommand):
+    help = 'Snapshot wallet balances from the ledger into balance checkpoints'
+
+    def handle(self, *args, **options):
+        self.stdout.write('Checkpointing wallet balances...')
+        created = LedgerService.checkpoint_balances()
+        self.stdout.write(self.style.SUCCESS(f'Created {created} balance checkpoints'))
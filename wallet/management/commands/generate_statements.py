@@ -0,0 +1,21 @@
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from wallet.statements import StatementService
+
+class Command(BaseCommand):
+    help = 'Queue monthly statement generation for every wallet without one'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', help='Statement month as YYYY-MM (default: last month)')
+
+    def handle(self, *args, **options):
+        month = None
+        if options['month']:
+            try:
+                month = datetime.strptime(options['month'], '%Y-%m').date()
+            except ValueError:
+                raise CommandError('--month must be YYYY-MM')
+        month = month or StatementService.previous_month()
+        self.stdout.write(f'Generating statements for {month:%Y-%m}...')
+        batches = StatementService.dispatch(month)
+        self.stdout.write(self.style.SUCCESS(f'Queued {batches} statement batches'))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from wallet.reconciliation import ReconciliationService
+
+class Command(BaseCommand):
+    help = 'Check every wallet balance against its transaction history and ledger postings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help='Processes to run partitions in')
+        parser.add_argument('--partition-size', type=int, default=None, help='Wallets per partition')
+        parser.add_argument('--fresh', action='store_true', help='Start a new run instead of resuming')
+
+    def handle(self, *args, **options):
+        self.stdout.write('Reconciling wallet balances...')
+        run = ReconciliationService.run(
+            workers=options['workers'],
+            resume=not options['fresh'],
+            partition_size=options['partition_size']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Run {run.pk}: {run.status}, {run.wallets_checked} wallets checked, {run.drift_count} drifted'
+        ))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from wallet.analytics import SpendingAnalyticsService
+
+class Command(BaseCommand):
+    help = 'Recompute daily transaction rollups for wallet-days changed since the last run'
+
+    def handle(self, *args, **options):
+        self.stdout.write('Refreshing daily transaction rollups...')
+        refreshed = SpendingAnalyticsService.refresh()
+        self.stdout.write(self.style.SUCCESS(f'Refreshed {refreshed} wallet-days'))
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+from wallet.outbox import OutboxRelay
+
+class Command(BaseCommand):
+    help = 'Publish pending outbox events; run several instances to relay in parallel'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--forever', action='store_true', help='Keep polling instead of exiting when drained')
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds to sleep when the outbox is empty')
+
+    def handle(self, *args, **options):
+        while True:
+            published = OutboxRelay.relay(batch_size=options['batch_size'])
+            if published:
+                self.stdout.write(self.style.SUCCESS(f'Published {published} outbox events'))
+            if not options['forever']:
+                break
+            if not published:
+                time.sleep(options['interval'])
@@ -0,0 +1,23 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from wallet.models import Wallet
+from wallet.sharding import BalanceShardService
+
+class Command(BaseCommand):
+    help = 'Spread credits to a hot wallet over N balance shards (0 turns sharding off)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('wallet_id')
+        parser.add_argument('shards', type=int)
+
+    def handle(self, *args, **options):
+        try:
+            wallet = Wallet.objects.get(pk=options['wallet_id'])
+        except (Wallet.DoesNotExist, ValidationError):
+            raise CommandError(f"Wallet {options['wallet_id']} not found")
+        self.stdout.write(f'Setting {wallet} to {options["shards"]} balance shards...')
+        try:
+            BalanceShardService.configure(wallet, options['shards'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(f'Wallet {wallet.pk} now has {options["shards"]} balance shards'))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from wallet.services import ExchangeRateService
+
+class Command(BaseCommand):
+    help = 'Fetch exchange rates from the configured provider into the rate table'
+
+    def handle(self, *args, **options):
+        self.stdout.write('Updating exchange rates...')
+        updated = ExchangeRateService.update_rates()
+        self.stdout.write(self.style.SUCCESS(f'Updated {updated} exchange rates'))
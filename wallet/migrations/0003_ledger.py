@@ -0,0 +1,87 @@
+# Generated by Django 5.0.1 on 2026-10-17 07:20
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+def post_opening_balances(apps, schema_editor):
+    """Seed the journal with each existing wallet's balance so postings sum to Wallet.balance"""
+    Wallet = apps.get_model('wallet', 'Wallet')
+    JournalEntry = apps.get_model('wallet', 'JournalEntry')
+    Posting = apps.get_model('wallet', 'Posting')
+    now = django.utils.timezone.now()
+    for wallet in Wallet.objects.exclude(balance=0).iterator(chunk_size=1000):
+        entry = JournalEntry.objects.create(
+            entry_type='OPENING_BALANCE',
+            reference=f'OPEN-{wallet.pk.hex[:12].upper()}',
+            description='Opening balance',
+            metadata={},
+        )
+        Posting.objects.bulk_create([
+            Posting(entry=entry, account='WALLET', wallet=wallet, currency=wallet.currency,
+                    amount=wallet.balance, created_at=now),
+            Posting(entry=entry, account='EXTERNAL', currency=wallet.currency,
+                    amount=-wallet.balance, created_at=now),
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0002_alter_feeconfiguration_transaction_type_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JournalEntry',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('entry_type', models.CharField(max_length=30)),
+                ('reference', models.CharField(db_index=True, max_length=100)),
+                ('description', models.TextField(blank=True)),
+                ('metadata', models.JSONField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Journal Entry',
+                'verbose_name_plural': 'Journal Entries',
+                'db_table': 'journal_entries',
+            },
+        ),
+        migrations.CreateModel(
+            name='BalanceCheckpoint',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('as_of', models.DateTimeField()),
+                ('wallet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='checkpoints', to='wallet.wallet')),
+            ],
+            options={
+                'db_table': 'balance_checkpoints',
+                'indexes': [models.Index(fields=['wallet', '-as_of'], name='balance_che_wallet__428071_idx')],
+                'unique_together': {('wallet', 'as_of')},
+            },
+        ),
+        migrations.CreateModel(
+            name='Posting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('account', models.CharField(choices=[('WALLET', 'Customer Wallet'), ('EXTERNAL', 'External Clearing'), ('FEE_INCOME', 'Fee Income'), ('SAVINGS', 'Savings Pool'), ('LOANS', 'Loan Book'), ('CRYPTO', 'Crypto Settlement')], max_length=20)),
+                ('currency', models.CharField(choices=[('USD', 'US Dollar'), ('EUR', 'Euro'), ('GBP', 'British Pound'), ('KES', 'Kenyan Shilling')], max_length=3)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('entry', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='postings', to='wallet.journalentry')),
+                ('wallet', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='postings', to='wallet.wallet')),
+            ],
+            options={
+                'db_table': 'ledger_postings',
+                'indexes': [models.Index(fields=['wallet', 'created_at'], name='ledger_post_wallet__cb569c_idx'), models.Index(fields=['account', 'currency', 'created_at'], name='ledger_post_account_738e3b_idx')],
+            },
+        ),
+        migrations.RunPython(post_opening_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.1 on 2026-10-17 07:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0003_ledger'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['wallet', '-created_at', '-id'], name='transaction_wallet__72eec8_idx'),
+        ),
+    ]
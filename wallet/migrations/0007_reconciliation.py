@@ -0,0 +1,72 @@
+# Generated by Django 5.0.1 on 2026-10-17 07:34
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0006_outbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReconciliationRun',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('COMPLETED', 'Completed'), ('FAILED', 'Failed')], default='RUNNING', max_length=20)),
+                ('partitions_total', models.PositiveIntegerField(default=0)),
+                ('wallets_checked', models.PositiveIntegerField(default=0)),
+                ('drift_count', models.PositiveIntegerField(default=0)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'reconciliation_runs',
+            },
+        ),
+        migrations.CreateModel(
+            name='ReconciliationPartition',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('index', models.PositiveIntegerField()),
+                ('start_id', models.UUIDField(blank=True, null=True)),
+                ('end_id', models.UUIDField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('COMPLETED', 'Completed'), ('FAILED', 'Failed')], default='PENDING', max_length=20)),
+                ('wallets_checked', models.PositiveIntegerField(default=0)),
+                ('drift_count', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='partitions', to='wallet.reconciliationrun')),
+            ],
+            options={
+                'db_table': 'reconciliation_partitions',
+                'ordering': ['run', 'index'],
+                'unique_together': {('run', 'index')},
+            },
+        ),
+        migrations.CreateModel(
+            name='BalanceDrift',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('transaction_balance', models.DecimalField(decimal_places=2, help_text='Net of completed transactions', max_digits=15)),
+                ('ledger_balance', models.DecimalField(decimal_places=2, help_text='Sum of wallet postings', max_digits=15)),
+                ('last_balance_after', models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True)),
+                ('difference', models.DecimalField(decimal_places=2, help_text='balance - transaction_balance', max_digits=15)),
+                ('wallet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='drifts', to='wallet.wallet')),
+                ('partition', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='drifts', to='wallet.reconciliationpartition')),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='drifts', to='wallet.reconciliationrun')),
+            ],
+            options={
+                'db_table': 'balance_drifts',
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.0.1 on 2026-10-17 07:41
+
+import common.ids
+import django.db.models.deletion
+import wallet.models
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0008_time_ordered_ids'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Statement',
+            fields=[
+                ('id', models.UUIDField(default=common.ids.uuid7, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('period_start', models.DateField(help_text='First day of the statement month')),
+                ('opening_balance', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('closing_balance', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('total_credits', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=15)),
+                ('total_debits', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=15)),
+                ('transaction_count', models.PositiveIntegerField(default=0)),
+                ('file', models.FileField(upload_to=wallet.models.statement_upload_to)),
+                ('wallet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='statements', to='wallet.wallet')),
+            ],
+            options={
+                'db_table': 'statements',
+                'ordering': ['-period_start'],
+                'unique_together': {('wallet', 'period_start')},
+            },
+        ),
+    ]
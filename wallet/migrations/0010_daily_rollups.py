@@ -0,0 +1,63 @@
+# Generated by Django 5.0.1 on 2026-10-17 07:43
+
+import common.ids
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0009_statements'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyTransactionRollup',
+            fields=[
+                ('id', models.UUIDField(default=common.ids.uuid7, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('day', models.DateField()),
+                ('transaction_type', models.CharField(choices=[('DEPOSIT', 'Deposit'), ('WITHDRAWAL', 'Withdrawal'), ('TRANSFER', 'Transfer'), ('CRYPTO_BUY', 'Crypto Buy'), ('CRYPTO_SELL', 'Crypto Sell'), ('LOAN_DISBURSEMENT', 'Loan Disbursement'), ('LOAN_REPAYMENT', 'Loan Repayment'), ('SAVINGS_DEPOSIT', 'Savings Deposit'), ('SAVINGS_WITHDRAWAL', 'Savings Withdrawal'), ('INTEREST_CREDIT', 'Interest Credit')], max_length=30)),
+                ('currency', models.CharField(choices=[('USD', 'US Dollar'), ('EUR', 'Euro'), ('GBP', 'British Pound'), ('KES', 'Kenyan Shilling')], max_length=3)),
+                ('transaction_count', models.PositiveIntegerField(default=0)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=18)),
+                ('total_fees', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=15)),
+            ],
+            options={
+                'db_table': 'daily_transaction_rollups',
+            },
+        ),
+        migrations.CreateModel(
+            name='RollupRun',
+            fields=[
+                ('id', models.UUIDField(default=common.ids.uuid7, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('as_of', models.DateTimeField(unique=True)),
+                ('days_refreshed', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'rollup_runs',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['updated_at'], name='transaction_updated_468e55_idx'),
+        ),
+        migrations.AddField(
+            model_name='dailytransactionrollup',
+            name='wallet',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='wallet.wallet'),
+        ),
+        migrations.AddIndex(
+            model_name='dailytransactionrollup',
+            index=models.Index(fields=['wallet', 'day'], name='daily_trans_wallet__db8023_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='dailytransactionrollup',
+            unique_together={('wallet', 'day', 'transaction_type')},
+        ),
+    ]
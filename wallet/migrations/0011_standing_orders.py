@@ -0,0 +1,43 @@
+# Generated by Django 5.0.1 on 2026-10-17 07:46
+
+import common.ids
+import django.core.validators
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0010_daily_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StandingOrder',
+            fields=[
+                ('id', models.UUIDField(default=common.ids.uuid7, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('recipient_email', models.EmailField(max_length=254)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=15, validators=[django.core.validators.MinValueValidator(Decimal('0.01'))])),
+                ('description', models.CharField(blank=True, max_length=255)),
+                ('frequency', models.CharField(choices=[('DAILY', 'Daily'), ('WEEKLY', 'Weekly'), ('MONTHLY', 'Monthly')], max_length=10)),
+                ('first_run_at', models.DateTimeField()),
+                ('next_run_at', models.DateTimeField()),
+                ('end_date', models.DateField(blank=True, null=True)),
+                ('run_count', models.PositiveIntegerField(default=0, help_text='Schedule occurrences consumed so far')),
+                ('is_active', models.BooleanField(default=True)),
+                ('last_run_at', models.DateTimeField(blank=True, null=True)),
+                ('last_status', models.CharField(blank=True, choices=[('PENDING', 'Pending'), ('COMPLETED', 'Completed'), ('FAILED', 'Failed'), ('CANCELLED', 'Cancelled')], max_length=20)),
+                ('last_error', models.CharField(blank=True, max_length=255)),
+                ('last_reference', models.CharField(blank=True, max_length=100)),
+                ('wallet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standing_orders', to='wallet.wallet')),
+            ],
+            options={
+                'db_table': 'standing_orders',
+                'indexes': [models.Index(condition=models.Q(('is_active', True)), fields=['next_run_at'], name='standing_order_due_idx'), models.Index(fields=['wallet', 'is_active'], name='standing_or_wallet__d6a9ad_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.1 on 2026-10-17 07:50
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0012_wallet_holds'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SettlementQueueItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('hold', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='settlement', to='wallet.wallethold')),
+            ],
+            options={
+                'db_table': 'settlement_queue',
+                'indexes': [models.Index(fields=['shard', 'id'], name='settlement__shard_62233a_idx')],
+            },
+        ),
+    ]
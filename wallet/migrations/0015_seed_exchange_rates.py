@@ -0,0 +1,28 @@
+# Generated by Django 5.0.1 on 2026-10-17 08:01
+
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import migrations
+
+
+def seed_exchange_rates(apps, schema_editor):
+    """Start with FX_STATIC_RATES so conversions work before the first update_exchange_rates run"""
+    ExchangeRate = apps.get_model('wallet', 'ExchangeRate')
+    for currency, rate in settings.FX_STATIC_RATES.items():
+        ExchangeRate.objects.get_or_create(
+            base_currency='USD',
+            quote_currency=currency,
+            defaults={'rate': Decimal(str(rate)), 'source': 'static'}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0014_wallet_balance_shards'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_exchange_rates, migrations.RunPython.noop),
+    ]
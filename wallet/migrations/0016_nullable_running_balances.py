@@ -0,0 +1,23 @@
+# Generated by Django 5.0.1 on 2026-10-17 08:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0015_seed_exchange_rates'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='transaction',
+            name='balance_after',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='balance_before',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True),
+        ),
+    ]
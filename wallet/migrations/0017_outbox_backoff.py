@@ -0,0 +1,32 @@
+# Generated by Django 5.0.1 on 2026-10-17 08:07
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0016_nullable_running_balances'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='outboxevent',
+            name='outbox_unpublished_idx',
+        ),
+        migrations.AddField(
+            model_name='outboxevent',
+            name='dead_lettered_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='outboxevent',
+            name='next_attempt_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='outboxevent',
+            index=models.Index(condition=models.Q(('dead_lettered_at__isnull', True), ('published_at__isnull', True)), fields=['id'], name='outbox_unpublished_idx'),
+        ),
+    ]
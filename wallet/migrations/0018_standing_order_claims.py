@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-17 08:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0017_outbox_backoff'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='standingorder',
+            name='claimed_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
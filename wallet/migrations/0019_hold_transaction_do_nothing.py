@@ -0,0 +1,19 @@
+# Generated by Django 5.0.1 on 2026-10-17 08:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0018_standing_order_claims'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='wallethold',
+            name='transaction',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='holds', to='wallet.transaction'),
+        ),
+    ]
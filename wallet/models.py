@@ -1,8 +1,15 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.core.validators import MinValueValidator
+from django.utils import timezone
 from decimal import Decimal
 from common.models import TimeStampedModel
-from common.constants import CURRENCY_CHOICES, TRANSACTION_TYPE_CHOICES, TRANSACTION_STATUS_CHOICES, TRANSACTION_PENDING
+from common.constants import (
+    CURRENCY_CHOICES, TRANSACTION_TYPE_CHOICES, TRANSACTION_STATUS_CHOICES, TRANSACTION_PENDING,
+    LEDGER_ACCOUNT_CHOICES, RECONCILIATION_STATUS_CHOICES, RECONCILIATION_PENDING, RECONCILIATION_RUNNING,
+    TRANSACTION_COMPLETED, WALLET_CREDIT_TYPES, WALLET_DEBIT_TYPES, FREQUENCY_CHOICES,
+    HOLD_STATUS_CHOICES, HOLD_ACTIVE
+)
 
 class Wallet(TimeStampedModel):
     user = models.ForeignKey('core.User', on_delete=models.CASCADE, related_name='wallets')
@@ -21,6 +28,8 @@ class Wallet(TimeStampedModel):
     )
     is_active = models.BooleanField(default=True)
     is_primary = models.BooleanField(default=False)
+    # Credits to a wallet with shards land on WalletBalanceShard rows instead of this one
+    shard_count = models.PositiveSmallIntegerField(default=0)
     
     class Meta:
         db_table = 'wallets'
@@ -30,6 +39,34 @@ class Wallet(TimeStampedModel):
     
     def __str__(self):
         return f"{self.user.email} - {self.currency} - {self.balance}"
+    
+    @property
+    def total_balance(self):
+        """balance plus credits not yet folded in from shard rows (see BalanceService.with_unfolded_balance)"""
+        return self.balance + getattr(self, 'unfolded_balance', Decimal('0.00'))
+    
+    @property
+    def total_available_balance(self):
+        return self.available_balance + getattr(self, 'unfolded_balance', Decimal('0.00'))
+
+
+class WalletBalanceShard(models.Model):
+    """
+    One of a hot wallet's credit sub-balances. Concurrent credits spread over
+    the shard rows by hash instead of queueing on the wallet row; debits and
+    the periodic fold job move shard balances back onto the wallet.
+    """
+    wallet = models.ForeignKey(Wallet, on_delete=models.CASCADE, related_name='balance_shards')
+    index = models.PositiveSmallIntegerField()
+    balance = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'))
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'wallet_balance_shards'
+        unique_together = ['wallet', 'index']
+    
+    def __str__(self):
+        return f"{self.wallet_id} #{self.index}: {self.balance}"
 
 
 class Transaction(TimeStampedModel):
@@ -40,9 +77,11 @@ class Transaction(TimeStampedModel):
     currency = models.CharField(max_length=3, choices=CURRENCY_CHOICES)
     status = models.CharField(max_length=20, choices=TRANSACTION_STATUS_CHOICES, default=TRANSACTION_PENDING)
     
-    # Balances (for audit trail)
-    balance_before = models.DecimalField(max_digits=15, decimal_places=2)
-    balance_after = models.DecimalField(max_digits=15, decimal_places=2)
+    # Balances (for audit trail). Null on credits to a sharded wallet: those
+    # land on shard rows without locking the wallet, so no running balance is
+    # known at write time; the ledger still has the exact balance (balance_at)
+    balance_before = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
+    balance_after = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
     
     # Reference
     reference = models.CharField(max_length=100, unique=True, db_index=True)
@@ -65,10 +104,170 @@ class Transaction(TimeStampedModel):
             models.Index(fields=['-created_at']),
             models.Index(fields=['reference']),
             models.Index(fields=['status']),
+            models.Index(fields=['wallet', '-created_at', '-id']),
+            models.Index(fields=['updated_at']),
         ]
     
     def __str__(self):
         return f"{self.reference} - {self.transaction_type} - {self.amount} {self.currency}"
+    
+    # Pending transfers still settle or fail in place; they are archived once final
+    archive_exclude = models.Q(status=TRANSACTION_PENDING)
+    
+    @staticmethod
+    def archive_net_amount(row):
+        """Balance effect of an archived row, kept in the archive manifest for reconciliation"""
+        if row['status'] != TRANSACTION_COMPLETED:
+            return Decimal('0.00')
+        if row['transaction_type'] in WALLET_CREDIT_TYPES:
+            return row['amount']
+        if row['transaction_type'] in WALLET_DEBIT_TYPES:
+            return -row['amount'] - row['fee']
+        return Decimal('0.00')
+
+
+class JournalEntry(TimeStampedModel):
+    """Append-only header for one balanced set of ledger postings"""
+    entry_type = models.CharField(max_length=30)
+    reference = models.CharField(max_length=100, db_index=True)
+    description = models.TextField(blank=True)
+    metadata = models.JSONField(blank=True, null=True)
+    
+    class Meta:
+        db_table = 'journal_entries'
+        verbose_name = 'Journal Entry'
+        verbose_name_plural = 'Journal Entries'
+    
+    def __str__(self):
+        return f"{self.reference} - {self.entry_type}"
+
+
+class Posting(models.Model):
+    """
+    One leg of a journal entry. Amounts are signed from the account holder's
+    point of view and every entry sums to zero per currency. Rows are never
+    updated, so they carry no updated_at and use a sequential key.
+    """
+    entry = models.ForeignKey(JournalEntry, on_delete=models.PROTECT, related_name='postings')
+    account = models.CharField(max_length=20, choices=LEDGER_ACCOUNT_CHOICES)
+    wallet = models.ForeignKey(Wallet, on_delete=models.PROTECT, null=True, blank=True, related_name='postings')
+    currency = models.CharField(max_length=3, choices=CURRENCY_CHOICES)
+    amount = models.DecimalField(max_digits=15, decimal_places=2)
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        db_table = 'ledger_postings'
+        indexes = [
+            models.Index(fields=['wallet', 'created_at']),
+            models.Index(fields=['account', 'currency', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.account} {self.amount} {self.currency}"
+
+
+class OutboxEvent(models.Model):
+    """
+    Domain event written in the same database transaction as the change it
+    describes and published later by the outbox relay. The sequential key
+    gives the relay its drain order.
+    """
+    event_type = models.CharField(max_length=50)
+    aggregate_type = models.CharField(max_length=50)
+    aggregate_id = models.UUIDField()
+    payload = models.JSONField(encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(default=timezone.now)
+    published_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    # Not retried before this; also pushed out while a relay holds the event
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    # Set once attempts reach OUTBOX_MAX_ATTEMPTS; the relay no longer picks the event up
+    dead_lettered_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'outbox_events'
+        indexes = [
+            models.Index(
+                fields=['id'], name='outbox_unpublished_idx',
+                condition=models.Q(published_at__isnull=True, dead_lettered_at__isnull=True)
+            ),
+            models.Index(fields=['aggregate_type', 'aggregate_id']),
+        ]
+    
+    def __str__(self):
+        return f"{self.event_type} {self.aggregate_id}"
+
+
+class BalanceCheckpoint(TimeStampedModel):
+    """Wallet balance derived from all postings up to as_of"""
+    wallet = models.ForeignKey(Wallet, on_delete=models.CASCADE, related_name='checkpoints')
+    balance = models.DecimalField(max_digits=15, decimal_places=2)
+    as_of = models.DateTimeField()
+    
+    class Meta:
+        db_table = 'balance_checkpoints'
+        unique_together = ['wallet', 'as_of']
+        indexes = [
+            models.Index(fields=['wallet', '-as_of']),
+        ]
+    
+    def __str__(self):
+        return f"{self.wallet_id} - {self.balance} @ {self.as_of}"
+
+
+class ReconciliationRun(TimeStampedModel):
+    """One pass comparing every Wallet.balance with its transaction history and ledger"""
+    status = models.CharField(max_length=20, choices=RECONCILIATION_STATUS_CHOICES, default=RECONCILIATION_RUNNING)
+    partitions_total = models.PositiveIntegerField(default=0)
+    wallets_checked = models.PositiveIntegerField(default=0)
+    drift_count = models.PositiveIntegerField(default=0)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'reconciliation_runs'
+    
+    def __str__(self):
+        return f"Reconciliation {self.created_at:%Y-%m-%d %H:%M} - {self.status}"
+
+
+class ReconciliationPartition(TimeStampedModel):
+    """Wallets with start_id <= pk < end_id (open-ended where null)"""
+    run = models.ForeignKey(ReconciliationRun, on_delete=models.CASCADE, related_name='partitions')
+    index = models.PositiveIntegerField()
+    start_id = models.UUIDField(null=True, blank=True)
+    end_id = models.UUIDField(null=True, blank=True)
+    status = models.CharField(max_length=20, choices=RECONCILIATION_STATUS_CHOICES, default=RECONCILIATION_PENDING)
+    wallets_checked = models.PositiveIntegerField(default=0)
+    drift_count = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'reconciliation_partitions'
+        unique_together = ['run', 'index']
+        ordering = ['run', 'index']
+    
+    def __str__(self):
+        return f"{self.run_id} #{self.index} - {self.status}"
+
+
+class BalanceDrift(TimeStampedModel):
+    """A wallet whose stored balance disagrees with its history"""
+    run = models.ForeignKey(ReconciliationRun, on_delete=models.CASCADE, related_name='drifts')
+    partition = models.ForeignKey(ReconciliationPartition, on_delete=models.CASCADE, related_name='drifts')
+    wallet = models.ForeignKey(Wallet, on_delete=models.CASCADE, related_name='drifts')
+    balance = models.DecimalField(max_digits=15, decimal_places=2)
+    transaction_balance = models.DecimalField(max_digits=15, decimal_places=2, help_text="Net of completed transactions")
+    ledger_balance = models.DecimalField(max_digits=15, decimal_places=2, help_text="Sum of wallet postings")
+    last_balance_after = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
+    difference = models.DecimalField(max_digits=15, decimal_places=2, help_text="balance - transaction_balance")
+    
+    class Meta:
+        db_table = 'balance_drifts'
+    
+    def __str__(self):
+        return f"{self.wallet_id}: {self.difference}"
 
 
 class TransferLimit(TimeStampedModel):
@@ -111,23 +310,183 @@ class FeeConfiguration(TimeStampedModel):
     
     def calculate_fee(self, amount):
         """Calculate fee based on configuration"""
+        return self.calculate_fees([amount])[0]
+    
+    def calculate_fees(self, amounts):
+        """Calculate fees for many amounts in one pass over the configuration"""
         if not self.is_active:
-            return Decimal('0.00')
-        
-        fee = Decimal('0.00')
+            return [Decimal('0.00')] * len(amounts)
         
         if self.fee_type == 'FIXED':
-            fee = self.fixed_amount
+            fees = [self.fixed_amount] * len(amounts)
         elif self.fee_type == 'PERCENTAGE':
-            fee = (amount * self.percentage) / Decimal('100')
+            fees = [(amount * self.percentage) / Decimal('100') for amount in amounts]
         elif self.fee_type == 'HYBRID':
-            fee = self.fixed_amount + ((amount * self.percentage) / Decimal('100'))
+            fees = [self.fixed_amount + ((amount * self.percentage) / Decimal('100')) for amount in amounts]
+        else:
+            fees = [Decimal('0.00')] * len(amounts)
         
         # Apply min/max constraints
-        if fee < self.minimum_fee:
-            fee = self.minimum_fee
-        if self.maximum_fee and fee > self.maximum_fee:
-            fee = self.maximum_fee
-        
-        return fee
+        maximum = self.maximum_fee or None
+        return [
+            min(max(fee, self.minimum_fee), maximum) if maximum else max(fee, self.minimum_fee)
+            for fee in fees
+        ]
+
+
+class ExchangeRate(TimeStampedModel):
+    """Units of quote_currency per one unit of base_currency"""
+    base_currency = models.CharField(max_length=3, choices=CURRENCY_CHOICES, default='USD')
+    quote_currency = models.CharField(max_length=3, choices=CURRENCY_CHOICES)
+    rate = models.DecimalField(max_digits=20, decimal_places=8, validators=[MinValueValidator(Decimal('0.00000001'))])
+    source = models.CharField(max_length=50, blank=True)
+    fetched_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        db_table = 'exchange_rates'
+        unique_together = ['base_currency', 'quote_currency']
+        ordering = ['base_currency', 'quote_currency']
+    
+    def __str__(self):
+        return f"{self.base_currency}/{self.quote_currency}: {self.rate}"
+
+
+def statement_upload_to(statement, filename):
+    return f"statements/{statement.period_start:%Y/%m}/{filename}"
+
+
+class Statement(TimeStampedModel):
+    """Precomputed monthly statement for one wallet"""
+    wallet = models.ForeignKey(Wallet, on_delete=models.CASCADE, related_name='statements')
+    period_start = models.DateField(help_text="First day of the statement month")
+    opening_balance = models.DecimalField(max_digits=15, decimal_places=2)
+    closing_balance = models.DecimalField(max_digits=15, decimal_places=2)
+    total_credits = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'))
+    total_debits = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'))
+    transaction_count = models.PositiveIntegerField(default=0)
+    file = models.FileField(upload_to=statement_upload_to)
+    
+    class Meta:
+        db_table = 'statements'
+        unique_together = ['wallet', 'period_start']
+        ordering = ['-period_start']
+    
+    def __str__(self):
+        return f"{self.wallet_id} - {self.period_start:%Y-%m}"
+
+
+class DailyTransactionRollup(TimeStampedModel):
+    """Completed transactions of one wallet, day and type, summed for analytics"""
+    wallet = models.ForeignKey(Wallet, on_delete=models.CASCADE, related_name='daily_rollups')
+    day = models.DateField()
+    transaction_type = models.CharField(max_length=30, choices=TRANSACTION_TYPE_CHOICES)
+    currency = models.CharField(max_length=3, choices=CURRENCY_CHOICES)
+    transaction_count = models.PositiveIntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=18, decimal_places=2, default=Decimal('0.00'))
+    total_fees = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'))
+    
+    class Meta:
+        db_table = 'daily_transaction_rollups'
+        unique_together = ['wallet', 'day', 'transaction_type']
+        indexes = [
+            models.Index(fields=['wallet', 'day']),
+        ]
+    
+    def __str__(self):
+        return f"{self.wallet_id} - {self.day} - {self.transaction_type}: {self.total_amount}"
+
+
+class RollupRun(TimeStampedModel):
+    """Watermark of the rollup catch-up job: transactions updated up to as_of are reflected"""
+    as_of = models.DateTimeField(unique=True)
+    days_refreshed = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        db_table = 'rollup_runs'
+    
+    def __str__(self):
+        return f"Rollups @ {self.as_of}"
+
+
+class StandingOrder(TimeStampedModel):
+    """Recurring transfer from a wallet, executed by the standing order sweeper"""
+    wallet = models.ForeignKey(Wallet, on_delete=models.CASCADE, related_name='standing_orders')
+    recipient_email = models.EmailField()
+    amount = models.DecimalField(max_digits=15, decimal_places=2, validators=[MinValueValidator(Decimal('0.01'))])
+    description = models.CharField(max_length=255, blank=True)
+    frequency = models.CharField(max_length=10, choices=FREQUENCY_CHOICES)
+    first_run_at = models.DateTimeField()
+    next_run_at = models.DateTimeField()
+    end_date = models.DateField(null=True, blank=True)
+    run_count = models.PositiveIntegerField(default=0, help_text="Schedule occurrences consumed so far")
+    is_active = models.BooleanField(default=True)
+    last_run_at = models.DateTimeField(null=True, blank=True)
+    # Lease held by the sweeper paying the current occurrence; a lapsed lease means it died mid-run
+    claimed_until = models.DateTimeField(null=True, blank=True)
+    last_status = models.CharField(max_length=20, choices=TRANSACTION_STATUS_CHOICES, blank=True)
+    last_error = models.CharField(max_length=255, blank=True)
+    last_reference = models.CharField(max_length=100, blank=True)
+    
+    class Meta:
+        db_table = 'standing_orders'
+        indexes = [
+            models.Index(fields=['next_run_at'], name='standing_order_due_idx', condition=models.Q(is_active=True)),
+            models.Index(fields=['wallet', 'is_active']),
+        ]
+    
+    def __str__(self):
+        return f"{self.wallet_id} -> {self.recipient_email}: {self.amount} {self.frequency}"
+
 
+class WalletHold(TimeStampedModel):
+    """
+    Authorization hold: `amount` is taken out of available_balance when the
+    hold is placed and leaves balance when captured, or goes back to
+    available_balance when released or expired.
+    """
+    wallet = models.ForeignKey(Wallet, on_delete=models.CASCADE, related_name='holds')
+    amount = models.DecimalField(max_digits=15, decimal_places=2, validators=[MinValueValidator(Decimal('0.01'))])
+    captured_amount = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'))
+    status = models.CharField(max_length=20, choices=HOLD_STATUS_CHOICES, default=HOLD_ACTIVE)
+    reference = models.CharField(max_length=100, unique=True)
+    description = models.CharField(max_length=255, blank=True)
+    expires_at = models.DateTimeField()
+    resolved_at = models.DateTimeField(null=True, blank=True)
+    # Deliberately no database constraint, so PartitionManager.convert() has no
+    # wallet_holds foreign key to re-create: transaction rows move to the
+    # archive, and archiving must neither fail on nor null out this link.
+    transaction = models.ForeignKey(
+        Transaction, on_delete=models.DO_NOTHING, null=True, blank=True, related_name='holds',
+        db_constraint=False
+    )
+    metadata = models.JSONField(blank=True, null=True)
+    
+    class Meta:
+        db_table = 'wallet_holds'
+        indexes = [
+            models.Index(fields=['expires_at'], name='wallet_hold_expiry_idx', condition=models.Q(status=HOLD_ACTIVE)),
+            models.Index(fields=['wallet', 'status']),
+        ]
+    
+    def __str__(self):
+        return f"{self.reference} - {self.amount} {self.status}"
+
+
+class SettlementQueueItem(models.Model):
+    """
+    An accepted asynchronous transfer waiting for its shard's settlement
+    worker. The hold carries the pending transaction; rows are deleted once
+    settled and the sequential key gives each shard its drain order.
+    """
+    shard = models.PositiveSmallIntegerField()
+    hold = models.OneToOneField(WalletHold, on_delete=models.CASCADE, related_name='settlement')
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        db_table = 'settlement_queue'
+        indexes = [
+            models.Index(fields=['shard', 'id']),
+        ]
+    
+    def __str__(self):
+        return f"shard {self.shard}: {self.hold_id}"
@@ -0,0 +1,141 @@
+import functools
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+EVENT_TRANSACTION_CREATED = 'transaction.created'
+EVENT_TRANSACTION_SETTLED = 'transaction.settled'
+
+
+class LoggingPublisher:
+    """Default publisher: writes events to the log. Swap in a broker publisher via OUTBOX_PUBLISHER."""
+
+    def publish(self, events):
+        for event in events:
+            logger.info("outbox %s %s %s", event.id, event.event_type, event.aggregate_id)
+
+
+@functools.lru_cache(maxsize=None)
+def get_publisher():
+    """Return the configured OUTBOX_PUBLISHER instance"""
+    return import_string(settings.OUTBOX_PUBLISHER)()
+
+
+def transaction_event(txn, event_type=EVENT_TRANSACTION_CREATED):
+    """Build the unsaved event (transaction.created by default) for a saved Transaction"""
+    return OutboxEvent(
+        event_type=event_type,
+        aggregate_type='transaction',
+        aggregate_id=txn.id,
+        payload={
+            'id': txn.id,
+            'reference': txn.reference,
+            'wallet_id': txn.wallet_id,
+            'transaction_type': txn.transaction_type,
+            'amount': txn.amount,
+            'fee': txn.fee,
+            'currency': txn.currency,
+            'balance_before': txn.balance_before,
+            'balance_after': txn.balance_after,
+            'status': txn.status,
+            'recipient_wallet_id': txn.recipient_wallet_id,
+            'created_at': txn.created_at,
+        }
+    )
+
+
+class OutboxRelay:
+    """
+    Drains due events in id order. A batch is claimed with SELECT ... FOR
+    UPDATE SKIP LOCKED and leased by pushing next_attempt_at out, then
+    published one event at a time outside the transaction, so concurrent
+    relays take disjoint batches and no row lock is held while the broker
+    is called. A failing event is retried with exponential backoff and
+    dead-lettered after OUTBOX_MAX_ATTEMPTS without holding up the rest.
+    Delivery is at least once, and consumers must tolerate events from
+    parallel relays or retries arriving out of global order.
+    """
+
+    @staticmethod
+    def claim(batch_size=None):
+        """Lease up to batch_size due events to this relay; return them"""
+        batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+        now = timezone.now()
+        with transaction.atomic():
+            events = list(
+                OutboxEvent.objects.select_for_update(skip_locked=True)
+                .filter(published_at__isnull=True, dead_lettered_at__isnull=True, next_attempt_at__lte=now)
+                .order_by('id')[:batch_size]
+            )
+            OutboxEvent.objects.filter(id__in=[event.id for event in events]).update(
+                next_attempt_at=now + settings.OUTBOX_CLAIM_TIMEOUT
+            )
+        return events
+
+    @staticmethod
+    def retry_delay(attempts):
+        delay = settings.OUTBOX_RETRY_BASE_DELAY
+        for _ in range(attempts - 1):
+            if delay >= settings.OUTBOX_RETRY_MAX_DELAY:
+                break
+            delay *= 2
+        return min(delay, settings.OUTBOX_RETRY_MAX_DELAY)
+
+    @staticmethod
+    def relay_batch(batch_size=None, publisher=None):
+        """Claim and publish one batch; return (claimed, published)"""
+        publisher = publisher or get_publisher()
+        events = OutboxRelay.claim(batch_size)
+        published = 0
+        for event in events:
+            attempts = event.attempts + 1
+            try:
+                publisher.publish([event])
+            except Exception as exc:
+                now = timezone.now()
+                changes = {'attempts': attempts, 'last_error': str(exc)[:1000]}
+                if attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+                    logger.exception("Outbox event %s dead-lettered after %s attempts", event.id, attempts)
+                    changes['dead_lettered_at'] = now
+                else:
+                    logger.exception("Outbox publish failed for event %s", event.id)
+                    changes['next_attempt_at'] = now + OutboxRelay.retry_delay(attempts)
+                OutboxEvent.objects.filter(id=event.id).update(**changes)
+                continue
+            OutboxEvent.objects.filter(id=event.id).update(published_at=timezone.now(), attempts=attempts)
+            published += 1
+        return len(events), published
+
+    @staticmethod
+    def relay(batch_size=None, max_batches=None, publisher=None):
+        """Publish batches until nothing is due (or max_batches); return the number published"""
+        total = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            claimed, published = OutboxRelay.relay_batch(batch_size, publisher)
+            if not claimed:
+                break
+            total += published
+            batches += 1
+        return total
+
+    @staticmethod
+    def requeue(events):
+        """Make dead-lettered (or backed-off) events due again; return how many"""
+        return events.filter(published_at__isnull=True).update(
+            dead_lettered_at=None, attempts=0, last_error='', next_attempt_at=timezone.now()
+        )
+
+    @staticmethod
+    def purge_published(older_than=None):
+        """Delete events published before the retention window"""
+        cutoff = timezone.now() - (older_than or settings.OUTBOX_RETENTION)
+        deleted, _ = OutboxEvent.objects.filter(published_at__lt=cutoff).delete()
+        return deleted
@@ -0,0 +1,189 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Case, DecimalField, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import (
+    Wallet, WalletBalanceShard, Transaction, Posting, ReconciliationRun, ReconciliationPartition, BalanceDrift
+)
+from common.models import ArchiveEntry
+from common.constants import (
+    STATUS_COMPLETED, WALLET_CREDIT_TYPES, WALLET_DEBIT_TYPES,
+    RECONCILIATION_RUNNING, RECONCILIATION_COMPLETED, RECONCILIATION_FAILED
+)
+
+ZERO = Value(Decimal('0.00'), output_field=DecimalField(max_digits=15, decimal_places=2))
+
+
+def _init_worker():
+    """Process pool initializer: never reuse database connections inherited from the parent"""
+    import django
+    django.setup()
+    connections.close_all()
+
+
+def _run_partition(partition_id):
+    return ReconciliationService.reconcile_partition(partition_id)
+
+
+class ReconciliationService:
+    """
+    Compares every Wallet.balance with the net of its completed transactions
+    and with the sum of its ledger postings. Wallets are split into pk ranges
+    (partitions) that are checked independently, chunk by chunk, with the
+    aggregation done in the database; finished partitions are skipped when an
+    interrupted run is resumed.
+    """
+
+    @staticmethod
+    def plan(partition_size=None):
+        """Create a run with partitions of roughly partition_size wallets each"""
+        partition_size = partition_size or settings.RECONCILIATION_PARTITION_SIZE
+        # Walk the pk index, taking the first pk of each following partition as a boundary
+        starts = [None]
+        while True:
+            wallets = Wallet.objects.order_by('pk')
+            if starts[-1] is not None:
+                wallets = wallets.filter(pk__gte=starts[-1])
+            boundary = list(wallets.values_list('pk', flat=True)[partition_size:partition_size + 1])
+            if not boundary:
+                break
+            starts.append(boundary[0])
+        run = ReconciliationRun.objects.create(partitions_total=len(starts))
+        ReconciliationPartition.objects.bulk_create([
+            ReconciliationPartition(
+                run=run, index=index, start_id=start,
+                end_id=starts[index + 1] if index + 1 < len(starts) else None
+            )
+            for index, start in enumerate(starts)
+        ])
+        return run
+
+    @staticmethod
+    def resumable_run():
+        return ReconciliationRun.objects.filter(
+            status__in=[RECONCILIATION_RUNNING, RECONCILIATION_FAILED]
+        ).order_by('-created_at').first()
+
+    @staticmethod
+    def pending_partitions(run):
+        return list(
+            run.partitions.exclude(status=RECONCILIATION_COMPLETED).order_by('index').values_list('pk', flat=True)
+        )
+
+    @staticmethod
+    def annotated_wallets(wallets):
+        """Annotate wallets with current, transaction, ledger and last balance_after totals in one statement"""
+        completed = Transaction.objects.filter(wallet=OuterRef('pk'), status=STATUS_COMPLETED)
+        net = completed.order_by().values('wallet').annotate(total=Sum(Case(
+            When(transaction_type__in=WALLET_CREDIT_TYPES, then=F('amount')),
+            When(transaction_type__in=WALLET_DEBIT_TYPES, then=-F('amount') - F('fee')),
+            default=ZERO,
+        ))).values('total')
+        ledger = Posting.objects.filter(wallet=OuterRef('pk')).order_by().values('wallet').annotate(
+            total=Sum('amount')
+        ).values('total')
+        # Rows moved to cold storage keep their net effect in the archive manifest
+        archived = ArchiveEntry.objects.filter(
+            model_label='wallet.Transaction', owner_id=OuterRef('pk')
+        ).order_by().values('owner_id').annotate(total=Sum('net_amount')).values('total')
+        unfolded = WalletBalanceShard.objects.filter(wallet=OuterRef('pk')).order_by().values('wallet').annotate(
+            total=Sum('balance')
+        ).values('total')
+        return wallets.annotate(
+            # Wallet.balance plus credits not yet folded in from shard rows
+            current_balance=F('balance') + Coalesce(Subquery(unfolded), ZERO),
+            transaction_balance=Coalesce(Subquery(net), ZERO) + Coalesce(Subquery(archived), ZERO),
+            ledger_balance=Coalesce(Subquery(ledger), ZERO),
+            last_balance_after=Subquery(completed.order_by('-created_at', '-id').values('balance_after')[:1]),
+        )
+
+    @staticmethod
+    def reconcile_partition(partition_id, chunk_size=None):
+        """Check one partition; return (wallets_checked, drift_count)"""
+        chunk_size = chunk_size or settings.RECONCILIATION_CHUNK_SIZE
+        partition = ReconciliationPartition.objects.get(pk=partition_id)
+        ReconciliationPartition.objects.filter(pk=partition.pk).update(status=RECONCILIATION_RUNNING, error='')
+        BalanceDrift.objects.filter(partition=partition).delete()
+        checked = drift_count = 0
+        last_pk = None
+        try:
+            while True:
+                wallets = Wallet.objects.order_by('pk')
+                if partition.start_id is not None:
+                    wallets = wallets.filter(pk__gte=partition.start_id)
+                if partition.end_id is not None:
+                    wallets = wallets.filter(pk__lt=partition.end_id)
+                if last_pk is not None:
+                    wallets = wallets.filter(pk__gt=last_pk)
+                rows = list(ReconciliationService.annotated_wallets(wallets).values_list(
+                    'pk', 'current_balance', 'transaction_balance', 'ledger_balance', 'last_balance_after'
+                )[:chunk_size])
+                if not rows:
+                    break
+                drifts = [
+                    BalanceDrift(
+                        run_id=partition.run_id, partition=partition, wallet_id=pk, balance=balance,
+                        transaction_balance=txn_balance, ledger_balance=ledger_balance,
+                        last_balance_after=last_after, difference=balance - txn_balance
+                    )
+                    for pk, balance, txn_balance, ledger_balance, last_after in rows
+                    if balance != txn_balance or balance != ledger_balance
+                ]
+                BalanceDrift.objects.bulk_create(drifts)
+                checked += len(rows)
+                drift_count += len(drifts)
+                last_pk = rows[-1][0]
+        except Exception as exc:
+            ReconciliationPartition.objects.filter(pk=partition.pk).update(
+                status=RECONCILIATION_FAILED, error=str(exc)[:1000]
+            )
+            raise
+        ReconciliationPartition.objects.filter(pk=partition.pk).update(
+            status=RECONCILIATION_COMPLETED, wallets_checked=checked, drift_count=drift_count,
+            finished_at=timezone.now()
+        )
+        ReconciliationService.finish_run(partition.run_id)
+        return checked, drift_count
+
+    @staticmethod
+    def finish_run(run_id):
+        """Mark the run completed once every partition is"""
+        partitions = ReconciliationPartition.objects.filter(run_id=run_id)
+        if partitions.exclude(status=RECONCILIATION_COMPLETED).exists():
+            return False
+        totals = partitions.aggregate(checked=Sum('wallets_checked'), drifts=Sum('drift_count'))
+        ReconciliationRun.objects.filter(pk=run_id).exclude(status=RECONCILIATION_COMPLETED).update(
+            status=RECONCILIATION_COMPLETED,
+            wallets_checked=totals['checked'] or 0,
+            drift_count=totals['drifts'] or 0,
+            finished_at=timezone.now()
+        )
+        return True
+
+    @staticmethod
+    def run(workers=None, resume=True, partition_size=None):
+        """Reconcile all wallets, resuming the last unfinished run unless resume is False"""
+        workers = workers or settings.RECONCILIATION_WORKERS or os.cpu_count()
+        run = (resume and ReconciliationService.resumable_run()) or ReconciliationService.plan(partition_size)
+        ReconciliationRun.objects.filter(pk=run.pk).update(status=RECONCILIATION_RUNNING)
+        pending = ReconciliationService.pending_partitions(run)
+        try:
+            if workers <= 1 or len(pending) <= 1:
+                for partition_id in pending:
+                    ReconciliationService.reconcile_partition(partition_id)
+            else:
+                connections.close_all()
+                with ProcessPoolExecutor(max_workers=min(workers, len(pending)), initializer=_init_worker) as pool:
+                    list(pool.map(_run_partition, pending))
+        except Exception:
+            ReconciliationRun.objects.filter(pk=run.pk).update(status=RECONCILIATION_FAILED)
+            raise
+        ReconciliationService.finish_run(run.pk)
+        run.refresh_from_db()
+        return run
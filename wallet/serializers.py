@@ -1,10 +1,18 @@
 ﻿from rest_framework import serializers
+from django.conf import settings
 from decimal import Decimal
-from .models import Wallet, Transaction, TransferLimit, FeeConfiguration
+from .models import Wallet, Transaction, TransferLimit, FeeConfiguration, Statement, StandingOrder, WalletHold
 from core.models import User
+from core.serializers import PinAuthorizedSerializer
+from common.constants import FREQUENCY_CHOICES
 
 class WalletSerializer(serializers.ModelSerializer):
     user_email = serializers.EmailField(source='user.email', read_only=True)
+    # Include credits still on shard rows; see BalanceService.with_unfolded_balance
+    balance = serializers.DecimalField(source='total_balance', max_digits=15, decimal_places=2, read_only=True)
+    available_balance = serializers.DecimalField(
+        source='total_available_balance', max_digits=15, decimal_places=2, read_only=True
+    )
     
     class Meta:
         model = Wallet
@@ -23,12 +31,21 @@ class TransactionSerializer(serializers.ModelSerializer):
                   'reference', 'description', 'recipient_email', 'metadata', 'created_at']
         read_only_fields = ['id', 'balance_before', 'balance_after', 'reference', 'created_at']
 
-class TransferSerializer(serializers.Serializer):
+class StatementSerializer(serializers.ModelSerializer):
+    wallet_currency = serializers.CharField(source='wallet.currency', read_only=True)
+    
+    class Meta:
+        model = Statement
+        fields = ['id', 'wallet', 'wallet_currency', 'period_start', 'opening_balance', 'closing_balance',
+                  'total_credits', 'total_debits', 'transaction_count', 'created_at']
+        read_only_fields = fields
+
+class TransferSerializer(PinAuthorizedSerializer):
     recipient_email = serializers.EmailField(required=True)
     amount = serializers.DecimalField(max_digits=15, decimal_places=2, required=True)
     currency = serializers.CharField(max_length=3, default='USD')
     description = serializers.CharField(required=False, allow_blank=True)
-    pin = serializers.CharField(write_only=True, required=True, min_length=4, max_length=4)
+    settle_async = serializers.BooleanField(default=False)
     
     def validate_amount(self, value):
         if value <= 0:
@@ -43,6 +60,56 @@ class TransferSerializer(serializers.Serializer):
             raise serializers.ValidationError("Cannot transfer to yourself")
         return value
 
+class BatchTransferItemSerializer(serializers.Serializer):
+    recipient_email = serializers.EmailField(required=True)
+    amount = serializers.DecimalField(max_digits=15, decimal_places=2, required=True)
+    description = serializers.CharField(required=False, allow_blank=True)
+    
+    def validate_amount(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("Amount must be greater than zero")
+        return value
+
+class BatchTransferSerializer(PinAuthorizedSerializer):
+    transfers = BatchTransferItemSerializer(
+        many=True, allow_empty=False, max_length=settings.BATCH_TRANSFER_MAX_ITEMS
+    )
+    currency = serializers.CharField(max_length=3, default='USD')
+    description = serializers.CharField(required=False, allow_blank=True)
+
+class StandingOrderSerializer(serializers.ModelSerializer):
+    wallet_currency = serializers.CharField(source='wallet.currency', read_only=True)
+    
+    class Meta:
+        model = StandingOrder
+        fields = ['id', 'wallet', 'wallet_currency', 'recipient_email', 'amount', 'description', 'frequency',
+                  'first_run_at', 'next_run_at', 'end_date', 'is_active', 'last_run_at', 'last_status',
+                  'last_error', 'last_reference', 'created_at']
+        read_only_fields = fields
+
+class WalletHoldSerializer(serializers.ModelSerializer):
+    wallet_currency = serializers.CharField(source='wallet.currency', read_only=True)
+    
+    class Meta:
+        model = WalletHold
+        fields = ['id', 'wallet', 'wallet_currency', 'amount', 'captured_amount', 'status', 'reference',
+                  'description', 'expires_at', 'resolved_at', 'transaction', 'created_at']
+        read_only_fields = fields
+
+class CreateStandingOrderSerializer(PinAuthorizedSerializer):
+    recipient_email = serializers.EmailField(required=True)
+    amount = serializers.DecimalField(max_digits=15, decimal_places=2, required=True)
+    currency = serializers.CharField(max_length=3, default='USD')
+    frequency = serializers.ChoiceField(choices=FREQUENCY_CHOICES)
+    first_run_at = serializers.DateTimeField(required=False)
+    end_date = serializers.DateField(required=False, allow_null=True)
+    description = serializers.CharField(required=False, allow_blank=True, max_length=255)
+    
+    def validate_amount(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("Amount must be greater than zero")
+        return value
+
 class DepositSerializer(serializers.Serializer):
     amount = serializers.DecimalField(max_digits=15, decimal_places=2, required=True)
     currency = serializers.CharField(max_length=3, default='USD')
@@ -53,11 +120,10 @@ class DepositSerializer(serializers.Serializer):
             raise serializers.ValidationError("Amount must be greater than zero")
         return value
 
-class WithdrawSerializer(serializers.Serializer):
+class WithdrawSerializer(PinAuthorizedSerializer):
     amount = serializers.DecimalField(max_digits=15, decimal_places=2, required=True)
     currency = serializers.CharField(max_length=3, default='USD')
     description = serializers.CharField(required=False, allow_blank=True)
-    pin = serializers.CharField(write_only=True, required=True, min_length=4, max_length=4)
     
     def validate_amount(self, value):
         if value <= 0:
@@ -91,3 +157,6 @@ class FeeConfigurationSerializer(serializers.ModelSerializer):
 class CalculateFeeSerializer(serializers.Serializer):
     transaction_type = serializers.CharField(required=True)
     amount = serializers.DecimalField(max_digits=15, decimal_places=2, required=True)
+
+class BatchCalculateFeeSerializer(serializers.Serializer):
+    quotes = CalculateFeeSerializer(many=True, allow_empty=False, max_length=settings.FEE_QUOTE_MAX_ITEMS)
@@ -1,13 +1,35 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import transaction, models
+from django.db.models import F, Max, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, Greatest
 from django.utils import timezone
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
 from decimal import Decimal
-import uuid
-from .models import Wallet, Transaction, TransferLimit, FeeConfiguration
+import csv
+import heapq
+import json
+import random
+import zlib
+from .models import Wallet, WalletBalanceShard, Transaction, TransferLimit, JournalEntry, Posting, BalanceCheckpoint, ExchangeRate, OutboxEvent
+from .fees import FeeSchedule
+from .limits import get_limit_backend
+from .fx import FX_BASE_CURRENCY, RateCache, get_rate_provider
+from .snapshots import BalanceSnapshotCache
+from .outbox import transaction_event
 from notifications.services import NotificationService
 from core.models import User
+from core.pin import PinService, PIN_SCOPE_TRANSFER, PIN_SCOPE_WITHDRAW
+from common.archive import ArchiveService
+from common.ids import time_ordered_reference
+from common.db import retry_on_conflict
 from common.constants import (
     TRANSACTION_TRANSFER, TRANSACTION_DEPOSIT, TRANSACTION_WITHDRAWAL,
-    STATUS_COMPLETED, STATUS_FAILED, STATUS_PENDING
+    STATUS_COMPLETED, STATUS_FAILED, STATUS_PENDING,
+    LEDGER_ACCOUNT_WALLET, LEDGER_ACCOUNT_EXTERNAL, LEDGER_ACCOUNT_FEE_INCOME,
+    WALLET_CREDIT_TYPES, WALLET_DEBIT_TYPES
 )
 
 class WalletService:
@@ -32,34 +54,295 @@ class WalletService:
             'currency': wallet.currency
         }
 
+class BalanceService:
+    """
+    Row-locked, conditional balance updates. Callers must run inside an atomic
+    block: lock every wallet they touch first, then apply debits/credits.
+    Wallets with shard_count > 0 take credits on WalletBalanceShard rows, so
+    deposits into one hot wallet do not queue on its row; locking a sharded
+    wallet folds the shards back in so debits always see the full balance.
+    """
+    @staticmethod
+    def lock_wallets(*wallets, credit_only=()):
+        """
+        Lock wallet rows in primary-key order and refresh the given instances.
+        Sharded wallets in credit_only are neither locked nor refreshed: their
+        credits go to shard rows and record no running balance.
+        """
+        unlocked = {wallet.pk for wallet in credit_only if wallet.shard_count}
+        ids = {wallet.pk for wallet in wallets} - unlocked
+        current = {
+            w.pk: w for w in Wallet.objects.select_for_update().filter(pk__in=ids).order_by('pk')
+        }
+        BalanceService.fold(*[w for w in current.values() if w.shard_count])
+        for wallet in wallets:
+            if wallet.pk in current:
+                wallet.balance = current[wallet.pk].balance
+                wallet.available_balance = current[wallet.pk].available_balance
+        return wallets
+    
+    @staticmethod
+    def with_unfolded_balance(wallets):
+        """Annotate a Wallet queryset with unfolded_balance, the credits still sitting on shard rows"""
+        unfolded = WalletBalanceShard.objects.filter(wallet=OuterRef('pk')).order_by().values('wallet').annotate(
+            total=Sum('balance')
+        ).values('total')
+        return wallets.annotate(unfolded_balance=Coalesce(
+            Subquery(unfolded), models.Value(Decimal('0.00')), output_field=models.DecimalField()
+        ))
+    
+    @staticmethod
+    def fold(*wallets):
+        """Move shard balances onto the wallet rows; the caller must hold the wallet row locks"""
+        if not wallets:
+            return
+        shards = list(
+            WalletBalanceShard.objects.select_for_update().filter(wallet__in=wallets).order_by('wallet', 'index')
+        )
+        totals = {}
+        for shard in shards:
+            if shard.balance:
+                totals[shard.wallet_id] = totals.get(shard.wallet_id, Decimal('0.00')) + shard.balance
+        if not totals:
+            return
+        now = timezone.now()
+        WalletBalanceShard.objects.filter(wallet__in=list(totals)).update(balance=Decimal('0.00'), updated_at=now)
+        for wallet in wallets:
+            amount = totals.get(wallet.pk)
+            if amount:
+                Wallet.objects.filter(pk=wallet.pk).update(
+                    balance=F('balance') + amount,
+                    available_balance=F('available_balance') + amount,
+                    updated_at=now
+                )
+                wallet.balance += amount
+                wallet.available_balance += amount
+    
+    @staticmethod
+    def _update_available(wallet, amount, **changes):
+        """Conditional UPDATE on available_balance; a sharded wallet folds and tries once more"""
+        def attempt():
+            return Wallet.objects.filter(pk=wallet.pk, available_balance__gte=amount).update(
+                updated_at=timezone.now(), **changes
+            )
+        if attempt():
+            return True
+        if wallet.shard_count:
+            BalanceService.lock_wallets(wallet)
+            return bool(attempt())
+        return False
+    
+    @staticmethod
+    def debit(wallet, amount):
+        if not BalanceService._update_available(
+            wallet, amount, balance=F('balance') - amount, available_balance=F('available_balance') - amount
+        ):
+            raise ValueError("Insufficient balance")
+        BalanceSnapshotCache.invalidate_on_commit(wallet.user_id)
+        wallet.balance -= amount
+        wallet.available_balance -= amount
+        return wallet
+    
+    @staticmethod
+    def credit(wallet, amount, key=None):
+        """Credit the wallet row, or for a sharded wallet the shard picked by hashing `key`"""
+        now = timezone.now()
+        updated = 0
+        if wallet.shard_count:
+            index = (zlib.crc32(key.encode()) if key else random.getrandbits(32)) % wallet.shard_count
+            # Zero rows means the shard was removed concurrently; fall back to the wallet row
+            updated = WalletBalanceShard.objects.filter(wallet_id=wallet.pk, index=index).update(
+                balance=F('balance') + amount, updated_at=now
+            )
+        if not updated:
+            Wallet.objects.filter(pk=wallet.pk).update(
+                balance=F('balance') + amount,
+                available_balance=F('available_balance') + amount,
+                updated_at=now
+            )
+        BalanceSnapshotCache.invalidate_on_commit(wallet.user_id)
+        wallet.balance += amount
+        wallet.available_balance += amount
+        return wallet
+    
+    @staticmethod
+    def hold(wallet, amount):
+        """Reserve funds: available_balance only, in one conditional UPDATE"""
+        if not BalanceService._update_available(wallet, amount, available_balance=F('available_balance') - amount):
+            raise ValueError("Insufficient balance")
+        BalanceSnapshotCache.invalidate_on_commit(wallet.user_id)
+        wallet.available_balance -= amount
+        return wallet
+    
+    @staticmethod
+    def release(wallet, amount):
+        Wallet.objects.filter(pk=wallet.pk).update(
+            available_balance=F('available_balance') + amount,
+            updated_at=timezone.now()
+        )
+        BalanceSnapshotCache.invalidate_on_commit(wallet.user_id)
+        wallet.available_balance += amount
+        return wallet
+
+class LedgerService:
+    """
+    Double-entry journal. Every money movement posts one balanced entry;
+    Wallet.balance is the running projection of the wallet's postings and
+    BalanceCheckpoint rows snapshot it periodically for point-in-time reads.
+    """
+    @staticmethod
+    def wallet_leg(wallet, amount):
+        return (LEDGER_ACCOUNT_WALLET, wallet, wallet.currency, amount)
+    
+    @staticmethod
+    def account_leg(account, currency, amount):
+        return (account, None, currency, amount)
+    
+    @staticmethod
+    def build_entry(entry_type, reference, legs, description='', metadata=None):
+        """Return an unsaved (entry, postings) pair; legs are (account, wallet, currency, amount)"""
+        totals = {}
+        for _, _, currency, amount in legs:
+            totals[currency] = totals.get(currency, Decimal('0.00')) + amount
+        if any(totals.values()):
+            raise ValueError(f"Unbalanced journal entry {reference}: {totals}")
+        entry = JournalEntry(
+            entry_type=entry_type,
+            reference=reference,
+            description=description or '',
+            metadata=metadata or {}
+        )
+        now = timezone.now()
+        postings = [
+            Posting(entry=entry, account=account, wallet=wallet, currency=currency, amount=amount, created_at=now)
+            for account, wallet, currency, amount in legs if amount
+        ]
+        return entry, postings
+    
+    @staticmethod
+    def post(*entries):
+        """Insert built entries and all of their postings as two multi-row INSERTs"""
+        JournalEntry.objects.bulk_create([entry for entry, _ in entries], batch_size=1000)
+        Posting.objects.bulk_create(
+            [posting for _, postings in entries for posting in postings], batch_size=1000
+        )
+        return [entry for entry, _ in entries]
+    
+    @staticmethod
+    def record(entry_type, reference, legs, description='', metadata=None):
+        entry = LedgerService.build_entry(entry_type, reference, legs, description, metadata)
+        return LedgerService.post(entry)[0]
+    
+    @staticmethod
+    def balance_at(wallet, at):
+        """Wallet balance at a point in time: nearest checkpoint plus a range scan of later postings"""
+        balance = Decimal('0.00')
+        postings = Posting.objects.filter(wallet=wallet, created_at__lte=at)
+        checkpoint = BalanceCheckpoint.objects.filter(wallet=wallet, as_of__lte=at).order_by('-as_of').first()
+        if checkpoint:
+            balance = checkpoint.balance
+            postings = postings.filter(created_at__gt=checkpoint.as_of)
+        return balance + (postings.aggregate(total=Sum('amount'))['total'] or Decimal('0.00'))
+    
+    @staticmethod
+    def checkpoint_balances(as_of=None, chunk_size=1000):
+        """
+        Write a checkpoint for every wallet with postings since the previous
+        run. as_of trails now by LEDGER_CHECKPOINT_LAG so transactions still in
+        flight cannot commit postings behind the checkpoint.
+        """
+        if as_of is None:
+            as_of = timezone.now() - getattr(settings, 'LEDGER_CHECKPOINT_LAG', timedelta(minutes=5))
+        previous = BalanceCheckpoint.objects.aggregate(last=Max('as_of'))['last']
+        if previous and previous >= as_of:
+            return 0
+        postings = Posting.objects.filter(wallet__isnull=False, created_at__lte=as_of)
+        if previous:
+            postings = postings.filter(created_at__gt=previous)
+        deltas = dict(
+            postings.values('wallet_id').annotate(total=Sum('amount')).values_list('wallet_id', 'total')
+        )
+        wallet_ids = list(deltas)
+        created = 0
+        for start in range(0, len(wallet_ids), chunk_size):
+            chunk = wallet_ids[start:start + chunk_size]
+            last_balances = Wallet.objects.filter(pk__in=chunk).annotate(
+                last_balance=Subquery(
+                    BalanceCheckpoint.objects.filter(wallet=OuterRef('pk')).order_by('-as_of').values('balance')[:1]
+                )
+            ).values_list('pk', 'last_balance')
+            checkpoints = [
+                BalanceCheckpoint(wallet_id=wallet_id, balance=(last or Decimal('0.00')) + deltas[wallet_id], as_of=as_of)
+                for wallet_id, last in last_balances
+            ]
+            BalanceCheckpoint.objects.bulk_create(checkpoints)
+            created += len(checkpoints)
+        return created
+
 class TransactionService:
     @staticmethod
     def generate_reference():
-        return f"TXN-{uuid.uuid4().hex[:12].upper()}"
+        return time_ordered_reference('TXN')
+    
+    @staticmethod
+    def get_fee_configuration(transaction_type):
+        return FeeSchedule.get(transaction_type)
     
     @staticmethod
     def calculate_fee(transaction_type, amount):
-        try:
-            fee_config = FeeConfiguration.objects.get(
-                transaction_type=transaction_type,
-                is_active=True
-            )
-            return fee_config.calculate_fee(amount)
-        except FeeConfiguration.DoesNotExist:
+        fee_config = TransactionService.get_fee_configuration(transaction_type)
+        if fee_config is None:
             return Decimal('0.00')
+        return fee_config.calculate_fee(amount)
+    
+    @staticmethod
+    def calculate_fees(quotes):
+        """Fees for a list of (transaction_type, amount) pairs, in order, from one schedule lookup"""
+        schedule = FeeSchedule.configurations()
+        positions = {}
+        for index, (transaction_type, amount) in enumerate(quotes):
+            positions.setdefault(transaction_type, []).append(index)
+        fees = [Decimal('0.00')] * len(quotes)
+        for transaction_type, indexes in positions.items():
+            fee_config = schedule.get(transaction_type)
+            if fee_config is None:
+                continue
+            for index, fee in zip(indexes, fee_config.calculate_fees([quotes[i][1] for i in indexes])):
+                fees[index] = fee
+        return fees
     
     @staticmethod
     @transaction.atomic
     def create_transaction(wallet, transaction_type, amount, **kwargs):
+        txn = TransactionService.build_transaction(wallet, transaction_type, amount, **kwargs)
+        txn.save(force_insert=True)
+        transaction_event(txn).save(force_insert=True)
+        return txn
+    
+    @staticmethod
+    def save_transactions(transactions, batch_size=1000):
+        """Bulk insert built transactions with their outbox events; call inside the atomic block"""
+        Transaction.objects.bulk_create(transactions, batch_size=batch_size)
+        OutboxEvent.objects.bulk_create([transaction_event(txn) for txn in transactions], batch_size=batch_size)
+        return transactions
+    
+    @staticmethod
+    def build_transaction(wallet, transaction_type, amount, **kwargs):
+        """
+        Build an unsaved Transaction against the wallet's current in-memory
+        balance. Credits to a sharded wallet record no running balance.
+        """
         fee = kwargs.get('fee', Decimal('0.00'))
         balance_before = wallet.balance
-        if transaction_type in [TRANSACTION_DEPOSIT, 'LOAN_DISBURSEMENT', 'INTEREST_CREDIT']:
+        if transaction_type in WALLET_CREDIT_TYPES and wallet.shard_count:
+            balance_before = balance_after = None
+        elif transaction_type in WALLET_CREDIT_TYPES:
             balance_after = balance_before + amount
-        elif transaction_type in [TRANSACTION_WITHDRAWAL, TRANSACTION_TRANSFER, 'LOAN_REPAYMENT', 'SAVINGS_DEPOSIT']:
+        elif transaction_type in WALLET_DEBIT_TYPES:
             balance_after = balance_before - (amount + fee)
         else:
             balance_after = balance_before
-        txn = Transaction.objects.create(
+        return Transaction(
             wallet=wallet,
             transaction_type=transaction_type,
             amount=amount,
@@ -74,13 +357,14 @@ class TransactionService:
             status=kwargs.get('status', STATUS_PENDING),
             metadata=kwargs.get('metadata', {})
         )
-        return txn
     
     @staticmethod
+    @retry_on_conflict
     @transaction.atomic
     def deposit(wallet, amount, description=''):
         if amount <= 0:
             raise ValueError("Deposit amount must be greater than zero")
+        BalanceService.lock_wallets(wallet, credit_only=[wallet])
         txn = TransactionService.create_transaction(
             wallet=wallet,
             transaction_type=TRANSACTION_DEPOSIT,
@@ -88,25 +372,29 @@ class TransactionService:
             description=description,
             status=STATUS_COMPLETED
         )
-        wallet.balance += amount
-        wallet.available_balance += amount
-        wallet.save()
-        NotificationService.send_transaction_notification(
-            user=wallet.user,
-            transaction=txn,
-            notification_type='DEPOSIT'
-        )
+        BalanceService.credit(wallet, amount, key=txn.reference)
+        LedgerService.record(TRANSACTION_DEPOSIT, txn.reference, [
+            LedgerService.wallet_leg(wallet, amount),
+            LedgerService.account_leg(LEDGER_ACCOUNT_EXTERNAL, wallet.currency, -amount),
+        ], description=txn.description)
+        NotificationService.enqueue_transaction_notifications([(wallet.user, txn, 'DEPOSIT')])
         return txn
     
     @staticmethod
+    def withdraw(wallet, amount, pin=None, description='', pin_token=None):
+        # PIN hashing happens before any transaction or row lock is taken
+        PinService.verify(wallet.user, PIN_SCOPE_WITHDRAW, pin, pin_token)
+        return TransactionService._withdraw(wallet, amount, description)
+    
+    @staticmethod
+    @retry_on_conflict
     @transaction.atomic
-    def withdraw(wallet, amount, pin, description=''):
+    def _withdraw(wallet, amount, description=''):
         if amount <= 0:
             raise ValueError("Withdrawal amount must be greater than zero")
-        if not wallet.user.check_pin(pin):
-            raise ValueError("Invalid PIN")
         fee = TransactionService.calculate_fee(TRANSACTION_WITHDRAWAL, amount)
         total_deduction = amount + fee
+        BalanceService.lock_wallets(wallet)
         if wallet.available_balance < total_deduction:
             raise ValueError("Insufficient balance")
         txn = TransactionService.create_transaction(
@@ -117,23 +405,26 @@ class TransactionService:
             description=description,
             status=STATUS_COMPLETED
         )
-        wallet.balance -= total_deduction
-        wallet.available_balance -= total_deduction
-        wallet.save()
-        NotificationService.send_transaction_notification(
-            user=wallet.user,
-            transaction=txn,
-            notification_type='WITHDRAWAL'
-        )
+        BalanceService.debit(wallet, total_deduction)
+        LedgerService.record(TRANSACTION_WITHDRAWAL, txn.reference, [
+            LedgerService.wallet_leg(wallet, -total_deduction),
+            LedgerService.account_leg(LEDGER_ACCOUNT_EXTERNAL, wallet.currency, amount),
+            LedgerService.account_leg(LEDGER_ACCOUNT_FEE_INCOME, wallet.currency, fee),
+        ], description=txn.description)
+        NotificationService.enqueue_transaction_notifications([(wallet.user, txn, 'WITHDRAWAL')])
         return txn
     
     @staticmethod
+    def transfer(sender_wallet, recipient_email, amount, pin=None, description='', pin_token=None):
+        PinService.verify(sender_wallet.user, PIN_SCOPE_TRANSFER, pin, pin_token)
+        return TransactionService._transfer(sender_wallet, recipient_email, amount, description)
+    
+    @staticmethod
+    @retry_on_conflict
     @transaction.atomic
-    def transfer(sender_wallet, recipient_email, amount, pin, description=''):
+    def _transfer(sender_wallet, recipient_email, amount, description=''):
         if amount <= 0:
             raise ValueError("Transfer amount must be greater than zero")
-        if not sender_wallet.user.check_pin(pin):
-            raise ValueError("Invalid PIN")
         try:
             recipient_user = User.objects.get(email=recipient_email)
         except User.DoesNotExist:
@@ -146,48 +437,198 @@ class TransactionService:
         )
         fee = TransactionService.calculate_fee(TRANSACTION_TRANSFER, amount)
         total_deduction = amount + fee
+        BalanceService.lock_wallets(sender_wallet, recipient_wallet, credit_only=[recipient_wallet])
         if sender_wallet.available_balance < total_deduction:
             raise ValueError("Insufficient balance")
-        TransferLimitService.check_and_update_limits(sender_wallet.user, amount)
-        sender_txn = TransactionService.create_transaction(
-            wallet=sender_wallet,
-            transaction_type=TRANSACTION_TRANSFER,
-            amount=amount,
-            fee=fee,
-            description=description or f"Transfer to {recipient_email}",
-            recipient_wallet=recipient_wallet,
-            recipient_email=recipient_email,
-            status=STATUS_COMPLETED
-        )
-        sender_wallet.balance -= total_deduction
-        sender_wallet.available_balance -= total_deduction
-        sender_wallet.save()
-        recipient_txn = TransactionService.create_transaction(
-            wallet=recipient_wallet,
-            transaction_type=TRANSACTION_DEPOSIT,
-            amount=amount,
-            description=description or f"Transfer from {sender_wallet.user.email}",
-            recipient_email=sender_wallet.user.email,
-            status=STATUS_COMPLETED
-        )
-        recipient_wallet.balance += amount
-        recipient_wallet.available_balance += amount
-        recipient_wallet.save()
-        NotificationService.send_transaction_notification(
-            user=sender_wallet.user,
-            transaction=sender_txn,
-            notification_type='TRANSFER'
-        )
-        NotificationService.send_transaction_notification(
-            user=recipient_user,
-            transaction=recipient_txn,
-            notification_type='DEPOSIT'
-        )
+        with TransferLimitService.reserve(sender_wallet.user, [amount]) as limit_errors:
+            if limit_errors[0]:
+                raise ValueError(limit_errors[0])
+            sender_txn = TransactionService.build_transaction(
+                wallet=sender_wallet,
+                transaction_type=TRANSACTION_TRANSFER,
+                amount=amount,
+                fee=fee,
+                description=description or f"Transfer to {recipient_email}",
+                recipient_wallet=recipient_wallet,
+                recipient_email=recipient_email,
+                status=STATUS_COMPLETED
+            )
+            recipient_txn = TransactionService.build_transaction(
+                wallet=recipient_wallet,
+                transaction_type=TRANSACTION_DEPOSIT,
+                amount=amount,
+                description=description or f"Transfer from {sender_wallet.user.email}",
+                recipient_email=sender_wallet.user.email,
+                status=STATUS_COMPLETED
+            )
+            TransactionService.save_transactions([sender_txn, recipient_txn])
+            BalanceService.debit(sender_wallet, total_deduction)
+            BalanceService.credit(recipient_wallet, amount, key=sender_txn.reference)
+            LedgerService.post(TransactionService.build_transfer_entry(sender_txn, recipient_wallet, amount, fee))
+            NotificationService.enqueue_transaction_notifications([
+                (sender_wallet.user, sender_txn, 'TRANSFER'),
+                (recipient_user, recipient_txn, 'DEPOSIT'),
+            ])
         return sender_txn
 
+    @staticmethod
+    def build_transfer_entry(sender_txn, recipient_wallet, amount, fee):
+        sender_wallet = sender_txn.wallet
+        return LedgerService.build_entry(TRANSACTION_TRANSFER, sender_txn.reference, [
+            LedgerService.wallet_leg(sender_wallet, -(amount + fee)),
+            LedgerService.wallet_leg(recipient_wallet, amount),
+            LedgerService.account_leg(LEDGER_ACCOUNT_FEE_INCOME, sender_wallet.currency, fee),
+        ], description=sender_txn.description)
+    
+    @staticmethod
+    def batch_transfer(sender_wallet, transfers, pin=None, description='', pin_token=None):
+        """
+        Pay many recipients from one wallet in a single transaction.
+        `transfers` is a list of dicts with recipient_email, amount and an
+        optional description. Items that cannot be paid are reported as failed
+        without aborting the rest of the batch.
+        """
+        PinService.verify(sender_wallet.user, PIN_SCOPE_TRANSFER, pin, pin_token)
+        return TransactionService._batch_transfer(sender_wallet, transfers, description)
+    
+    @staticmethod
+    @retry_on_conflict
+    @transaction.atomic
+    def _batch_transfer(sender_wallet, transfers, description=''):
+        sender = sender_wallet.user
+        
+        emails = {item['recipient_email'] for item in transfers}
+        recipients = {u.email: u for u in User.objects.filter(email__in=emails).only('id', 'email')}
+        recipient_ids = [u.pk for u in recipients.values() if u.pk != sender.pk]
+        currency = sender_wallet.currency
+        wallets = {
+            w.user_id: w for w in Wallet.objects.filter(user_id__in=recipient_ids, currency=currency)
+        }
+        missing = [uid for uid in recipient_ids if uid not in wallets]
+        if missing:
+            Wallet.objects.bulk_create(
+                [Wallet(user_id=uid, currency=currency, is_primary=currency == 'USD') for uid in missing],
+                ignore_conflicts=True
+            )
+            wallets.update(
+                (w.user_id, w) for w in Wallet.objects.filter(user_id__in=missing, currency=currency)
+            )
+        
+        fee_config = TransactionService.get_fee_configuration(TRANSACTION_TRANSFER)
+        BalanceService.lock_wallets(sender_wallet, *wallets.values())
+        
+        # First pass: everything except limits, so limits are consumed in one round trip
+        checks = []
+        available = sender_wallet.available_balance
+        for item in transfers:
+            amount = item['amount']
+            recipient = recipients.get(item['recipient_email'])
+            fee = fee_config.calculate_fee(amount) if fee_config else Decimal('0.00')
+            error = None
+            if amount <= 0:
+                error = "Transfer amount must be greater than zero"
+            elif recipient is None:
+                error = "Recipient not found"
+            elif recipient.pk == sender.pk:
+                error = "Cannot transfer to yourself"
+            elif available < amount + fee:
+                error = "Insufficient balance"
+            else:
+                available -= amount + fee
+            checks.append((recipient, fee, error))
+        candidates = [i for i, (_, _, error) in enumerate(checks) if error is None]
+        with TransferLimitService.reserve(sender, [transfers[i]['amount'] for i in candidates]) as limit_errors:
+            for i, error in zip(candidates, limit_errors):
+                if error:
+                    recipient, fee, _ = checks[i]
+                    checks[i] = (recipient, fee, error)
+            return TransactionService._apply_batch_transfer(
+                sender_wallet, transfers, checks, wallets, description
+            )
+    
+    @staticmethod
+    def _apply_batch_transfer(sender_wallet, transfers, checks, wallets, description):
+        sender = sender_wallet.user
+        results = []
+        transactions = []
+        entries = []
+        events = []
+        touched = {}
+        now = timezone.now()
+        for index, (item, (recipient, fee, error)) in enumerate(zip(transfers, checks)):
+            recipient_email = item['recipient_email']
+            amount = item['amount']
+            total_deduction = amount + fee
+            if error:
+                results.append({
+                    'index': index, 'recipient_email': recipient_email, 'amount': amount,
+                    'status': STATUS_FAILED, 'error': error
+                })
+                continue
+            
+            recipient_wallet = wallets[recipient.pk]
+            item_description = item.get('description') or description
+            sender_txn = TransactionService.build_transaction(
+                wallet=sender_wallet,
+                transaction_type=TRANSACTION_TRANSFER,
+                amount=amount,
+                fee=fee,
+                description=item_description or f"Transfer to {recipient_email}",
+                recipient_wallet=recipient_wallet,
+                recipient_email=recipient_email,
+                status=STATUS_COMPLETED
+            )
+            recipient_txn = TransactionService.build_transaction(
+                wallet=recipient_wallet,
+                transaction_type=TRANSACTION_DEPOSIT,
+                amount=amount,
+                description=item_description or f"Transfer from {sender.email}",
+                recipient_email=sender.email,
+                status=STATUS_COMPLETED
+            )
+            sender_wallet.balance -= total_deduction
+            sender_wallet.available_balance -= total_deduction
+            recipient_wallet.balance += amount
+            recipient_wallet.available_balance += amount
+            recipient_wallet.updated_at = now
+            touched[recipient_wallet.pk] = recipient_wallet
+            
+            transactions.extend([sender_txn, recipient_txn])
+            entries.append(TransactionService.build_transfer_entry(sender_txn, recipient_wallet, amount, fee))
+            events.append((sender, sender_txn, 'TRANSFER'))
+            events.append((recipient, recipient_txn, 'DEPOSIT'))
+            results.append({
+                'index': index, 'recipient_email': recipient_email, 'amount': amount, 'fee': fee,
+                'status': STATUS_COMPLETED, 'reference': sender_txn.reference,
+                'transaction_id': sender_txn.id
+            })
+        
+        if transactions:
+            sender_wallet.updated_at = now
+            TransactionService.save_transactions(transactions)
+            Wallet.objects.bulk_update(
+                [sender_wallet, *touched.values()],
+                ['balance', 'available_balance', 'updated_at'],
+                batch_size=500
+            )
+            BalanceSnapshotCache.invalidate_on_commit(sender.pk, *(w.user_id for w in touched.values()))
+            LedgerService.post(*entries)
+            NotificationService.enqueue_transaction_notifications(events)
+        
+        succeeded = [r for r in results if r['status'] == STATUS_COMPLETED]
+        return {
+            'total': len(results),
+            'succeeded': len(succeeded),
+            'failed': len(results) - len(succeeded),
+            'total_amount': sum((r['amount'] for r in succeeded), Decimal('0.00')),
+            'total_fees': sum((r['fee'] for r in succeeded), Decimal('0.00')),
+            'results': results
+        }
+
 class TransferLimitService:
     @staticmethod
-    def get_or_create_limit(user):
+    def get_or_create_limit(user, for_update=False):
+        """The user's TransferLimit row with usage reset for a new day or month; for_update locks it"""
         limit, created = TransferLimit.objects.get_or_create(
             user=user,
             defaults={
@@ -195,24 +636,202 @@ class TransferLimitService:
                 'monthly_limit': user.monthly_transfer_limit
             }
         )
-        if limit.last_reset_date < timezone.now().date():
+        if for_update and not created:
+            limit = TransferLimit.objects.select_for_update().get(pk=limit.pk)
+        today = timezone.now().date()
+        if limit.last_reset_date < today:
             limit.daily_used = Decimal('0.00')
-            limit.last_reset_date = timezone.now().date()
-            limit.save()
-        if timezone.now().day == 1 and limit.monthly_used > 0:
-            limit.monthly_used = Decimal('0.00')
-            limit.save()
+            if (limit.last_reset_date.year, limit.last_reset_date.month) != (today.year, today.month):
+                limit.monthly_used = Decimal('0.00')
+            limit.last_reset_date = today
+            limit.save(update_fields=['daily_used', 'monthly_used', 'last_reset_date', 'updated_at'])
         return limit
     
     @staticmethod
-    @transaction.atomic
-    def check_and_update_limits(user, amount):
+    @contextmanager
+    def reserve(user, amounts):
+        """
+        Consume limit usage for each amount and yield the per-amount errors
+        (None where the amount fit). Usage is given back if the block raises.
+        """
+        backend = get_limit_backend()
+        errors = backend.consume_many(user, amounts) if amounts else []
+        consumed = sum((a for a, error in zip(amounts, errors) if error is None), Decimal('0.00'))
+        try:
+            yield errors
+        except BaseException:
+            if consumed:
+                backend.release(user, consumed)
+            raise
+        if consumed:
+            TransferLimitService.schedule_reconcile(user)
+    
+    @staticmethod
+    def refund(user, amount):
+        """Give back committed usage for an accepted transfer that later failed to settle"""
+        backend = get_limit_backend()
+        if backend.reconcile:
+            backend.release(user, amount)
+            TransferLimitService.schedule_reconcile(user)
+            return
+        zero = models.Value(Decimal('0.00'))
+        TransferLimit.objects.filter(user=user).update(
+            daily_used=Greatest(F('daily_used') - amount, zero),
+            monthly_used=Greatest(F('monthly_used') - amount, zero),
+            updated_at=timezone.now()
+        )
+    
+    @staticmethod
+    def schedule_reconcile(user):
+        """Copy counter usage to TransferLimit after commit, at most once per delay window"""
+        if not get_limit_backend().reconcile:
+            return
+        delay = settings.TRANSFER_LIMIT_RECONCILE_DELAY
+        if cache.add(f'transfer_limits:reconcile:{user.pk}', 1, delay):
+            from .tasks import reconcile_transfer_limits
+            transaction.on_commit(
+                lambda: reconcile_transfer_limits.apply_async((str(user.pk),), countdown=delay)
+            )
+    
+    @staticmethod
+    def reconcile(user):
+        daily_used, monthly_used = get_limit_backend().usage(user)
+        limit = TransferLimitService.get_or_create_limit(user)
+        TransferLimit.objects.filter(pk=limit.pk).update(
+            daily_used=daily_used,
+            monthly_used=monthly_used,
+            last_reset_date=timezone.now().date(),
+            updated_at=timezone.now()
+        )
+    
+    @staticmethod
+    def get_limit_status(user):
+        """TransferLimit row with usage taken from the active backend"""
         limit = TransferLimitService.get_or_create_limit(user)
-        if limit.daily_used + amount > limit.daily_limit:
-            raise ValueError(f"Daily transfer limit exceeded. Remaining: {limit.daily_limit - limit.daily_used}")
-        if limit.monthly_used + amount > limit.monthly_limit:
-            raise ValueError(f"Monthly transfer limit exceeded. Remaining: {limit.monthly_limit - limit.monthly_used}")
-        limit.daily_used += amount
-        limit.monthly_used += amount
-        limit.save()
+        backend = get_limit_backend()
+        if backend.reconcile:
+            limit.daily_used, limit.monthly_used = backend.usage(user)
         return limit
+
+class ExchangeRateService:
+    @staticmethod
+    def update_rates(provider=None):
+        """Fetch USD-based rates from the provider and upsert them into the rate table"""
+        provider = provider or get_rate_provider()
+        now = timezone.now()
+        rates = [
+            ExchangeRate(
+                base_currency=FX_BASE_CURRENCY, quote_currency=currency, rate=rate,
+                source=getattr(provider, 'name', type(provider).__name__), fetched_at=now
+            )
+            for currency, rate in provider.fetch_rates(FX_BASE_CURRENCY).items()
+            if currency != FX_BASE_CURRENCY
+        ]
+        ExchangeRate.objects.bulk_create(
+            rates,
+            update_conflicts=True,
+            unique_fields=['base_currency', 'quote_currency'],
+            update_fields=['rate', 'source', 'fetched_at', 'updated_at']
+        )
+        RateCache.invalidate()
+        return len(rates)
+    
+    @staticmethod
+    def consolidate(amounts, currency):
+        """
+        Sum (amount, currency) pairs into one currency against a single rate
+        snapshot. Return (total, missing): amounts in currencies without a rate
+        are left out of the total and listed in missing; total is None when
+        the target currency itself has no rate.
+        """
+        rates = RateCache.rates()
+        if currency not in rates:
+            return None, [currency]
+        total = Decimal('0.00')
+        missing = set()
+        for amount, from_currency in amounts:
+            if from_currency not in rates:
+                missing.add(from_currency)
+                continue
+            total += RateCache.convert(amount, from_currency, currency, rates)
+        return total, sorted(missing)
+
+class _Echo:
+    """File-like object whose write() returns the value, for streaming csv.writer output"""
+    def write(self, value):
+        return value
+
+class TransactionExportService:
+    FIELDS = [
+        'id', 'reference', 'created_at', 'transaction_type', 'status', 'amount', 'fee', 'currency',
+        'balance_before', 'balance_after', 'recipient_email', 'description'
+    ]
+    
+    @staticmethod
+    def filter_queryset(queryset, transaction_type=None, start_date=None, end_date=None):
+        """Apply export filters; end_date is inclusive"""
+        if transaction_type:
+            queryset = queryset.filter(transaction_type=transaction_type)
+        if start_date:
+            queryset = queryset.filter(created_at__gte=TransactionExportService.start_of_day(start_date))
+        if end_date:
+            queryset = queryset.filter(
+                created_at__lt=TransactionExportService.start_of_day(end_date + timedelta(days=1))
+            )
+        return queryset
+    
+    @staticmethod
+    def start_of_day(day):
+        return timezone.make_aware(datetime.combine(day, time.min))
+    
+    @staticmethod
+    def archived_rows(wallet_ids, transaction_type=None, start_date=None, end_date=None):
+        """
+        Transactions moved to cold storage that match the export filters,
+        newest first, as a lazy iterator ([] when the range has no archive)
+        """
+        start = TransactionExportService.start_of_day(start_date) if start_date else None
+        end = TransactionExportService.start_of_day(end_date + timedelta(days=1)) if end_date else None
+        if not ArchiveService.entries('wallet.Transaction', wallet_ids, start, end).exists():
+            return []
+        rows = ArchiveService.iter_rows('wallet.Transaction', wallet_ids, start, end)
+        if transaction_type:
+            rows = (row for row in rows if row['transaction_type'] == transaction_type)
+        return rows
+    
+    @staticmethod
+    def iter_rows(queryset, archived=()):
+        chunk_size = getattr(settings, 'TRANSACTION_EXPORT_CHUNK_SIZE', 2000)
+        fields = TransactionExportService.FIELDS
+        rows = queryset.order_by('-created_at', '-id').values_list(*fields).iterator(chunk_size=chunk_size)
+        if not archived:
+            return rows
+        archived = (tuple(row[field] for field in fields) for row in archived)
+        return heapq.merge(rows, archived, key=lambda row: (row[2], row[0]), reverse=True)
+    
+    @staticmethod
+    def _batched(lines, size=500):
+        batch = []
+        for line in lines:
+            batch.append(line)
+            if len(batch) >= size:
+                yield ''.join(batch)
+                batch = []
+        if batch:
+            yield ''.join(batch)
+    
+    @staticmethod
+    def stream_csv(queryset, archived=()):
+        writer = csv.writer(_Echo())
+        yield writer.writerow(TransactionExportService.FIELDS)
+        yield from TransactionExportService._batched(
+            writer.writerow(row) for row in TransactionExportService.iter_rows(queryset, archived)
+        )
+    
+    @staticmethod
+    def stream_ndjson(queryset, archived=()):
+        fields = TransactionExportService.FIELDS
+        yield from TransactionExportService._batched(
+            json.dumps(dict(zip(fields, row)), cls=DjangoJSONEncoder) + '\n'
+            for row in TransactionExportService.iter_rows(queryset, archived)
+        )
@@ -0,0 +1,200 @@
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Wallet, WalletHold, Transaction, OutboxEvent, SettlementQueueItem
+from .holds import HoldService
+from .services import BalanceService, LedgerService, TransactionService, TransferLimitService, WalletService
+from .snapshots import BalanceSnapshotCache
+from .outbox import transaction_event, EVENT_TRANSACTION_SETTLED
+from notifications.services import NotificationService
+from core.models import User
+from core.pin import PinService, PIN_SCOPE_TRANSFER
+from common.db import retry_on_conflict
+from common.constants import (
+    HOLD_CAPTURED, HOLD_EXPIRED, TRANSACTION_TRANSFER, TRANSACTION_DEPOSIT,
+    STATUS_COMPLETED, STATUS_FAILED, STATUS_PENDING
+)
+
+logger = logging.getLogger(__name__)
+
+
+class SettlementService:
+    """
+    Opt-in asynchronous transfers. submit() only places a hold on the sender's
+    available_balance and queues the pending transaction, so the request
+    never waits on the recipient's wallet row. Settlement workers drain the
+    queue one shard at a time (shards are keyed by sender wallet, with a
+    single drainer per shard) and apply each micro-batch with bulk writes.
+    """
+
+    @staticmethod
+    def shard_for(wallet_id):
+        return wallet_id.int % settings.SETTLEMENT_SHARDS
+
+    @staticmethod
+    def submit(sender_wallet, recipient_email, amount, pin=None, description='', pin_token=None):
+        PinService.verify(sender_wallet.user, PIN_SCOPE_TRANSFER, pin, pin_token)
+        return SettlementService._submit(sender_wallet, recipient_email, amount, description)
+
+    @staticmethod
+    @retry_on_conflict
+    @transaction.atomic
+    def _submit(sender_wallet, recipient_email, amount, description=''):
+        """Hold the total, record a PENDING transfer and queue it; return the transaction"""
+        if amount <= 0:
+            raise ValueError("Transfer amount must be greater than zero")
+        try:
+            recipient_user = User.objects.get(email=recipient_email)
+        except User.DoesNotExist:
+            raise ValueError("Recipient not found")
+        if sender_wallet.user == recipient_user:
+            raise ValueError("Cannot transfer to yourself")
+        recipient_wallet = WalletService.get_or_create_wallet(
+            user=recipient_user,
+            currency=sender_wallet.currency
+        )
+        fee = TransactionService.calculate_fee(TRANSACTION_TRANSFER, amount)
+        # Serialize submits from this wallet before limit usage is read, as transfer() does
+        BalanceService.lock_wallets(sender_wallet)
+        with TransferLimitService.reserve(sender_wallet.user, [amount]) as limit_errors:
+            if limit_errors[0]:
+                raise ValueError(limit_errors[0])
+            txn = TransactionService.create_transaction(
+                wallet=sender_wallet,
+                transaction_type=TRANSACTION_TRANSFER,
+                amount=amount,
+                fee=fee,
+                description=description or f"Transfer to {recipient_email}",
+                recipient_wallet=recipient_wallet,
+                recipient_email=recipient_email,
+                status=STATUS_PENDING
+            )
+            hold = HoldService.place(
+                sender_wallet, amount + fee, description=txn.description,
+                metadata={'description': description}, txn=txn
+            )
+            shard = SettlementService.shard_for(sender_wallet.pk)
+            SettlementQueueItem.objects.create(shard=shard, hold=hold)
+        transaction.on_commit(lambda: SettlementService.schedule(shard))
+        return txn
+
+    @staticmethod
+    def schedule(shard):
+        from .tasks import settle_transfers
+        settle_transfers.delay(shard)
+
+    @staticmethod
+    def schedule_all():
+        """Kick a drainer for every shard with queued transfers; return the shards"""
+        shards = sorted(set(SettlementQueueItem.objects.values_list('shard', flat=True)))
+        for shard in shards:
+            SettlementService.schedule(shard)
+        return shards
+
+    @staticmethod
+    def settle_shard(shard, batch_size=None):
+        """Drain a shard in micro-batches; a no-op if another worker holds the shard"""
+        lock_key = f'settlement:shard:{shard}'
+        if not cache.add(lock_key, 1, settings.SETTLEMENT_LOCK_TIMEOUT):
+            return 0
+        try:
+            settled = 0
+            while True:
+                count = SettlementService.settle_batch(shard, batch_size)
+                if not count:
+                    return settled
+                settled += count
+        finally:
+            cache.delete(lock_key)
+
+    @staticmethod
+    @retry_on_conflict
+    @transaction.atomic
+    def settle_batch(shard, batch_size=None):
+        """Settle the oldest queued transfers of a shard in one transaction; return how many were dequeued"""
+        batch_size = batch_size or settings.SETTLEMENT_BATCH_SIZE
+        items = list(
+            SettlementQueueItem.objects.filter(shard=shard).order_by('id')
+            .select_for_update(skip_locked=True, of=('self',))
+            .select_related('hold__transaction')[:batch_size]
+        )
+        if not items:
+            return 0
+        active = {hold.pk: hold for hold in HoldService._lock_active([item.hold_id for item in items])}
+        txns = [item.hold.transaction for item in items if item.hold.transaction]
+        wallet_ids = {txn.wallet_id for txn in txns} | {txn.recipient_wallet_id for txn in txns}
+        wallets = Wallet.objects.filter(pk__in=wallet_ids).select_related('user').in_bulk()
+        BalanceService.lock_wallets(*wallets.values())
+
+        now = timezone.now()
+        settled, failed, holds, credits, entries, events = [], [], [], [], [], []
+        for item in items:
+            txn = item.hold.transaction
+            if txn is None or txn.status != STATUS_PENDING:
+                continue
+            hold = active.get(item.hold_id)
+            sender = wallets[txn.wallet_id]
+            txn.updated_at = now
+            if hold is None or hold.expires_at <= now:
+                # A released or expired hold has already returned its funds;
+                # one that expired while queued is returned here
+                if hold is not None:
+                    sender.available_balance += hold.amount
+                    hold.status = HOLD_EXPIRED
+                    hold.resolved_at = now
+                    hold.updated_at = now
+                    holds.append(hold)
+                txn.status = STATUS_FAILED
+                txn.balance_after = txn.balance_before
+                failed.append(txn)
+                continue
+            recipient = wallets[txn.recipient_wallet_id]
+            txn.wallet = sender
+            txn.balance_before = sender.balance
+            sender.balance -= hold.amount
+            txn.balance_after = sender.balance
+            txn.status = STATUS_COMPLETED
+            hold.status = HOLD_CAPTURED
+            hold.captured_amount = hold.amount
+            hold.resolved_at = now
+            hold.updated_at = now
+            recipient_txn = TransactionService.build_transaction(
+                wallet=recipient,
+                transaction_type=TRANSACTION_DEPOSIT,
+                amount=txn.amount,
+                description=hold.metadata.get('description') or f"Transfer from {sender.user.email}",
+                recipient_email=sender.user.email,
+                status=STATUS_COMPLETED
+            )
+            recipient.balance += txn.amount
+            recipient.available_balance += txn.amount
+            settled.append(txn)
+            holds.append(hold)
+            credits.append(recipient_txn)
+            entries.append(TransactionService.build_transfer_entry(txn, recipient, txn.amount, txn.fee))
+            events.extend([(sender.user, txn, 'TRANSFER'), (recipient.user, recipient_txn, 'DEPOSIT')])
+
+        for wallet in wallets.values():
+            wallet.updated_at = now
+        Transaction.objects.bulk_update(
+            settled + failed, ['status', 'balance_before', 'balance_after', 'updated_at'], batch_size=500
+        )
+        OutboxEvent.objects.bulk_create(
+            [transaction_event(txn, EVENT_TRANSACTION_SETTLED) for txn in settled + failed], batch_size=500
+        )
+        TransactionService.save_transactions(credits)
+        Wallet.objects.bulk_update(list(wallets.values()), ['balance', 'available_balance', 'updated_at'], batch_size=500)
+        WalletHold.objects.bulk_update(holds, ['status', 'captured_amount', 'resolved_at', 'updated_at'], batch_size=500)
+        LedgerService.post(*entries)
+        BalanceSnapshotCache.invalidate_on_commit(*{w.user_id for w in wallets.values()})
+        NotificationService.enqueue_transaction_notifications(events)
+        SettlementQueueItem.objects.filter(pk__in=[item.pk for item in items]).delete()
+        for txn in failed:
+            user = wallets[txn.wallet_id].user
+            transaction.on_commit(lambda user=user, amount=txn.amount: TransferLimitService.refund(user, amount))
+            logger.warning("Transfer %s failed to settle: hold no longer active", txn.reference)
+        return len(items)
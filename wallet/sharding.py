@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.db import transaction
+
+from .models import Wallet, WalletBalanceShard
+from .services import BalanceService
+from common.db import retry_on_conflict
+
+
+class BalanceShardService:
+    """
+    Opt-in sharded balances for hot (merchant) wallets. With N shards,
+    inbound credits are spread over N WalletBalanceShard rows by hash, so
+    deposit throughput to one wallet scales with N; fold_all() periodically
+    moves the shard balances back onto the wallet row.
+    """
+
+    @staticmethod
+    @retry_on_conflict
+    @transaction.atomic
+    def configure(wallet, shards):
+        """Set the wallet's shard count; 0 turns sharding off. Pending shard balances are folded first."""
+        if not 0 <= shards <= settings.BALANCE_SHARD_MAX:
+            raise ValueError(f"Shard count must be between 0 and {settings.BALANCE_SHARD_MAX}")
+        wallet = Wallet.objects.get(pk=wallet.pk)
+        BalanceService.lock_wallets(wallet)
+        BalanceService.fold(wallet)
+        WalletBalanceShard.objects.filter(wallet=wallet, index__gte=shards).delete()
+        WalletBalanceShard.objects.bulk_create(
+            [WalletBalanceShard(wallet=wallet, index=index) for index in range(shards)],
+            ignore_conflicts=True
+        )
+        wallet.shard_count = shards
+        wallet.save(update_fields=['shard_count', 'updated_at'])
+        return wallet
+
+    @staticmethod
+    def fold_all(batch_size=None):
+        """Fold every wallet with credits on its shards, skipping wallets locked elsewhere; return the count"""
+        batch_size = batch_size or settings.BALANCE_SHARD_FOLD_BATCH_SIZE
+        wallet_ids = list(
+            WalletBalanceShard.objects.filter(balance__gt=0).order_by('wallet').values_list('wallet', flat=True).distinct()
+        )
+        folded = 0
+        for start in range(0, len(wallet_ids), batch_size):
+            with transaction.atomic():
+                wallets = list(
+                    Wallet.objects.select_for_update(skip_locked=True)
+                    .filter(pk__in=wallet_ids[start:start + batch_size]).order_by('pk')
+                )
+                BalanceService.fold(*wallets)
+            folded += len(wallets)
+        return folded
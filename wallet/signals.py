@@ -0,0 +1,22 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import FeeConfiguration, TransferLimit, Wallet
+from .fees import FeeSchedule
+from .limits import CounterLimitBackend
+from .snapshots import BalanceSnapshotCache
+
+
+@receiver([post_save, post_delete], sender=FeeConfiguration)
+def invalidate_fee_schedule(sender, **kwargs):
+    transaction.on_commit(FeeSchedule.invalidate)
+
+
+@receiver([post_save, post_delete], sender=Wallet)
+def invalidate_balance_snapshot(sender, instance, **kwargs):
+    BalanceSnapshotCache.invalidate_on_commit(instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=TransferLimit)
+def invalidate_transfer_limits(sender, instance, **kwargs):
+    transaction.on_commit(lambda: CounterLimitBackend.invalidate_limits(instance.user_id))
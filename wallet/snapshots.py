@@ -0,0 +1,46 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+class BalanceSnapshotCache:
+    """
+    Per-user cache of read-only balance payloads (wallet list, balance
+    summary). Keys embed a per-user version token; invalidate() swaps the
+    token, so a reader that loaded data just before a commit can only write
+    under the old version and never resurrects a stale snapshot.
+    """
+
+    @staticmethod
+    def _version_key(user_id):
+        return f'wallet:balances:{user_id}:version'
+
+    @classmethod
+    def _version(cls, user_id):
+        key = cls._version_key(user_id)
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, uuid.uuid4().hex, None)
+            version = cache.get(key)
+        return version
+
+    @classmethod
+    def get(cls, user, name, build):
+        """Return the cached payload called name, building and storing it on a miss"""
+        key = f'wallet:balances:{user.pk}:{cls._version(user.pk)}:{name}'
+        payload = cache.get(key)
+        if payload is None:
+            payload = build()
+            cache.set(key, payload, settings.BALANCE_SNAPSHOT_TTL)
+        return payload
+
+    @classmethod
+    def invalidate(cls, *user_ids):
+        cache.set_many({cls._version_key(user_id): uuid.uuid4().hex for user_id in set(user_ids)}, None)
+
+    @classmethod
+    def invalidate_on_commit(cls, *user_ids):
+        """Drop the users' snapshots once the current transaction commits"""
+        transaction.on_commit(lambda: cls.invalidate(*user_ids))
@@ -0,0 +1,184 @@
+import calendar
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Wallet, StandingOrder
+from .services import TransactionService
+from core.models import User
+from core.pin import PinService, PIN_SCOPE_TRANSFER
+from common.db import retry_on_conflict
+from common.constants import FREQUENCY_DAILY, FREQUENCY_WEEKLY, STATUS_FAILED
+from common.partitioning import add_months
+
+logger = logging.getLogger(__name__)
+
+
+class StandingOrderService:
+    """
+    Recurring transfers. run_due() leases due orders in batches with SKIP
+    LOCKED, so extra sweepers can share a busy minute, then pays each sender
+    wallet's orders with a single _batch_transfer, which applies the same
+    balance, fee and limit rules as TransactionService.transfer, and
+    advances their schedules in that same transaction.
+    """
+
+    @staticmethod
+    def occurrence(first_run_at, frequency, n):
+        """The n-th run after first_run_at; monthly runs keep the day of month, clamped to short months"""
+        if frequency == FREQUENCY_DAILY:
+            return first_run_at + timedelta(days=n)
+        if frequency == FREQUENCY_WEEKLY:
+            return first_run_at + timedelta(weeks=n)
+        month = add_months(first_run_at.date(), n)
+        day = min(first_run_at.day, calendar.monthrange(month.year, month.month)[1])
+        return first_run_at.replace(year=month.year, month=month.month, day=day)
+
+    @staticmethod
+    def create(wallet, recipient_email, amount, frequency, first_run_at, end_date=None, description='',
+               pin=None, pin_token=None):
+        PinService.verify(wallet.user, PIN_SCOPE_TRANSFER, pin, pin_token)
+        if amount <= 0:
+            raise ValueError("Transfer amount must be greater than zero")
+        recipient = User.objects.filter(email=recipient_email).first()
+        if recipient is None:
+            raise ValueError("Recipient not found")
+        if recipient.pk == wallet.user_id:
+            raise ValueError("Cannot transfer to yourself")
+        if end_date and end_date < timezone.localdate(first_run_at):
+            raise ValueError("end_date is before the first run")
+        return StandingOrder.objects.create(
+            wallet=wallet,
+            recipient_email=recipient_email,
+            amount=amount,
+            frequency=frequency,
+            first_run_at=first_run_at,
+            next_run_at=first_run_at,
+            end_date=end_date,
+            description=description or ''
+        )
+
+    @staticmethod
+    def cancel(order):
+        order.is_active = False
+        order.save(update_fields=['is_active', 'updated_at'])
+        return order
+
+    @staticmethod
+    def schedule_next(order, now):
+        """Move next_run_at past `now`; runs missed while the sweeper was down are not replayed"""
+        n = order.run_count
+        next_run_at = order.next_run_at
+        while next_run_at <= now:
+            n += 1
+            next_run_at = StandingOrderService.occurrence(order.first_run_at, order.frequency, n)
+        order.run_count = n
+        order.next_run_at = next_run_at
+        if order.end_date and timezone.localdate(next_run_at) > order.end_date:
+            order.is_active = False
+
+    @staticmethod
+    @transaction.atomic
+    def claim_due(now, batch_size):
+        """Lease due orders to this sweeper; their schedules only move once the run is recorded"""
+        orders = list(
+            StandingOrder.objects.filter(is_active=True, next_run_at__lte=now)
+            .filter(Q(claimed_until__isnull=True) | Q(claimed_until__lte=now))
+            .order_by('next_run_at').select_for_update(skip_locked=True)[:batch_size]
+        )
+        claimed_until = now + settings.STANDING_ORDER_CLAIM_TIMEOUT
+        for order in orders:
+            order.claimed_until = claimed_until
+        StandingOrder.objects.filter(pk__in=[order.pk for order in orders]).update(claimed_until=claimed_until)
+        return orders
+
+    @staticmethod
+    def _lock_claimed(orders):
+        """Lock and return the orders whose lease still belongs to this sweeper"""
+        owned = set(
+            StandingOrder.objects.select_for_update()
+            .filter(pk__in=[order.pk for order in orders], claimed_until=orders[0].claimed_until)
+            .values_list('pk', flat=True)
+        )
+        return [order for order in orders if order.pk in owned]
+
+    @staticmethod
+    def _record(orders, results, now):
+        """Store each outcome, advance the schedule and release the lease"""
+        for order, result in zip(orders, results):
+            StandingOrderService.schedule_next(order, now)
+            order.last_run_at = now
+            order.last_status = result['status']
+            order.last_error = (result.get('error') or '')[:255]
+            order.last_reference = result.get('reference', '')
+            order.claimed_until = None
+            order.updated_at = now
+        StandingOrder.objects.bulk_update(orders, [
+            'next_run_at', 'run_count', 'is_active', 'last_run_at', 'last_status', 'last_error',
+            'last_reference', 'claimed_until', 'updated_at'
+        ], batch_size=1000)
+
+    @staticmethod
+    @retry_on_conflict
+    @transaction.atomic
+    def _pay(wallet, orders, now):
+        """Pay one wallet's claimed orders and record the run in the same transaction"""
+        orders = StandingOrderService._lock_claimed(orders)
+        if not orders:
+            return
+        transfers = [
+            {
+                'recipient_email': order.recipient_email,
+                'amount': order.amount,
+                'description': order.description or f"Standing order to {order.recipient_email}",
+            }
+            for order in orders
+        ]
+        results = TransactionService._batch_transfer(wallet, transfers)['results']
+        StandingOrderService._record(orders, results, now)
+
+    @staticmethod
+    @transaction.atomic
+    def _fail(orders, error, now):
+        orders = StandingOrderService._lock_claimed(orders)
+        StandingOrderService._record(orders, [{'status': STATUS_FAILED, 'error': error}] * len(orders), now)
+
+    @staticmethod
+    def execute(orders, now=None):
+        """
+        Pay claimed orders, one batch transfer per sender wallet. A run is
+        recorded, and the schedule advanced, in the transaction that pays it,
+        so a sweeper dying after the claim leaves the order to be retried once
+        its lease lapses instead of skipping the occurrence.
+        """
+        now = now or timezone.now()
+        by_wallet = defaultdict(list)
+        for order in orders:
+            by_wallet[order.wallet_id].append(order)
+        wallets = Wallet.objects.filter(pk__in=by_wallet).select_related('user').in_bulk()
+        for wallet_id, wallet_orders in by_wallet.items():
+            try:
+                StandingOrderService._pay(wallets[wallet_id], wallet_orders, now)
+            except Exception as exc:
+                # Record the failure and move on so one wallet cannot stall the others
+                logger.exception("Standing orders failed for wallet %s", wallet_id)
+                StandingOrderService._fail(wallet_orders, str(exc), now)
+        return orders
+
+    @staticmethod
+    def run_due(now=None, batch_size=None):
+        """Execute every order due at `now`; return how many were processed"""
+        now = now or timezone.now()
+        batch_size = batch_size or settings.STANDING_ORDER_BATCH_SIZE
+        processed = 0
+        while True:
+            orders = StandingOrderService.claim_due(now, batch_size)
+            if not orders:
+                return processed
+            StandingOrderService.execute(orders, now)
+            processed += len(orders)
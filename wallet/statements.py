@@ -0,0 +1,117 @@
+import csv
+import io
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.utils import timezone
+
+from .models import Wallet, Transaction, Statement
+from .services import LedgerService, TransactionExportService
+from common.constants import STATUS_COMPLETED, WALLET_CREDIT_TYPES, WALLET_DEBIT_TYPES
+from common.partitioning import add_months
+
+
+class StatementService:
+    """
+    Month-end statements. dispatch() fans wallets out to Celery in batches of
+    STATEMENT_BATCH_SIZE; each batch computes opening and closing balances
+    from the ledger and stores the month's transactions as a CSV file, so a
+    download is a file fetch rather than a live query.
+    """
+
+    @staticmethod
+    def previous_month(today=None):
+        today = today or timezone.localdate()
+        return add_months(today.replace(day=1), -1)
+
+    @staticmethod
+    def bounds(month):
+        """[start, end) datetimes of the month starting on `month`"""
+        return (
+            TransactionExportService.start_of_day(month),
+            TransactionExportService.start_of_day(add_months(month, 1)),
+        )
+
+    @staticmethod
+    def pending_wallet_ids(month):
+        """Wallets that existed during the month and have no statement for it yet"""
+        _, end = StatementService.bounds(month)
+        return list(
+            Wallet.objects.filter(created_at__lt=end).exclude(statements__period_start=month)
+            .order_by('pk').values_list('pk', flat=True)
+        )
+
+    @staticmethod
+    def dispatch(month=None):
+        """Queue statement generation for every pending wallet; return the number of batches"""
+        from .tasks import generate_statements
+        month = month or StatementService.previous_month()
+        wallet_ids = [str(pk) for pk in StatementService.pending_wallet_ids(month)]
+        size = settings.STATEMENT_BATCH_SIZE
+        for start in range(0, len(wallet_ids), size):
+            generate_statements.delay(wallet_ids[start:start + size], month.isoformat())
+        return -(-len(wallet_ids) // size)
+
+    @staticmethod
+    def generate_batch(wallet_ids, month):
+        wallets = Wallet.objects.filter(pk__in=wallet_ids).order_by('pk')
+        return [StatementService.generate(wallet, month) for wallet in wallets]
+
+    @staticmethod
+    def generate(wallet, month):
+        """Build (or rebuild) the wallet's statement for the month starting on `month`"""
+        start, end = StatementService.bounds(month)
+        last_day = add_months(month, 1) - timedelta(days=1)
+        opening = LedgerService.balance_at(wallet, start - timedelta(microseconds=1))
+        closing = LedgerService.balance_at(wallet, end - timedelta(microseconds=1))
+
+        transactions = TransactionExportService.filter_queryset(
+            Transaction.objects.filter(wallet=wallet), start_date=month, end_date=last_day
+        )
+        archived = TransactionExportService.archived_rows([wallet.pk], start_date=month, end_date=last_day)
+        rows = list(TransactionExportService.iter_rows(transactions, archived))
+        rows.reverse()
+
+        fields = TransactionExportService.FIELDS
+        credits = debits = Decimal('0.00')
+        for row in rows:
+            row = dict(zip(fields, row))
+            if row['status'] != STATUS_COMPLETED:
+                continue
+            if row['transaction_type'] in WALLET_CREDIT_TYPES:
+                credits += row['amount']
+            elif row['transaction_type'] in WALLET_DEBIT_TYPES:
+                debits += row['amount'] + row['fee']
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerows([
+            ['Statement', f"{month:%Y-%m}"],
+            ['Wallet', wallet.pk],
+            ['Currency', wallet.currency],
+            ['Opening balance', opening],
+            ['Total credits', credits],
+            ['Total debits', debits],
+            ['Closing balance', closing],
+            [],
+            fields,
+        ])
+        writer.writerows(rows)
+
+        statement = (
+            Statement.objects.filter(wallet=wallet, period_start=month).first()
+            or Statement(wallet=wallet, period_start=month)
+        )
+        previous_file = statement.file.name if statement.file else None
+        statement.opening_balance = opening
+        statement.closing_balance = closing
+        statement.total_credits = credits
+        statement.total_debits = debits
+        statement.transaction_count = len(rows)
+        statement.file.save(f"{wallet.pk}.csv", ContentFile(buffer.getvalue().encode()), save=False)
+        statement.save()
+        if previous_file and previous_file != statement.file.name:
+            statement.file.storage.delete(previous_file)
+        return statement
@@ -0,0 +1,93 @@
+from datetime import date
+from celery import shared_task
+from core.models import User
+from .services import LedgerService, TransferLimitService, ExchangeRateService
+from .outbox import OutboxRelay
+from .reconciliation import ReconciliationService
+from .statements import StatementService
+from .analytics import SpendingAnalyticsService
+from .standing_orders import StandingOrderService
+from .holds import HoldService
+from .settlement import SettlementService
+from .sharding import BalanceShardService
+
+
+@shared_task
+def checkpoint_balances():
+    return LedgerService.checkpoint_balances()
+
+
+@shared_task
+def reconcile_transfer_limits(user_id):
+    TransferLimitService.reconcile(User.objects.get(pk=user_id))
+
+
+@shared_task
+def update_exchange_rates():
+    return ExchangeRateService.update_rates()
+
+
+@shared_task
+def relay_outbox():
+    return OutboxRelay.relay()
+
+
+@shared_task
+def purge_outbox():
+    return OutboxRelay.purge_published()
+
+
+@shared_task
+def reconcile_balances(resume=True):
+    """Plan (or resume) a reconciliation run and fan its partitions out to workers"""
+    run = (resume and ReconciliationService.resumable_run()) or ReconciliationService.plan()
+    for partition_id in ReconciliationService.pending_partitions(run):
+        reconcile_balance_partition.delay(str(partition_id))
+    return str(run.pk)
+
+
+@shared_task
+def reconcile_balance_partition(partition_id):
+    return ReconciliationService.reconcile_partition(partition_id)
+
+
+@shared_task
+def generate_monthly_statements(month=None):
+    """Fan out last month's statements (or `month`, an ISO date) to generate_statements batches"""
+    return StatementService.dispatch(date.fromisoformat(month) if month else None)
+
+
+@shared_task
+def generate_statements(wallet_ids, month):
+    return len(StatementService.generate_batch(wallet_ids, date.fromisoformat(month)))
+
+
+@shared_task
+def refresh_daily_rollups():
+    return SpendingAnalyticsService.refresh()
+
+
+@shared_task
+def run_standing_orders():
+    return StandingOrderService.run_due()
+
+
+@shared_task
+def expire_holds():
+    return HoldService.expire_due()
+
+
+@shared_task
+def settle_transfers(shard):
+    return SettlementService.settle_shard(shard)
+
+
+@shared_task
+def settle_all_shards():
+    """Safety net: drain shards whose on-commit kick was lost"""
+    return SettlementService.schedule_all()
+
+
+@shared_task
+def fold_balance_shards():
+    return BalanceShardService.fold_all()
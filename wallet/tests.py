@@ -1,3 +1,1033 @@
-from django.test import TestCase
+import json
+import logging
+import tempfile
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.db import OperationalError, connection, transaction
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.models import User
+from common.archive import ArchiveService
+from common.constants import (
+    FREQUENCY_DAILY, HOLD_CAPTURED, HOLD_EXPIRED, HOLD_RELEASED, STATUS_COMPLETED, STATUS_FAILED, STATUS_PENDING,
+    TRANSACTION_CRYPTO_BUY, TRANSACTION_DEPOSIT, TRANSACTION_LOAN_REPAYMENT, TRANSACTION_TRANSFER,
+    TRANSACTION_WITHDRAWAL
+)
+from common.db import retry_on_conflict
+from common.idempotency import request_fingerprint
+from common.models import ArchiveSegment, IdempotencyKey
+from common.partitioning import add_months
+from common.testing import QueryBudgetMixin
+from .analytics import SpendingAnalyticsService
+from .fees import FEE_SCHEDULE_VERSION_KEY, FeeSchedule
+from .fx import RateCache
+from .holds import HoldService
+from .limits import InMemoryLimitBackend, get_limit_backend
+from .models import (
+    DailyTransactionRollup, ExchangeRate, FeeConfiguration, JournalEntry, OutboxEvent, Posting, StandingOrder,
+    Transaction, TransferLimit, Wallet, WalletBalanceShard, WalletHold
+)
+from .outbox import OutboxRelay
+from .reconciliation import ReconciliationService
+from .sharding import BalanceShardService
+from .standing_orders import StandingOrderService
+from .statements import StatementService
+from .services import BalanceService, LedgerService, TransactionService, TransferLimitService, WalletService
+from .settlement import SettlementService
+
+
+def make_user(email, pin='1234'):
+    user = User.objects.create_user(email, 'password', first_name='Test', last_name='User')
+    user.set_pin(pin)
+    return user
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class WalletTestCase(TestCase):
+    """Two users with PIN 1234; alice's USD wallet holds 100.00"""
+
+    def setUp(self):
+        RateCache.invalidate()
+        self.alice = make_user('alice@example.com')
+        self.bob = make_user('bob@example.com')
+        self.wallet = WalletService.get_or_create_wallet(self.alice)
+        TransactionService.deposit(self.wallet, Decimal('100.00'))
+        self.client = APIClient()
+        self.client.force_authenticate(self.alice)
+
+    def refresh(self, wallet):
+        wallet.refresh_from_db()
+        return wallet
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def use_temp_archive(self):
+        archive_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(archive_dir.cleanup)
+        storages = {**settings.STORAGES, 'archive': {
+            'BACKEND': 'django.core.files.storage.FileSystemStorage',
+            'OPTIONS': {'location': archive_dir.name},
+        }}
+        override = override_settings(STORAGES=storages)
+        override.enable()
+        self.addCleanup(override.disable)
+
+
+class ExchangeRateTests(WalletTestCase):
+    def test_rates_are_seeded(self):
+        self.assertEqual(set(RateCache.rates()), {'USD', 'EUR', 'GBP', 'KES'})
+
+    def test_missing_rate_is_flagged_not_fatal(self):
+        WalletService.get_or_create_wallet(self.alice, 'EUR')
+        ExchangeRate.objects.filter(quote_currency='EUR').delete()
+        RateCache.invalidate()
+        response = self.client.get('/api/wallet/balance/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_usd'], Decimal('100.00'))
+        self.assertEqual(response.data['missing_rates'], ['EUR'])
+
+    def test_incomplete_rate_map_is_not_cached(self):
+        ExchangeRate.objects.filter(quote_currency='EUR').delete()
+        RateCache.invalidate()
+        self.assertNotIn('EUR', RateCache.rates())
+        ExchangeRate.objects.create(base_currency='USD', quote_currency='EUR', rate=Decimal('0.9'))
+        self.assertIn('EUR', RateCache.rates())
+
+    def test_unknown_display_currency_is_rejected(self):
+        self.assertEqual(self.client.get('/api/wallet/balance/?currency=XYZ').status_code, 400)
+
+
+class IdempotentTransferTests(WalletTestCase):
+    def transfer(self):
+        return self.client.post('/api/wallet/transfer/', {
+            'recipient_email': 'bob@example.com', 'amount': '5.00', 'pin': '1234'
+        }, format='json', HTTP_IDEMPOTENCY_KEY='transfer-1')
+
+    def in_flight(self):
+        return IdempotencyKey.objects.create(
+            user=self.alice, key='transfer-1', method='POST', path='/api/wallet/transfer/',
+            fingerprint=request_fingerprint(SimpleNamespace(
+                method='POST', path='/api/wallet/transfer/',
+                data={'recipient_email': 'bob@example.com', 'amount': '5.00'}
+            )),
+            locked_until=timezone.now() + timedelta(seconds=30), expires_at=timezone.now() + timedelta(hours=1)
+        )
+
+    def test_replay_returns_stored_response(self):
+        first = self.transfer()
+        second = self.transfer()
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual((second.status_code, second.json()), (first.status_code, first.json()))
+        self.assertEqual(self.refresh(self.wallet).balance, Decimal('95.00'))
+
+    def test_replay_returns_stored_client_error(self):
+        TransactionService.withdraw(self.wallet, Decimal('98.00'), '1234')
+        first = self.transfer()
+        self.assertEqual(first.status_code, 400)
+        TransactionService.deposit(self.wallet, Decimal('50.00'))
+        second = self.transfer()
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual((second.status_code, second.json()), (first.status_code, first.json()))
+        self.assertEqual(self.refresh(self.wallet).balance, Decimal('52.00'))
+
+    @override_settings(IDEMPOTENCY_WAIT=timedelta(milliseconds=200))
+    def test_in_flight_duplicate_gets_409_with_retry_after(self):
+        self.in_flight()
+        response = self.transfer()
+        self.assertEqual(response.status_code, 409)
+        self.assertIn('Retry-After', response)
+
+    def test_duplicate_waits_for_first_response(self):
+        record = self.in_flight()
+
+        def finish(seconds):
+            IdempotencyKey.objects.filter(pk=record.pk).update(
+                status=IdempotencyKey.STATUS_COMPLETED, response_status=201, response_body={'reference': 'TXN-1'},
+                locked_until=None
+            )
+
+        with mock.patch('common.idempotency.time.sleep', side_effect=finish):
+            response = self.transfer()
+        self.assertEqual((response.status_code, response.json()), (201, {'reference': 'TXN-1'}))
+        self.assertEqual(response['Idempotent-Replayed'], 'true')
+        self.assertEqual(self.refresh(self.wallet).balance, Decimal('100.00'))
+
+    def test_duplicate_takes_over_a_released_key(self):
+        record = self.in_flight()
+        with mock.patch('common.idempotency.time.sleep', side_effect=lambda seconds: record.delete()):
+            response = self.transfer()
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(self.refresh(self.wallet).balance, Decimal('95.00'))
+
+
+class ArchiveReadTests(WalletTestCase):
+    def setUp(self):
+        super().setUp()
+        self.use_temp_archive()
+        eur = WalletService.get_or_create_wallet(self.alice, 'EUR')
+        TransactionService.deposit(eur, Decimal('10.00'))
+        TransactionService.deposit(self.wallet, Decimal('5.00'))
+        # Spread the history over three months and both wallets
+        old = timezone.now() - timedelta(days=200)
+        for days, txn in enumerate(Transaction.objects.order_by('created_at')):
+            Transaction.objects.filter(pk=txn.pk).update(created_at=old + timedelta(days=days * 25))
+        self.wallet_ids = [self.wallet.pk, eur.pk]
+        self.expected = list(
+            Transaction.objects.order_by('-created_at', '-id').values_list('reference', flat=True)
+        )
+        ArchiveService.archive('wallet.Transaction')
+
+    def test_rows_are_archived(self):
+        self.assertFalse(Transaction.objects.exists())
+        self.assertGreater(ArchiveSegment.objects.count(), 1)
+
+    def test_iter_rows_yields_newest_first_across_segments(self):
+        rows = ArchiveService.iter_rows('wallet.Transaction', self.wallet_ids)
+        self.assertEqual([row['reference'] for row in rows], self.expected)
+
+    def test_export_streams_archived_rows(self):
+        response = self.client.get('/api/wallet/transactions/export/?export_format=ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)['reference'] for line in lines], self.expected)
+
+    def walk(self, url, link='next'):
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(set(response.data), {'next', 'previous', 'results'})
+            pages.append([txn['reference'] for txn in response.data['results']])
+            url = response.data[link]
+        return pages
+
+    def test_list_pages_through_hot_and_archived_rows(self):
+        hot = TransactionService.deposit(self.wallet, Decimal('1.00'))
+        pages = self.walk('/api/wallet/transactions/?page_size=2')
+        self.assertEqual(sum(pages, []), [hot.reference] + self.expected)
+        last = self.client.get('/api/wallet/transactions/?page_size=2').data['next']
+        while True:
+            data = self.client.get(last).data
+            if not data['next']:
+                break
+            last = data['next']
+        backwards = self.walk(last, link='previous')
+        self.assertEqual(backwards[::-1], pages)
+
+    def test_date_filtered_list_keeps_cursor_contract(self):
+        response = self.client.get('/api/wallet/transactions/?start_date=2000-01-01&page_size=2')
+        self.assertEqual(set(response.data), {'next', 'previous', 'results'})
+        self.assertEqual(sum(self.walk('/api/wallet/transactions/?start_date=2000-01-01&page_size=2'), []),
+                         self.expected)
+
+
+class ArchiveDayBoundaryTests(WalletTestCase):
+    def setUp(self):
+        super().setUp()
+        self.use_temp_archive()
+        self.day = timezone.localdate() - timedelta(days=100)
+        midnight = ArchiveService.start_of_day(timezone.now() - timedelta(days=100))
+        TransactionService.deposit(self.wallet, Decimal('5.00'))
+        for hour, txn in zip((1, 23), Transaction.objects.order_by('created_at')):
+            Transaction.objects.filter(pk=txn.pk).update(created_at=midnight + timedelta(hours=hour))
+        self.midnight = midnight
+
+    def rollup_count(self):
+        return DailyTransactionRollup.objects.get(wallet=self.wallet, day=self.day).transaction_count
+
+    def test_archive_cutoff_is_rounded_down_to_whole_day(self):
+        self.assertEqual(ArchiveService.archive('wallet.Transaction', before=self.midnight + timedelta(hours=12)), 0)
+        SpendingAnalyticsService.refresh_day(self.day, [self.wallet.pk])
+        self.assertEqual(self.rollup_count(), 2)
+
+    def test_archived_day_keeps_its_rollup(self):
+        SpendingAnalyticsService.refresh(as_of=timezone.now())
+        self.assertEqual(ArchiveService.archive('wallet.Transaction', before=self.midnight + timedelta(days=1)), 2)
+        SpendingAnalyticsService.refresh(as_of=timezone.now() + timedelta(seconds=1))
+        self.assertEqual(self.rollup_count(), 2)
+
+
+class ArchiveScopeTests(WalletTestCase):
+    def setUp(self):
+        super().setUp()
+        self.use_temp_archive()
+        self.old = timezone.now() - timedelta(days=200)
+        TransactionService.deposit(self.wallet, Decimal('5.00'))
+        Transaction.objects.update(created_at=self.old)
+
+    def test_pending_rows_stay_until_final(self):
+        pending = Transaction.objects.order_by('created_at').first()
+        Transaction.objects.filter(pk=pending.pk).update(status=STATUS_PENDING)
+        self.assertEqual(ArchiveService.archive('wallet.Transaction'), 1)
+        self.assertEqual(list(Transaction.objects.values_list('pk', flat=True)), [pending.pk])
+        Transaction.objects.filter(pk=pending.pk).update(status=STATUS_COMPLETED)
+        self.assertEqual(ArchiveService.archive('wallet.Transaction'), 1)
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_archived_transaction_keeps_hold_link(self):
+        hold = HoldService.capture(HoldService.place(self.wallet, Decimal('10.00')))
+        Transaction.objects.update(created_at=self.old)
+        ArchiveService.archive('wallet.Transaction')
+        self.assertFalse(Transaction.objects.exists())
+        self.assertEqual(WalletHold.objects.get(pk=hold.pk).transaction_id, hold.transaction_id)
+
+    def test_rows_added_while_writing_are_not_deleted(self):
+        storage = ArchiveService.storage()
+        save = storage.save
+        late = []
+
+        def save_then_insert(*args, **kwargs):
+            late.append(TransactionService.deposit(self.wallet, Decimal('1.00')))
+            Transaction.objects.filter(pk=late[0].pk).update(created_at=self.old)
+            return save(*args, **kwargs)
+
+        with mock.patch.object(storage, 'save', side_effect=save_then_insert):
+            self.assertEqual(ArchiveService.archive_range(
+                'wallet.Transaction', self.old - timedelta(days=1), self.old + timedelta(days=1)
+            ), 2)
+        self.assertEqual(list(Transaction.objects.values_list('pk', flat=True)), [late[0].pk])
+        self.assertEqual(ArchiveSegment.objects.get().row_count, 2)
+
+
+class TransactionQueryBudgetTests(QueryBudgetMixin, WalletTestCase):
+    def add_transfers(self, n):
+        for _ in range(n):
+            TransactionService.transfer(self.wallet, 'bob@example.com', Decimal('1.00'), '1234')
+
+    def test_transaction_list(self):
+        self.assertQueriesDoNotScale(lambda: self.client.get('/api/wallet/transactions/'), self.add_transfers)
+
+    def test_transaction_detail(self):
+        url = f'/api/wallet/transactions/{Transaction.objects.get().pk}/'
+        self.assertQueriesDoNotScale(lambda: self.client.get(url), self.add_transfers)
+
+
+class ShardedBalanceTests(WalletTestCase):
+    def setUp(self):
+        super().setUp()
+        self.merchant = WalletService.get_or_create_wallet(self.bob)
+        BalanceShardService.configure(self.merchant, 4)
+        self.merchant.refresh_from_db()
+
+    def shard_total(self):
+        return sum(WalletBalanceShard.objects.filter(wallet=self.merchant).values_list('balance', flat=True))
+
+    def test_credits_land_on_shards_without_running_balance(self):
+        for _ in range(5):
+            txn = TransactionService.deposit(self.merchant, Decimal('10.00'))
+            self.assertIsNone(txn.balance_before)
+            self.assertIsNone(txn.balance_after)
+        transfer = TransactionService.transfer(self.wallet, 'bob@example.com', Decimal('5.00'), '1234')
+        credit = Transaction.objects.get(wallet=self.merchant, recipient_email='alice@example.com')
+        self.assertIsNone(credit.balance_after)
+        self.assertIsNotNone(transfer.balance_after)
+        self.assertEqual(self.refresh(self.merchant).balance, Decimal('0.00'))
+        self.assertEqual(self.shard_total(), Decimal('55.00'))
+        response = self.client_for(self.bob).get(f'/api/wallet/{self.merchant.pk}/')
+        self.assertEqual(response.data['balance'], '55.00')
+
+    def test_debit_folds_shards_first(self):
+        TransactionService.deposit(self.merchant, Decimal('30.00'))
+        txn = TransactionService.withdraw(self.merchant, Decimal('20.00'), '1234')
+        self.assertEqual(txn.balance_before, Decimal('30.00'))
+        self.assertEqual(self.shard_total(), Decimal('0.00'))
+        self.assertEqual(self.refresh(self.merchant).balance, Decimal('30.00') - txn.amount - txn.fee)
+
+    def test_overdraft_is_rejected_after_folding(self):
+        TransactionService.deposit(self.merchant, Decimal('30.00'))
+        with self.assertRaisesMessage(ValueError, 'Insufficient balance'):
+            TransactionService.withdraw(self.merchant, Decimal('31.00'), '1234')
+        self.assertEqual(self.shard_total() + self.refresh(self.merchant).balance, Decimal('30.00'))
+
+    def test_fold_job_and_reconciliation(self):
+        for _ in range(3):
+            TransactionService.deposit(self.merchant, Decimal('7.00'))
+        row = ReconciliationService.annotated_wallets(Wallet.objects.filter(pk=self.merchant.pk)).get()
+        self.assertEqual(row.current_balance, Decimal('21.00'))
+        self.assertEqual(row.current_balance, row.transaction_balance)
+        self.assertEqual(row.current_balance, row.ledger_balance)
+        self.assertEqual(BalanceShardService.fold_all(), 1)
+        self.assertEqual(self.refresh(self.merchant).balance, Decimal('21.00'))
+        self.assertEqual(self.shard_total(), Decimal('0.00'))
+
+    def test_disabling_folds_and_removes_shards(self):
+        TransactionService.deposit(self.merchant, Decimal('4.00'))
+        BalanceShardService.configure(self.merchant, 0)
+        self.assertFalse(WalletBalanceShard.objects.filter(wallet=self.merchant).exists())
+        self.assertEqual(self.refresh(self.merchant).balance, Decimal('4.00'))
+        txn = TransactionService.deposit(self.merchant, Decimal('1.00'))
+        self.assertEqual(txn.balance_after, Decimal('5.00'))
+
+
+class FlakyPublisher:
+    """Fails every event whose id is in `poison`"""
+
+    def __init__(self, poison=()):
+        self.poison = set(poison)
+        self.published = []
+
+    def publish(self, events):
+        for event in events:
+            if event.id in self.poison:
+                raise RuntimeError('broker rejected event')
+            self.published.append(event.id)
+
+
+@override_settings(OUTBOX_MAX_ATTEMPTS=3)
+class OutboxRelayTests(WalletTestCase):
+    def setUp(self):
+        super().setUp()
+        # Failed publishes are logged with tracebacks; keep the test output clean
+        logging.disable(logging.ERROR)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        OutboxEvent.objects.all().delete()
+        self.events = [
+            OutboxEvent.objects.create(event_type='test', aggregate_type='test', aggregate_id=uuid.uuid4(), payload={})
+            for _ in range(3)
+        ]
+
+    def test_failing_event_does_not_block_the_rest(self):
+        publisher = FlakyPublisher(poison={self.events[1].id})
+        self.assertEqual(OutboxRelay.relay(publisher=publisher), 2)
+        self.assertEqual(publisher.published, [self.events[0].id, self.events[2].id])
+        failed = OutboxEvent.objects.get(pk=self.events[1].pk)
+        self.assertIsNone(failed.published_at)
+        self.assertEqual(failed.attempts, 1)
+        self.assertEqual(failed.last_error, 'broker rejected event')
+
+    def test_failed_event_backs_off(self):
+        OutboxRelay.relay(publisher=FlakyPublisher(poison={self.events[1].id}))
+        failed = OutboxEvent.objects.get(pk=self.events[1].pk)
+        self.assertGreater(failed.next_attempt_at, timezone.now())
+        self.assertEqual(OutboxRelay.relay(publisher=FlakyPublisher()), 0)
+        self.assertEqual(OutboxRelay.retry_delay(1), settings.OUTBOX_RETRY_BASE_DELAY)
+        self.assertEqual(OutboxRelay.retry_delay(3), settings.OUTBOX_RETRY_BASE_DELAY * 4)
+        self.assertEqual(OutboxRelay.retry_delay(50), settings.OUTBOX_RETRY_MAX_DELAY)
+
+    def test_event_is_dead_lettered_after_max_attempts(self):
+        publisher = FlakyPublisher(poison={self.events[1].id})
+        for _ in range(3):
+            OutboxEvent.objects.filter(pk=self.events[1].pk).update(next_attempt_at=timezone.now())
+            OutboxRelay.relay(publisher=publisher)
+        failed = OutboxEvent.objects.get(pk=self.events[1].pk)
+        self.assertEqual(failed.attempts, 3)
+        self.assertIsNotNone(failed.dead_lettered_at)
+        OutboxEvent.objects.filter(pk=failed.pk).update(next_attempt_at=timezone.now())
+        self.assertEqual(OutboxRelay.claim(), [])
+        self.assertEqual(OutboxRelay.requeue(OutboxEvent.objects.filter(pk=failed.pk)), 1)
+        self.assertEqual(OutboxRelay.relay(publisher=FlakyPublisher()), 1)
+
+    def test_claimed_events_are_leased(self):
+        claimed = OutboxRelay.claim()
+        self.assertEqual(len(claimed), 3)
+        self.assertEqual(OutboxRelay.claim(), [])
+
+
+class TransferLimitBackendTests(WalletTestCase):
+    def use_backend(self, path):
+        override = override_settings(TRANSFER_LIMIT_BACKEND=path)
+        override.enable()
+        get_limit_backend.cache_clear()
+        InMemoryLimitBackend.reset()
+        self.addCleanup(get_limit_backend.cache_clear)
+        self.addCleanup(override.disable)
+
+    def assert_row_limit_enforced(self):
+        limit = TransferLimitService.get_or_create_limit(self.alice)
+        TransferLimit.objects.filter(pk=limit.pk).update(daily_limit=Decimal('10.00'))
+        TransactionService.transfer(self.wallet, 'bob@example.com', Decimal('6.00'), '1234')
+        with self.assertRaisesMessage(ValueError, 'Daily transfer limit exceeded. Remaining: 4.00'):
+            TransactionService.transfer(self.wallet, 'bob@example.com', Decimal('6.00'), '1234')
+        status = TransferLimitService.get_limit_status(self.alice)
+        self.assertEqual((status.daily_limit, status.daily_used), (Decimal('10.00'), Decimal('6.00')))
+
+    def test_database_backend_uses_transfer_limit_row(self):
+        self.use_backend('wallet.limits.DatabaseLimitBackend')
+        self.assert_row_limit_enforced()
+
+    def test_counter_backend_uses_transfer_limit_row(self):
+        self.use_backend('wallet.limits.InMemoryLimitBackend')
+        self.assert_row_limit_enforced()
+
+    def test_counter_backend_does_not_write_transfer_limit_row(self):
+        self.use_backend('wallet.limits.InMemoryLimitBackend')
+        TransactionService.transfer(self.wallet, 'bob@example.com', Decimal('1.00'), '1234')
+        with CaptureQueriesContext(connection) as ctx:
+            TransactionService.transfer(self.wallet, 'bob@example.com', Decimal('1.00'), '1234')
+        self.assertFalse([q['sql'] for q in ctx.captured_queries if 'transfer_limits' in q['sql']])
+        self.assertFalse(TransferLimit.objects.filter(user=self.alice).exists())
+
+    def test_counter_backend_sees_saved_limit_change(self):
+        self.use_backend('wallet.limits.InMemoryLimitBackend')
+        TransactionService.transfer(self.wallet, 'bob@example.com', Decimal('6.00'), '1234')
+        with self.captureOnCommitCallbacks(execute=True):
+            TransferLimit.objects.create(user=self.alice, daily_limit=Decimal('10.00'))
+        with self.assertRaisesMessage(ValueError, 'Daily transfer limit exceeded. Remaining: 4.00'):
+            TransactionService.transfer(self.wallet, 'bob@example.com', Decimal('6.00'), '1234')
+
+
+class StandingOrderTests(WalletTestCase):
+    def setUp(self):
+        super().setUp()
+        self.start = timezone.now() - timedelta(minutes=1)
+        self.order = StandingOrderService.create(
+            self.wallet, 'bob@example.com', Decimal('10.00'), FREQUENCY_DAILY, self.start, pin='1234'
+        )
+
+    def test_run_pays_and_advances_schedule(self):
+        self.assertEqual(StandingOrderService.run_due(), 1)
+        order = StandingOrder.objects.get(pk=self.order.pk)
+        self.assertEqual(order.last_status, STATUS_COMPLETED)
+        self.assertEqual(order.next_run_at, self.start + timedelta(days=1))
+        self.assertIsNone(order.claimed_until)
+        self.assertTrue(Transaction.objects.filter(reference=order.last_reference).exists())
+
+    def test_crash_after_claim_is_retried_once_lease_lapses(self):
+        now = timezone.now()
+        StandingOrderService.claim_due(now, 10)  # the sweeper dies before paying
+        order = StandingOrder.objects.get(pk=self.order.pk)
+        self.assertEqual(order.next_run_at, self.start)
+        self.assertEqual(StandingOrderService.run_due(now), 0)
+        later = now + settings.STANDING_ORDER_CLAIM_TIMEOUT + timedelta(seconds=1)
+        self.assertEqual(StandingOrderService.run_due(later), 1)
+        order.refresh_from_db()
+        self.assertEqual(order.last_status, STATUS_COMPLETED)
+        self.assertEqual(order.run_count, 1)
+        self.assertEqual(Transaction.objects.filter(wallet=self.wallet, recipient_email='bob@example.com').count(), 1)
+
+    def test_reclaimed_order_is_not_paid_by_stale_sweeper(self):
+        now = timezone.now()
+        stale = StandingOrderService.claim_due(now, 10)
+        later = now + settings.STANDING_ORDER_CLAIM_TIMEOUT + timedelta(seconds=1)
+        StandingOrderService.run_due(later)
+        StandingOrderService.execute(stale, now)
+        self.assertEqual(Transaction.objects.filter(wallet=self.wallet, recipient_email='bob@example.com').count(), 1)
+
+    def test_failed_transfer_is_recorded(self):
+        StandingOrder.objects.filter(pk=self.order.pk).update(amount=Decimal('1000.00'))
+        StandingOrderService.run_due()
+        order = StandingOrder.objects.get(pk=self.order.pk)
+        self.assertEqual((order.last_status, order.last_error), (STATUS_FAILED, 'Insufficient balance'))
+        self.assertEqual(order.next_run_at, self.start + timedelta(days=1))
+
+
+class BalanceTests(WalletTestCase):
+    def test_conditional_update_rejects_overdraft_from_stale_instance(self):
+        stale = Wallet.objects.get(pk=self.wallet.pk)
+        stale.balance = stale.available_balance = Decimal('1000.00')
+        with self.assertRaisesMessage(ValueError, 'Insufficient balance'), transaction.atomic():
+            BalanceService.debit(stale, Decimal('150.00'))
+        self.assertEqual(self.refresh(self.wallet).balance, Decimal('100.00'))
+
+    def test_overdrawing_withdrawal_changes_nothing(self):
+        with self.assertRaisesMessage(ValueError, 'Insufficient balance'):
+            TransactionService.withdraw(self.wallet, Decimal('100.01'), '1234')
+        wallet = self.refresh(self.wallet)
+        self.assertEqual((wallet.balance, wallet.available_balance), (Decimal('100.00'), Decimal('100.00')))
+        self.assertEqual(Transaction.objects.filter(wallet=wallet).count(), 1)
+
+    def test_wallets_are_locked_in_primary_key_order(self):
+        bob_wallet = WalletService.get_or_create_wallet(self.bob)
+        with CaptureQueriesContext(connection) as context, transaction.atomic():
+            BalanceService.lock_wallets(bob_wallet, self.wallet)
+        pk = f'ORDER BY "{Wallet._meta.db_table}"."{Wallet._meta.pk.column}" ASC'
+        self.assertTrue(any(pk in query['sql'] for query in context.captured_queries))
+
+
+class RetryOnConflictTests(TransactionTestCase):
+    def flaky(self, error, failures=1):
+        calls = []
+
+        @retry_on_conflict(base_delay=0)
+        def work():
+            calls.append(1)
+            if len(calls) <= failures:
+                raise OperationalError(error)
+            return 'done'
+        return work, calls
+
+    def test_deadlock_is_retried(self):
+        work, calls = self.flaky('deadlock detected')
+        self.assertEqual(work(), 'done')
+        self.assertEqual(len(calls), 2)
+
+    def test_gives_up_after_attempts(self):
+        work, calls = self.flaky('database is locked', failures=5)
+        with self.assertRaises(OperationalError):
+            work()
+        self.assertEqual(len(calls), 3)
+
+    def test_other_errors_are_not_retried(self):
+        work, calls = self.flaky('no such table')
+        with self.assertRaises(OperationalError):
+            work()
+        self.assertEqual(len(calls), 1)
+
+    def test_not_retried_inside_enclosing_transaction(self):
+        work, calls = self.flaky('deadlock detected')
+        with self.assertRaises(OperationalError), transaction.atomic():
+            work()
+        self.assertEqual(len(calls), 1)
+
+
+class LedgerTests(WalletTestCase):
+    def test_every_entry_balances_per_currency(self):
+        eur = WalletService.get_or_create_wallet(self.alice, 'EUR')
+        TransactionService.deposit(eur, Decimal('20.00'))
+        TransactionService.transfer(self.wallet, 'bob@example.com', Decimal('10.00'), '1234')
+        TransactionService.transfer(eur, 'bob@example.com', Decimal('5.00'), '1234')
+        TransactionService.withdraw(self.wallet, Decimal('7.50'), '1234')
+        TransactionService.batch_transfer(self.wallet, [
+            {'recipient_email': 'bob@example.com', 'amount': Decimal('1.00')},
+            {'recipient_email': 'nobody@example.com', 'amount': Decimal('1.00')},
+        ], '1234')
+        HoldService.capture(HoldService.place(self.wallet, Decimal('3.00')))
+        sums = Posting.objects.values('entry', 'currency').annotate(total=Sum('amount'))
+        self.assertGreater(len(sums), 6)
+        self.assertEqual({row['total'] for row in sums}, {Decimal('0.00')})
+        for wallet in Wallet.objects.all():
+            posted = wallet.postings.aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
+            self.assertEqual(posted, wallet.balance, wallet)
+
+    def test_unbalanced_entry_is_rejected(self):
+        bob_wallet = WalletService.get_or_create_wallet(self.bob, 'EUR')
+        legs = [LedgerService.wallet_leg(self.wallet, Decimal('-10.00')), LedgerService.wallet_leg(bob_wallet, Decimal('10.00'))]
+        with self.assertRaisesMessage(ValueError, 'Unbalanced journal entry'):
+            LedgerService.build_entry('TRANSFER', 'REF-1', legs)
+
+
+class HoldTests(WalletTestCase):
+    def test_place_reserves_available_balance_only(self):
+        HoldService.place(self.wallet, Decimal('40.00'))
+        wallet = self.refresh(self.wallet)
+        self.assertEqual((wallet.balance, wallet.available_balance), (Decimal('100.00'), Decimal('60.00')))
+        with self.assertRaisesMessage(ValueError, 'Insufficient balance'):
+            HoldService.place(wallet, Decimal('60.01'))
+
+    def test_partial_capture_returns_remainder(self):
+        hold = HoldService.capture(HoldService.place(self.wallet, Decimal('40.00')), Decimal('25.00'))
+        self.assertEqual((hold.status, hold.captured_amount), (HOLD_CAPTURED, Decimal('25.00')))
+        wallet = self.refresh(self.wallet)
+        self.assertEqual((wallet.balance, wallet.available_balance), (Decimal('75.00'), Decimal('75.00')))
+        with self.assertRaisesMessage(ValueError, 'Hold is not active'):
+            HoldService.capture(hold)
+
+    def test_release_returns_funds(self):
+        hold = HoldService.release(HoldService.place(self.wallet, Decimal('40.00')))
+        self.assertEqual(hold.status, HOLD_RELEASED)
+        self.assertEqual(self.refresh(self.wallet).available_balance, Decimal('100.00'))
+
+    def test_expired_hold_cannot_be_captured_and_is_returned(self):
+        hold = HoldService.place(self.wallet, Decimal('40.00'), expires_in=timedelta(minutes=5))
+        WalletHold.objects.filter(pk=hold.pk).update(expires_at=timezone.now() - timedelta(seconds=1))
+        with self.assertRaisesMessage(ValueError, 'has expired'):
+            HoldService.capture(hold)
+        self.assertEqual(HoldService.expire_due(), 1)
+        self.assertEqual(WalletHold.objects.get(pk=hold.pk).status, HOLD_EXPIRED)
+        wallet = self.refresh(self.wallet)
+        self.assertEqual((wallet.balance, wallet.available_balance), (Decimal('100.00'), Decimal('100.00')))
+        self.assertEqual(HoldService.expire_due(), 0)
+
+
+class SettlementTests(WalletTestCase):
+    def setUp(self):
+        super().setUp()
+        self.txn = SettlementService.submit(self.wallet, 'bob@example.com', Decimal('30.00'), '1234')
+        self.hold = WalletHold.objects.get(transaction=self.txn)
+        self.shard = SettlementService.shard_for(self.wallet.pk)
+
+    def bob_balance(self):
+        return WalletService.get_or_create_wallet(self.bob).balance
+
+    def test_submit_only_holds_funds(self):
+        self.assertEqual(self.txn.status, STATUS_PENDING)
+        wallet = self.refresh(self.wallet)
+        self.assertEqual(wallet.balance, Decimal('100.00'))
+        self.assertEqual(wallet.available_balance, Decimal('100.00') - self.hold.amount)
+
+    def test_settlement_captures_hold_and_credits_recipient(self):
+        self.assertEqual(SettlementService.settle_batch(self.shard), 1)
+        self.txn.refresh_from_db()
+        self.assertEqual(self.txn.status, STATUS_COMPLETED)
+        self.assertEqual(WalletHold.objects.get(pk=self.hold.pk).status, HOLD_CAPTURED)
+        wallet = self.refresh(self.wallet)
+        self.assertEqual((wallet.balance, wallet.available_balance), (Decimal('100.00') - self.hold.amount,) * 2)
+        self.assertEqual(self.bob_balance(), Decimal('30.00'))
+
+    def test_hold_expired_while_queued_fails_and_returns_funds(self):
+        WalletHold.objects.filter(pk=self.hold.pk).update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(SettlementService.settle_batch(self.shard), 1)
+        self.txn.refresh_from_db()
+        self.assertEqual(self.txn.status, STATUS_FAILED)
+        self.assertEqual(WalletHold.objects.get(pk=self.hold.pk).status, HOLD_EXPIRED)
+        wallet = self.refresh(self.wallet)
+        self.assertEqual((wallet.balance, wallet.available_balance), (Decimal('100.00'), Decimal('100.00')))
+        self.assertEqual(self.bob_balance(), Decimal('0.00'))
+
+    def test_hold_already_expired_by_sweeper_is_not_returned_twice(self):
+        WalletHold.objects.filter(pk=self.hold.pk).update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(HoldService.expire_due(), 1)
+        self.assertEqual(SettlementService.settle_batch(self.shard), 1)
+        self.txn.refresh_from_db()
+        self.assertEqual(self.txn.status, STATUS_FAILED)
+        wallet = self.refresh(self.wallet)
+        self.assertEqual((wallet.balance, wallet.available_balance), (Decimal('100.00'), Decimal('100.00')))
+        self.assertEqual(SettlementService.settle_batch(self.shard), 0)
+
+    def test_submits_share_the_daily_limit(self):
+        limit = TransferLimitService.get_or_create_limit(self.alice)
+        TransferLimit.objects.filter(pk=limit.pk).update(daily_limit=Decimal('50.00'))
+        available = self.refresh(self.wallet).available_balance
+        with self.assertRaisesMessage(ValueError, 'Daily transfer limit exceeded. Remaining: 20.00'):
+            SettlementService.submit(self.wallet, 'bob@example.com', Decimal('30.00'), '1234')
+        self.assertEqual(self.refresh(self.wallet).available_balance, available)
+        self.assertEqual(WalletHold.objects.filter(wallet=self.wallet).count(), 1)
+
+
+class DateParamTests(WalletTestCase):
+    def test_impossible_dates_are_rejected(self):
+        for url in ('/api/wallet/transactions/', '/api/wallet/transactions/export/'):
+            response = self.client.get(url, {'start_date': '2024-02-30'})
+            self.assertEqual(response.status_code, 400, url)
+            self.assertIn('start_date', response.data)
+
+
+class BalanceAtTests(WalletTestCase):
+    def url(self, at):
+        return f'/api/wallet/{self.wallet.pk}/balance-at/?at={at}'
+
+    def test_balance_at_reads_the_ledger(self):
+        before = (timezone.now() - timedelta(days=1)).strftime('%Y-%m-%dT%H:%M:%S')
+        self.assertEqual(self.client.get(self.url(before)).data['balance'], Decimal('0.00'))
+        self.assertEqual(self.client.get(f'/api/wallet/{self.wallet.pk}/balance-at/').data['balance'], Decimal('100.00'))
+
+    def test_invalid_timestamp_is_rejected(self):
+        for at in ('2024-13-01T00:00:00', 'yesterday'):
+            response = self.client.get(self.url(at))
+            self.assertEqual(response.status_code, 400, at)
+            self.assertEqual(response.data, {'error': "Invalid 'at' timestamp"})
+
+
+class PinTokenFlowTests(WalletTestCase):
+    def pin_token(self, scopes):
+        response = self.client.post('/api/auth/verify-pin/', {'pin': '1234', 'scopes': scopes}, format='json')
+        self.assertTrue(response.data['valid'])
+        return response.data['pin_token']
+
+    def test_token_authorizes_transfer_and_withdraw(self):
+        token = self.pin_token(['transfer', 'withdraw'])
+        transfer = self.client.post('/api/wallet/transfer/', {
+            'recipient_email': 'bob@example.com', 'amount': '10.00', 'pin_token': token
+        }, format='json')
+        self.assertEqual(transfer.status_code, 201, transfer.data)
+        withdraw = self.client.post('/api/wallet/withdraw/', {'amount': '5.00', 'pin_token': token}, format='json')
+        self.assertEqual(withdraw.status_code, 201, withdraw.data)
+        self.assertEqual(Transaction.objects.filter(wallet=self.wallet).count(), 3)
+
+    def test_token_outside_its_scope_is_refused(self):
+        token = self.pin_token(['transfer'])
+        response = self.client.post('/api/wallet/withdraw/', {'amount': '5.00', 'pin_token': token}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.refresh(self.wallet).balance, Decimal('100.00'))
+
+
+class BatchTransferTests(WalletTestCase):
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            FeeConfiguration.objects.create(
+                transaction_type=TRANSACTION_TRANSFER, fee_type='FIXED', fixed_amount=Decimal('1.00')
+            )
+        self.addCleanup(FeeSchedule.invalidate)
+        self.carol = make_user('carol@example.com')
+
+    def items(self, *pairs):
+        return [{'recipient_email': email, 'amount': Decimal(amount)} for email, amount in pairs]
+
+    def test_failed_items_do_not_abort_the_batch(self):
+        result = TransactionService.batch_transfer(self.wallet, self.items(
+            ('bob@example.com', '10.00'),
+            ('nobody@example.com', '5.00'),
+            ('alice@example.com', '5.00'),
+            ('carol@example.com', '0.00'),
+            ('carol@example.com', '20.00'),
+        ), '1234')
+        self.assertEqual((result['total'], result['succeeded'], result['failed']), (5, 2, 3))
+        self.assertEqual([r.get('error') for r in result['results']], [
+            None, 'Recipient not found', 'Cannot transfer to yourself',
+            'Transfer amount must be greater than zero', None,
+        ])
+        self.assertEqual((result['total_amount'], result['total_fees']), (Decimal('30.00'), Decimal('2.00')))
+        self.assertEqual(self.refresh(self.wallet).balance, Decimal('68.00'))
+        self.assertEqual(WalletService.get_or_create_wallet(self.carol).balance, Decimal('20.00'))
+
+    def test_later_items_see_funds_spent_by_earlier_ones(self):
+        result = TransactionService.batch_transfer(self.wallet, self.items(
+            ('bob@example.com', '40.00'),
+            ('carol@example.com', '40.00'),
+            ('bob@example.com', '40.00'),
+            ('carol@example.com', '17.00'),
+        ), '1234')
+        self.assertEqual(
+            [(r['status'], r.get('error')) for r in result['results']],
+            [(STATUS_COMPLETED, None), (STATUS_COMPLETED, None), (STATUS_FAILED, 'Insufficient balance'),
+             (STATUS_COMPLETED, None)]
+        )
+        wallet = self.refresh(self.wallet)
+        self.assertEqual((wallet.balance, wallet.available_balance), (Decimal('0.00'), Decimal('0.00')))
+
+    def test_limit_error_fails_only_that_item(self):
+        TransferLimit.objects.create(user=self.alice, daily_limit=Decimal('15.00'))
+        result = TransactionService.batch_transfer(self.wallet, self.items(
+            ('bob@example.com', '10.00'),
+            ('carol@example.com', '10.00'),
+            ('carol@example.com', '5.00'),
+        ), '1234')
+        self.assertEqual([r['status'] for r in result['results']], [STATUS_COMPLETED, STATUS_FAILED, STATUS_COMPLETED])
+        self.assertEqual(result['results'][1]['error'], 'Daily transfer limit exceeded. Remaining: 5.00')
+        self.assertEqual(TransferLimitService.get_limit_status(self.alice).daily_used, Decimal('15.00'))
+        self.assertEqual(self.refresh(self.wallet).balance, Decimal('83.00'))
+
+    def test_one_balanced_journal_entry_per_paid_item(self):
+        result = TransactionService.batch_transfer(self.wallet, self.items(
+            ('bob@example.com', '10.00'),
+            ('nobody@example.com', '5.00'),
+            ('carol@example.com', '20.00'),
+        ), '1234')
+        references = [r['reference'] for r in result['results'] if r['status'] == STATUS_COMPLETED]
+        entries = JournalEntry.objects.filter(reference__in=references)
+        self.assertEqual(sorted(entries.values_list('reference', flat=True)), sorted(references))
+        sums = Posting.objects.filter(entry__in=entries).values('entry').annotate(total=Sum('amount'))
+        self.assertEqual({row['total'] for row in sums}, {Decimal('0.00')})
+        for wallet in Wallet.objects.all():
+            posted = wallet.postings.aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
+            self.assertEqual(posted, wallet.balance, wallet)
+
+    def test_view_reports_per_item_results(self):
+        response = self.client.post('/api/wallet/transfer/batch/', {'pin': '1234', 'transfers': [
+            {'recipient_email': 'bob@example.com', 'amount': '10.00'},
+            {'recipient_email': 'nobody@example.com', 'amount': '5.00'},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data['message'], '1 of 2 transfers completed')
+        self.assertEqual(response.data['results'][1]['error'], 'Recipient not found')
+
+    def test_view_rejects_oversized_batch(self):
+        transfers = [{'recipient_email': 'bob@example.com', 'amount': '0.01'}] * (settings.BATCH_TRANSFER_MAX_ITEMS + 1)
+        response = self.client.post('/api/wallet/transfer/batch/', {'pin': '1234', 'transfers': transfers}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('transfers', response.data)
+        self.assertEqual(self.refresh(self.wallet).balance, Decimal('100.00'))
+
+
+class FeeScheduleTestCase(WalletTestCase):
+    """Seeds one fee configuration of each kind plus an inactive one"""
+
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(FeeSchedule.invalidate)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.transfer_fee = FeeConfiguration.objects.create(
+                transaction_type=TRANSACTION_TRANSFER, fee_type='FIXED', fixed_amount=Decimal('1.00')
+            )
+            FeeConfiguration.objects.create(
+                transaction_type=TRANSACTION_WITHDRAWAL, fee_type='PERCENTAGE', percentage=Decimal('2.00'),
+                minimum_fee=Decimal('0.50'), maximum_fee=Decimal('5.00')
+            )
+            FeeConfiguration.objects.create(
+                transaction_type=TRANSACTION_CRYPTO_BUY, fee_type='HYBRID', fixed_amount=Decimal('0.30'),
+                percentage=Decimal('1.50')
+            )
+            FeeConfiguration.objects.create(
+                transaction_type=TRANSACTION_DEPOSIT, fee_type='FIXED', fixed_amount=Decimal('9.99'), is_active=False
+            )
+        FeeSchedule.configurations()
+
+
+class FeeScheduleTests(FeeScheduleTestCase):
+    EXPECTED = [
+        (TRANSACTION_TRANSFER, '250.00', '1.00'),
+        (TRANSACTION_WITHDRAWAL, '10.00', '0.50'),
+        (TRANSACTION_WITHDRAWAL, '100.00', '2.00'),
+        (TRANSACTION_WITHDRAWAL, '1000.00', '5.00'),
+        (TRANSACTION_CRYPTO_BUY, '100.00', '1.80'),
+        (TRANSACTION_DEPOSIT, '100.00', '0.00'),
+        (TRANSACTION_LOAN_REPAYMENT, '100.00', '0.00'),
+    ]
+
+    def test_calculate_fee_matches_seeded_schedule(self):
+        for transaction_type, amount, fee in self.EXPECTED:
+            self.assertEqual(TransactionService.calculate_fee(transaction_type, Decimal(amount)), Decimal(fee),
+                             (transaction_type, amount))
+
+    def test_lookups_are_served_from_memory(self):
+        with self.assertNumQueries(0):
+            for transaction_type, amount, _ in self.EXPECTED:
+                TransactionService.calculate_fee(transaction_type, Decimal(amount))
+
+    def test_change_takes_effect_on_commit(self):
+        version = cache.get(FEE_SCHEDULE_VERSION_KEY)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.transfer_fee.fixed_amount = Decimal('2.50')
+            self.transfer_fee.save()
+            self.assertEqual(TransactionService.calculate_fee(TRANSACTION_TRANSFER, Decimal('10.00')), Decimal('1.00'))
+        self.assertNotEqual(cache.get(FEE_SCHEDULE_VERSION_KEY), version)
+        self.assertEqual(TransactionService.calculate_fee(TRANSACTION_TRANSFER, Decimal('10.00')), Decimal('2.50'))
+
+    def test_rolled_back_change_keeps_schedule(self):
+        version = cache.get(FEE_SCHEDULE_VERSION_KEY)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(RuntimeError):
+                with transaction.atomic():
+                    self.transfer_fee.fixed_amount = Decimal('2.50')
+                    self.transfer_fee.save()
+                    raise RuntimeError
+        self.assertEqual(callbacks, [])
+        self.assertEqual(cache.get(FEE_SCHEDULE_VERSION_KEY), version)
+        self.assertEqual(TransactionService.calculate_fee(TRANSACTION_TRANSFER, Decimal('10.00')), Decimal('1.00'))
+
+    def test_other_workers_reload_after_version_bump(self):
+        FeeConfiguration.objects.filter(pk=self.transfer_fee.pk).update(fixed_amount=Decimal('2.50'))
+        cache.set(FEE_SCHEDULE_VERSION_KEY, uuid.uuid4().hex, None)
+        self.assertEqual(TransactionService.calculate_fee(TRANSACTION_TRANSFER, Decimal('10.00')), Decimal('1.00'))
+        with override_settings(FEE_SCHEDULE_MAX_STALENESS=0):
+            self.assertEqual(TransactionService.calculate_fee(TRANSACTION_TRANSFER, Decimal('10.00')), Decimal('2.50'))
+
+
+class BatchFeeQuoteTests(QueryBudgetMixin, FeeScheduleTestCase):
+    def quotes(self, n):
+        pairs = [(t, Decimal(a)) for t, a, _ in FeeScheduleTests.EXPECTED]
+        return [(pairs[i % len(pairs)][0], pairs[i % len(pairs)][1] + i) for i in range(n)]
+
+    def test_batch_fees_equal_single_quotes(self):
+        quotes = self.quotes(50)
+        self.assertEqual(
+            TransactionService.calculate_fees(quotes),
+            [TransactionService.calculate_fee(t, amount) for t, amount in quotes]
+        )
+
+    def test_batch_loads_schedule_once(self):
+        FeeSchedule.invalidate()
+        with self.assertNumQueries(1):
+            TransactionService.calculate_fees(self.quotes(100))
+
+    def test_view_quotes_in_order(self):
+        quotes = self.quotes(10)
+        response = self.client.post('/api/wallet/calculate-fee/batch/', {'quotes': [
+            {'transaction_type': t, 'amount': str(amount)} for t, amount in quotes
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(
+            [(q['transaction_type'], q['amount'], q['fee'], q['total']) for q in response.data['quotes']],
+            [(t, amount, fee, amount + fee) for (t, amount), fee in zip(quotes, TransactionService.calculate_fees(quotes))]
+        )
+
+    def test_view_queries_do_not_scale(self):
+        quotes = []
+
+        def request():
+            FeeSchedule.invalidate()
+            response = self.client.post('/api/wallet/calculate-fee/batch/', {'quotes': [
+                {'transaction_type': t, 'amount': str(amount)} for t, amount in quotes
+            ]}, format='json')
+            self.assertEqual(response.status_code, 200)
+
+        self.assertQueriesDoNotScale(request, lambda n: quotes.extend(self.quotes(n)))
+
+    def test_view_rejects_oversized_batch(self):
+        quotes = [{'transaction_type': TRANSACTION_TRANSFER, 'amount': '1.00'}] * (settings.FEE_QUOTE_MAX_ITEMS + 1)
+        response = self.client.post('/api/wallet/calculate-fee/batch/', {'quotes': quotes}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class BalanceSnapshotTests(WalletTestCase):
+    def balances(self, client=None):
+        response = (client or self.client).get('/api/wallet/balance/')
+        self.assertEqual(response.status_code, 200)
+        return {(w['currency'], w['balance'], w['available_balance']) for w in response.data['wallets']}
+
+    def test_reads_are_served_from_the_snapshot(self):
+        self.balances()
+        self.client.get('/api/wallet/')
+        with self.assertNumQueries(0):
+            self.balances()
+            self.assertEqual(self.client.get('/api/wallet/').status_code, 200)
+
+    def test_snapshot_is_dropped_on_commit(self):
+        self.balances()
+        with self.captureOnCommitCallbacks(execute=True):
+            BalanceService.debit(self.wallet, Decimal('10.00'))
+            self.assertEqual(self.balances(), {('USD', '100.00', '100.00')})
+        self.assertEqual(self.balances(), {('USD', '90.00', '90.00')})
+
+    def test_balance_changes_drop_the_snapshot(self):
+        changes = [
+            ('debit', lambda: BalanceService.debit(self.wallet, Decimal('10.00')), ('90.00', '90.00')),
+            ('credit', lambda: BalanceService.credit(self.wallet, Decimal('10.00')), ('100.00', '100.00')),
+            ('hold', lambda: BalanceService.hold(self.wallet, Decimal('10.00')), ('100.00', '90.00')),
+            ('release', lambda: BalanceService.release(self.wallet, Decimal('10.00')), ('100.00', '100.00')),
+        ]
+        for name, change, (balance, available) in changes:
+            with self.subTest(name):
+                self.balances()
+                with self.captureOnCommitCallbacks(execute=True):
+                    change()
+                self.assertEqual(self.balances(), {('USD', balance, available)})
+
+    def test_transfer_drops_both_users_snapshots(self):
+        bob = self.client_for(self.bob)
+        self.balances()
+        self.balances(bob)
+        with self.captureOnCommitCallbacks(execute=True):
+            TransactionService.transfer(self.wallet, 'bob@example.com', Decimal('25.00'), '1234')
+        self.assertEqual(self.balances(), {('USD', '75.00', '75.00')})
+        self.assertEqual(self.balances(bob), {('USD', '25.00', '25.00')})
+
+
+class StatementTests(FeeScheduleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.use_temp_archive()
+        media_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(media_dir.cleanup)
+        override = override_settings(MEDIA_ROOT=media_dir.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.month = add_months(timezone.localdate().replace(day=1), -5)
+        start, _ = StatementService.bounds(self.month)
+        TransactionService.deposit(self.wallet, Decimal('50.00'))
+        TransactionService.transfer(self.wallet, 'bob@example.com', Decimal('20.00'), '1234')
+        TransactionService.withdraw(self.wallet, Decimal('30.00'), '1234')
+        # The opening deposit lands in the previous month, the rest inside the statement month
+        for index, txn in enumerate(Transaction.objects.order_by('created_at', 'id')):
+            at = start + timedelta(days=index) if index else start - timedelta(days=10)
+            Transaction.objects.filter(pk=txn.pk).update(created_at=at)
+            Posting.objects.filter(entry__reference=txn.reference).update(created_at=at)
+
+    def test_totals_reconcile_with_archived_rows(self):
+        self.assertGreater(ArchiveService.archive('wallet.Transaction'), 0)
+        self.assertFalse(Transaction.objects.filter(wallet=self.wallet).exists())
+        statement = StatementService.generate(self.wallet, self.month)
+        self.assertEqual(
+            (statement.opening_balance, statement.total_credits, statement.total_debits, statement.closing_balance),
+            (Decimal('100.00'), Decimal('50.00'), Decimal('51.60'), Decimal('98.40'))
+        )
+        self.assertEqual(
+            statement.opening_balance + statement.total_credits - statement.total_debits, statement.closing_balance
+        )
+        self.assertEqual(statement.transaction_count, 3)
+        self.assertEqual(statement.closing_balance, self.refresh(self.wallet).balance)
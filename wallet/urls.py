@@ -9,21 +9,39 @@ urlpatterns = [
     path('<uuid:pk>/', views.WalletDetailView.as_view(), name='wallet_detail'),
     path('create/', views.CreateWalletView.as_view(), name='create_wallet'),
     path('balance/', views.WalletBalanceView.as_view(), name='wallet_balance'),
+    path('<uuid:pk>/balance-at/', views.WalletBalanceAtView.as_view(), name='wallet_balance_at'),
     
     # Transactions
     path('transactions/', views.TransactionListView.as_view(), name='transaction_list'),
     path('transactions/<uuid:pk>/', views.TransactionDetailView.as_view(), name='transaction_detail'),
     path('transactions/export/', views.ExportTransactionsView.as_view(), name='export_transactions'),
     
+    # Statements
+    path('statements/', views.StatementListView.as_view(), name='statement_list'),
+    path('statements/<uuid:pk>/download/', views.StatementDownloadView.as_view(), name='statement_download'),
+    
+    # Analytics
+    path('analytics/spending/', views.SpendingAnalyticsView.as_view(), name='spending_analytics'),
+    
     # Transfers
     path('transfer/', views.TransferView.as_view(), name='transfer'),
+    path('transfer/batch/', views.BatchTransferView.as_view(), name='batch_transfer'),
     path('deposit/', views.DepositView.as_view(), name='deposit'),
     path('withdraw/', views.WithdrawView.as_view(), name='withdraw'),
     
+    # Holds
+    path('holds/', views.WalletHoldListView.as_view(), name='hold_list'),
+    
+    # Standing orders
+    path('standing-orders/', views.StandingOrderListView.as_view(), name='standing_order_list'),
+    path('standing-orders/create/', views.CreateStandingOrderView.as_view(), name='create_standing_order'),
+    path('standing-orders/<uuid:pk>/cancel/', views.CancelStandingOrderView.as_view(), name='cancel_standing_order'),
+    
     # Limits
     path('limits/', views.TransferLimitsView.as_view(), name='transfer_limits'),
     
     # Fees
     path('fees/', views.FeeConfigurationListView.as_view(), name='fee_list'),
     path('calculate-fee/', views.CalculateFeeView.as_view(), name='calculate_fee'),
+    path('calculate-fee/batch/', views.BatchCalculateFeeView.as_view(), name='batch_calculate_fee'),
 ]
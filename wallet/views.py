@@ -1,14 +1,49 @@
-﻿from rest_framework import generics, status, permissions
+﻿import heapq
+import itertools
+from datetime import timedelta
+from rest_framework import generics, status, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework.exceptions import ValidationError
+from django.conf import settings
 from django.db.models import Q
-from .models import Wallet, Transaction, TransferLimit, FeeConfiguration
+from django.http import FileResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils import timezone
+from .models import Wallet, Transaction, TransferLimit, FeeConfiguration, Statement, StandingOrder, WalletHold
 from .serializers import (
     WalletSerializer, TransactionSerializer, TransferSerializer,
-    DepositSerializer, WithdrawSerializer, TransferLimitSerializer,
-    FeeConfigurationSerializer, CalculateFeeSerializer
+    BatchTransferSerializer, DepositSerializer, WithdrawSerializer, TransferLimitSerializer,
+    FeeConfigurationSerializer, CalculateFeeSerializer, BatchCalculateFeeSerializer, StatementSerializer,
+    StandingOrderSerializer, CreateStandingOrderSerializer, WalletHoldSerializer
 )
-from .services import WalletService, TransactionService, TransferLimitService
+from .services import (
+    WalletService, TransactionService, TransferLimitService, LedgerService, TransactionExportService,
+    ExchangeRateService, BalanceService
+)
+from .snapshots import BalanceSnapshotCache
+from .analytics import SpendingAnalyticsService
+from .standing_orders import StandingOrderService
+from .settlement import SettlementService
+from common.idempotency import idempotent
+from common.archive import ArchiveService
+from common.pagination import CreatedAtCursorPagination, MergedCursorPagination
+from common.constants import CURRENCY_CHOICES
+
+def parse_date_params(params, names=('start_date', 'end_date')):
+    """Parse YYYY-MM-DD query parameters; raise ValidationError (400) for malformed or impossible dates"""
+    dates = {}
+    for name in names:
+        value = params.get(name)
+        if value:
+            try:
+                dates[name] = parse_date(value)
+            except ValueError:
+                dates[name] = None
+            if dates[name] is None:
+                raise ValidationError({name: 'Use YYYY-MM-DD'})
+    return dates
 
 class WalletListView(generics.ListAPIView):
     """List all user wallets"""
@@ -16,7 +51,17 @@ class WalletListView(generics.ListAPIView):
     serializer_class = WalletSerializer
     
     def get_queryset(self):
-        return Wallet.objects.filter(user=self.request.user, is_active=True)
+        return BalanceService.with_unfolded_balance(
+            Wallet.objects.filter(user=self.request.user, is_active=True).select_related('user')
+        )
+    
+    def list(self, request, *args, **kwargs):
+        if request.query_params:
+            return super().list(request, *args, **kwargs)
+        data = BalanceSnapshotCache.get(
+            request.user, 'list', lambda: super(WalletListView, self).list(request, *args, **kwargs).data
+        )
+        return Response(data)
 
 class WalletDetailView(generics.RetrieveAPIView):
     """Get wallet details"""
@@ -24,7 +69,7 @@ class WalletDetailView(generics.RetrieveAPIView):
     serializer_class = WalletSerializer
     
     def get_queryset(self):
-        return Wallet.objects.filter(user=self.request.user)
+        return BalanceService.with_unfolded_balance(Wallet.objects.filter(user=self.request.user).select_related('user'))
 
 class CreateWalletView(APIView):
     """Create a new wallet"""
@@ -46,20 +91,70 @@ class WalletBalanceView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get(self, request):
-        wallets = Wallet.objects.filter(user=request.user, is_active=True)
+        display_currency = request.query_params.get('currency', 'USD').upper()
+        if display_currency not in dict(CURRENCY_CHOICES):
+            return Response({'error': f'Unsupported currency {display_currency}'}, status=status.HTTP_400_BAD_REQUEST)
+        snapshot = BalanceSnapshotCache.get(request.user, 'balance', lambda: self.build_snapshot(request.user))
+        holdings = snapshot['holdings']
+        total_usd, missing_usd = ExchangeRateService.consolidate(holdings, 'USD')
+        total, missing = ExchangeRateService.consolidate(holdings, display_currency)
         total_balance = {
-            'wallets': WalletSerializer(wallets, many=True).data,
-            'total_usd': sum(w.balance for w in wallets if w.currency == 'USD'),
+            'wallets': snapshot['wallets'],
+            'total_usd': total_usd,
+            'currency': display_currency,
+            'total': total,
+            # Currencies with no exchange rate yet; their wallets are left out of the totals
+            'missing_rates': sorted(set(missing_usd) | set(missing)),
         }
         return Response(total_balance)
+    
+    @staticmethod
+    def build_snapshot(user):
+        wallets = BalanceService.with_unfolded_balance(
+            Wallet.objects.filter(user=user, is_active=True).select_related('user')
+        )
+        return {
+            'wallets': WalletSerializer(wallets, many=True).data,
+            'holdings': [(w.total_balance, w.currency) for w in wallets],
+        }
+
+class WalletBalanceAtView(APIView):
+    """Get a wallet's balance at a point in time from the ledger"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request, pk):
+        try:
+            wallet = Wallet.objects.get(id=pk, user=request.user)
+        except Wallet.DoesNotExist:
+            return Response({'error': 'Wallet not found'}, status=status.HTTP_404_NOT_FOUND)
+        at = timezone.now()
+        if request.query_params.get('at'):
+            try:
+                at = parse_datetime(request.query_params['at'])
+            except ValueError:
+                at = None
+            if at is None:
+                return Response({'error': "Invalid 'at' timestamp"}, status=status.HTTP_400_BAD_REQUEST)
+            if timezone.is_naive(at):
+                at = timezone.make_aware(at)
+        return Response({
+            'wallet': wallet.id,
+            'currency': wallet.currency,
+            'at': at,
+            'balance': LedgerService.balance_at(wallet, at)
+        })
 
 class TransactionListView(generics.ListAPIView):
-    """List user transactions"""
+    """List user transactions, including archived ones, newest first"""
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = TransactionSerializer
+    pagination_class = MergedCursorPagination
+    
+    def get_dates(self):
+        return parse_date_params(self.request.query_params)
     
     def get_queryset(self):
-        queryset = Transaction.objects.filter(wallet__user=self.request.user)
+        queryset = Transaction.objects.filter(wallet__user=self.request.user).select_related('wallet__user')
         transaction_type = self.request.query_params.get('type')
         if transaction_type:
             queryset = queryset.filter(transaction_type=transaction_type)
@@ -69,7 +164,58 @@ class TransactionListView(generics.ListAPIView):
         currency = self.request.query_params.get('currency')
         if currency:
             queryset = queryset.filter(currency=currency)
-        return queryset.order_by('-created_at')
+        # created_at bounds let PostgreSQL prune monthly partitions
+        return TransactionExportService.filter_queryset(queryset, **self.get_dates())
+    
+    def list(self, request, *args, **kwargs):
+        self.wallets = {w.pk: w for w in Wallet.objects.filter(user=request.user).select_related('user')}
+        paginator = self.paginator
+        page = paginator.paginate(request, self.fetch)
+        return paginator.get_paginated_response(self.get_serializer(page, many=True).data)
+    
+    def fetch(self, position, newer, limit):
+        """
+        Up to `limit` transactions past position, merged from the hot table
+        and the archive: older ones newest first, or newer ones oldest first
+        """
+        queryset = self.get_queryset()
+        order = ('created_at', 'id') if newer else ('-created_at', '-id')
+        dates = self.get_dates()
+        start = TransactionExportService.start_of_day(dates['start_date']) if 'start_date' in dates else None
+        end = (
+            TransactionExportService.start_of_day(dates['end_date'] + timedelta(days=1))
+            if 'end_date' in dates else None
+        )
+        if position:
+            created_at, pk = position
+            if newer:
+                queryset = queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk))
+                start = max(start, created_at) if start else created_at
+            else:
+                queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+                edge = created_at + timedelta(microseconds=1)
+                end = min(end, edge) if end else edge
+        hot = queryset.order_by(*order)[:limit]
+        if not ArchiveService.entries('wallet.Transaction', list(self.wallets), start, end).exists():
+            return list(hot)
+        params = self.request.query_params
+        key = MergedCursorPagination.key
+        archived = (
+            ArchiveService.instance('wallet.Transaction', row)
+            for row in ArchiveService.iter_rows(
+                'wallet.Transaction', list(self.wallets), start, end, newest_first=not newer
+            )
+            if all(not params.get(param) or row[field] == params[param]
+                   for param, field in (('type', 'transaction_type'), ('status', 'status'), ('currency', 'currency')))
+        )
+        if position:
+            position = (position[0], str(position[1]))
+            archived = (txn for txn in archived if (key(txn) > position if newer else key(txn) < position))
+        merged = heapq.merge(hot.iterator(), archived, key=key, reverse=not newer)
+        transactions = list(itertools.islice(merged, limit))
+        for txn in transactions:
+            txn.wallet = self.wallets[txn.wallet_id]
+        return transactions
 
 class TransactionDetailView(generics.RetrieveAPIView):
     """Get transaction details"""
@@ -77,35 +223,134 @@ class TransactionDetailView(generics.RetrieveAPIView):
     serializer_class = TransactionSerializer
     
     def get_queryset(self):
-        return Transaction.objects.filter(wallet__user=self.request.user)
+        return Transaction.objects.filter(wallet__user=self.request.user).select_related('wallet__user')
 
 class ExportTransactionsView(APIView):
-    """Export transactions (returns JSON for now, can be enhanced to CSV/PDF)"""
+    """
+    Export transactions. ?export_format=csv or ndjson streams the rows from a
+    server-side cursor; the default JSON body is kept for existing clients.
+    Filters: type, start_date, end_date (YYYY-MM-DD, inclusive).
+    """
     permission_classes = [permissions.IsAuthenticated]
+    stream_formats = {
+        'csv': ('text/csv', TransactionExportService.stream_csv),
+        'ndjson': ('application/x-ndjson', TransactionExportService.stream_ndjson),
+    }
     
     def get(self, request):
-        transactions = Transaction.objects.filter(wallet__user=request.user).order_by('-created_at')
-        serializer = TransactionSerializer(transactions, many=True)
+        params = request.query_params
+        dates = parse_date_params(params)
+        transactions = TransactionExportService.filter_queryset(
+            Transaction.objects.filter(wallet__user=request.user),
+            transaction_type=params.get('type'),
+            **dates
+        )
+        wallets = {w.pk: w for w in Wallet.objects.filter(user=request.user).select_related('user')}
+        export_format = params.get('export_format', 'json')
+        if export_format in self.stream_formats:
+            archived = TransactionExportService.archived_rows(
+                list(wallets), transaction_type=params.get('type'), **dates
+            )
+            content_type, stream = self.stream_formats[export_format]
+            response = StreamingHttpResponse(stream(transactions, archived), content_type=content_type)
+            response['Content-Disposition'] = f'attachment; filename="transactions.{export_format}"'
+            return response
+        if export_format != 'json':
+            return Response({'error': 'export_format must be one of json, csv, ndjson'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        transactions = list(transactions.select_related('wallet__user').order_by('-created_at', '-id'))
+        archived = ArchiveService.instances('wallet.Transaction', TransactionExportService.archived_rows(
+            list(wallets), transaction_type=params.get('type'), **dates
+        ))
+        for txn in archived:
+            txn.wallet = wallets[txn.wallet_id]
+        data = TransactionSerializer(transactions + archived, many=True).data
         return Response({
-            'total_transactions': transactions.count(),
-            'transactions': serializer.data
+            'total_transactions': len(data),
+            'transactions': data
         })
 
+class StatementListView(generics.ListAPIView):
+    """List the user's monthly statements; ?wallet=<id> narrows to one wallet"""
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = StatementSerializer
+    
+    def get_queryset(self):
+        queryset = Statement.objects.filter(wallet__user=self.request.user).select_related('wallet')
+        wallet_id = self.request.query_params.get('wallet')
+        if wallet_id:
+            queryset = queryset.filter(wallet_id=wallet_id)
+        return queryset
+
+class StatementDownloadView(APIView):
+    """Download a stored statement file"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request, pk):
+        try:
+            statement = Statement.objects.select_related('wallet').get(id=pk, wallet__user=request.user)
+        except Statement.DoesNotExist:
+            return Response({'error': 'Statement not found'}, status=status.HTTP_404_NOT_FOUND)
+        filename = f"statement-{statement.wallet.currency}-{statement.period_start:%Y-%m}.csv"
+        return FileResponse(statement.file.open('rb'), as_attachment=True, filename=filename,
+                            content_type='text/csv')
+
+class SpendingAnalyticsView(APIView):
+    """
+    Spending by type and currency from the daily rollups.
+    Params: months (default 12), currency, granularity=month|day.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        params = request.query_params
+        try:
+            months = int(params.get('months', 12))
+        except ValueError:
+            months = 0
+        if not 1 <= months <= settings.ANALYTICS_MAX_MONTHS:
+            return Response({'error': f'months must be between 1 and {settings.ANALYTICS_MAX_MONTHS}'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        granularity = params.get('granularity', 'month')
+        if granularity not in SpendingAnalyticsService.GRANULARITIES:
+            return Response({'error': 'granularity must be month or day'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(SpendingAnalyticsService.spending(
+            request.user, months=months, currency=params.get('currency'), granularity=granularity
+        ))
+
 class TransferView(APIView):
     """Transfer money to another user"""
     permission_classes = [permissions.IsAuthenticated]
     
+    @idempotent
     def post(self, request):
         serializer = TransferSerializer(data=request.data, context={'request': request})
         serializer.is_valid(raise_exception=True)
         try:
             currency = serializer.validated_data.get('currency', 'USD')
             sender_wallet = WalletService.get_or_create_wallet(request.user, currency)
+            if serializer.validated_data['settle_async']:
+                transaction = SettlementService.submit(
+                    sender_wallet=sender_wallet,
+                    recipient_email=serializer.validated_data['recipient_email'],
+                    amount=serializer.validated_data['amount'],
+                    pin=serializer.validated_data.get('pin'),
+                    pin_token=serializer.validated_data.get('pin_token'),
+                    description=serializer.validated_data.get('description', '')
+                )
+                return Response({
+                    'message': 'Transfer accepted for settlement',
+                    'transaction': TransactionSerializer(transaction).data,
+                    'status_url': request.build_absolute_uri(
+                        reverse('wallet:transaction_detail', args=[transaction.pk])
+                    )
+                }, status=status.HTTP_202_ACCEPTED)
             transaction = TransactionService.transfer(
                 sender_wallet=sender_wallet,
                 recipient_email=serializer.validated_data['recipient_email'],
                 amount=serializer.validated_data['amount'],
-                pin=serializer.validated_data['pin'],
+                pin=serializer.validated_data.get('pin'),
+                pin_token=serializer.validated_data.get('pin_token'),
                 description=serializer.validated_data.get('description', '')
             )
             return Response({
@@ -115,10 +360,103 @@ class TransferView(APIView):
         except ValueError as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+class BatchTransferView(APIView):
+    """Pay many recipients in one request (payroll / marketplace payouts)"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    @idempotent
+    def post(self, request):
+        serializer = BatchTransferSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            currency = serializer.validated_data.get('currency', 'USD')
+            sender_wallet = WalletService.get_or_create_wallet(request.user, currency)
+            result = TransactionService.batch_transfer(
+                sender_wallet=sender_wallet,
+                transfers=serializer.validated_data['transfers'],
+                pin=serializer.validated_data.get('pin'),
+                pin_token=serializer.validated_data.get('pin_token'),
+                description=serializer.validated_data.get('description', '')
+            )
+            return Response({
+                'message': f"{result['succeeded']} of {result['total']} transfers completed",
+                **result
+            }, status=status.HTTP_201_CREATED)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+class WalletHoldListView(generics.ListAPIView):
+    """List authorization holds on the user's wallets; ?status= filters"""
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = WalletHoldSerializer
+    pagination_class = CreatedAtCursorPagination
+    
+    def get_queryset(self):
+        queryset = WalletHold.objects.filter(wallet__user=self.request.user).select_related('wallet')
+        status_filter = self.request.query_params.get('status')
+        if status_filter:
+            queryset = queryset.filter(status=status_filter)
+        return queryset
+
+class StandingOrderListView(generics.ListAPIView):
+    """List the user's standing orders"""
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = StandingOrderSerializer
+    
+    def get_queryset(self):
+        return StandingOrder.objects.filter(
+            wallet__user=self.request.user
+        ).select_related('wallet').order_by('-created_at')
+
+class CreateStandingOrderView(APIView):
+    """Schedule a recurring transfer"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    @idempotent
+    def post(self, request):
+        serializer = CreateStandingOrderSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        try:
+            wallet = WalletService.get_or_create_wallet(request.user, data.get('currency', 'USD'))
+            order = StandingOrderService.create(
+                wallet=wallet,
+                recipient_email=data['recipient_email'],
+                amount=data['amount'],
+                frequency=data['frequency'],
+                first_run_at=data.get('first_run_at') or timezone.now(),
+                end_date=data.get('end_date'),
+                description=data.get('description', ''),
+                pin=data.get('pin'),
+                pin_token=data.get('pin_token')
+            )
+            return Response({
+                'message': 'Standing order created',
+                'standing_order': StandingOrderSerializer(order).data
+            }, status=status.HTTP_201_CREATED)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+class CancelStandingOrderView(APIView):
+    """Cancel a standing order"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request, pk):
+        try:
+            order = StandingOrder.objects.get(id=pk, wallet__user=request.user)
+        except StandingOrder.DoesNotExist:
+            return Response({'error': 'Standing order not found'}, status=status.HTTP_404_NOT_FOUND)
+        StandingOrderService.cancel(order)
+        return Response({
+            'message': 'Standing order cancelled',
+            'standing_order': StandingOrderSerializer(order).data
+        })
+
 class DepositView(APIView):
     """Deposit money into wallet (simulated)"""
     permission_classes = [permissions.IsAuthenticated]
     
+    @idempotent
     def post(self, request):
         serializer = DepositSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -141,6 +479,7 @@ class WithdrawView(APIView):
     """Withdraw money from wallet"""
     permission_classes = [permissions.IsAuthenticated]
     
+    @idempotent
     def post(self, request):
         serializer = WithdrawSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -150,7 +489,8 @@ class WithdrawView(APIView):
             transaction = TransactionService.withdraw(
                 wallet=wallet,
                 amount=serializer.validated_data['amount'],
-                pin=serializer.validated_data['pin'],
+                pin=serializer.validated_data.get('pin'),
+                pin_token=serializer.validated_data.get('pin_token'),
                 description=serializer.validated_data.get('description', 'Withdrawal')
             )
             return Response({
@@ -165,7 +505,7 @@ class TransferLimitsView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get(self, request):
-        limit = TransferLimitService.get_or_create_limit(request.user)
+        limit = TransferLimitService.get_limit_status(request.user)
         serializer = TransferLimitSerializer(limit)
         return Response(serializer.data)
 
@@ -192,3 +532,26 @@ class CalculateFeeView(APIView):
             'fee': fee,
             'total': serializer.validated_data['amount'] + fee
         })
+
+class BatchCalculateFeeView(APIView):
+    """Calculate fees for many (transaction_type, amount) pairs in one request"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request):
+        serializer = BatchCalculateFeeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        quotes = serializer.validated_data['quotes']
+        fees = TransactionService.calculate_fees(
+            [(quote['transaction_type'], quote['amount']) for quote in quotes]
+        )
+        return Response({
+            'quotes': [
+                {
+                    'transaction_type': quote['transaction_type'],
+                    'amount': quote['amount'],
+                    'fee': fee,
+                    'total': quote['amount'] + fee
+                }
+                for quote, fee in zip(quotes, fees)
+            ]
+        })